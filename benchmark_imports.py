@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Import-time benchmark for the CLI entry points.
+
+Each module is imported in a fresh interpreter, timed, and checked for
+heavy dependencies that should only load on the code paths that use them;
+main.py's quick commands (--setup, --validate-config, --estimate-only) are
+run the same way. Exits non-zero if a module or command fails, pulls in a
+heavy dependency or exceeds its time budget, so it can guard against
+regressions:
+
+    python benchmark_imports.py
+    python benchmark_imports.py --repeat 10 --budget-ms 150
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Modules imported on startup by main.py's quick commands and the scripts
+ENTRY_MODULES = [
+    "src.config.settings",
+    "src.core.values",
+    "src.data_storage",
+    "src.utils.forecasting",
+    "src.utils.cost_estimation",
+    "view_results",
+    "create_html_analysis",
+]
+
+# Dependencies that cost tens to hundreds of milliseconds to import
+HEAVY_MODULES = ["pandas", "numpy", "jsonlines", "openai", "anthropic", "scipy", "duckdb", "src.utils.live_dashboard"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+# Runs main.py in-process with the given arguments, then reports what it imported
+COMMAND_PROBE = """
+import json, runpy, sys
+sys.argv = ["main.py"] + {args!r}
+code = 0
+try:
+    runpy.run_path("main.py", run_name="__main__")
+except SystemExit as e:
+    code = e.code or 0
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"code": code, "heavy": heavy}}))
+"""
+
+# main.py's quick commands, which must not load heavy dependencies either
+QUICK_COMMANDS = [
+    ["--setup"],
+    ["--validate-config"],
+    ["--estimate-only", "--temperature", "0.7", "--runs", "1"],
+]
+
+ROOT = Path(__file__).parent
+
+
+def measure_import(module: str, repeat: int) -> dict:
+    """Best-of-``repeat`` import time of ``module`` in a fresh interpreter."""
+    best = None
+    heavy = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()
+            return {"module": module, "error": error[-1] if error else "import failed"}
+        sample = json.loads(completed.stdout.strip().splitlines()[-1])
+        best = sample["seconds"] if best is None else min(best, sample["seconds"])
+        heavy = sample["heavy"]
+    return {"module": module, "seconds": best, "heavy": heavy}
+
+
+def probe_command(args: list, work_dir: str) -> dict:
+    """Run ``main.py <args>`` once and list the heavy modules it imported.
+
+    Configuration and data go to ``work_dir`` so the probe never touches the
+    project's own files.
+    """
+    args = args + ["--config-dir", str(Path(work_dir) / "config"), "--data-dir", str(Path(work_dir) / "data"),
+                   "--results-dir", str(Path(work_dir) / "results")]
+    completed = subprocess.run(
+        [sys.executable, "-c", COMMAND_PROBE.format(args=args, heavy=HEAVY_MODULES)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    lines = completed.stdout.strip().splitlines()
+    try:
+        sample = json.loads(lines[-1])
+    except (IndexError, ValueError):
+        error = completed.stderr.strip().splitlines()
+        return {"error": error[-1] if error else "command failed"}
+    if sample["code"] != 0:
+        # main.py reports its own errors on stdout before exiting
+        reason = next((line for line in reversed(lines[:-1]) if "❌" in line), f"exit code {sample['code']}")
+        return {"error": reason.strip(), "heavy": sample["heavy"]}
+    return sample
+
+
+def measure_command(args: list, repeat: int) -> float:
+    """Best-of-``repeat`` wall time of running ``python <args>``."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark import time of the CLI entry points")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module; the fastest counts (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=200.0,
+                        help="Maximum import time per module in milliseconds (default: 200)")
+    args = parser.parse_args()
+
+    print(f"⏱️  Import times (best of {args.repeat}):")
+    failures = 0
+    for module in ENTRY_MODULES:
+        result = measure_import(module, args.repeat)
+        if "error" in result:
+            failures += 1
+            print(f"  ❌ {module}: {result['error']}")
+            continue
+        milliseconds = result["seconds"] * 1000
+        problems = []
+        if result["heavy"]:
+            problems.append(f"imports {', '.join(result['heavy'])}")
+        if milliseconds > args.budget_ms:
+            problems.append(f"over the {args.budget_ms:.0f} ms budget")
+        failures += bool(problems)
+        status = "❌" if problems else "✅"
+        print(f"  {status} {module}: {milliseconds:.1f} ms" + (f" ({'; '.join(problems)})" if problems else ""))
+
+    print("\n🧪 Quick commands:")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for command in QUICK_COMMANDS:
+            label = "main.py " + " ".join(command)
+            result = probe_command(command, work_dir)
+            problems = []
+            if "error" in result:
+                problems.append(f"failed: {result['error']}")
+            if result.get("heavy"):
+                problems.append(f"imports {', '.join(result['heavy'])}")
+            failures += bool(problems)
+            status = "❌" if problems else "✅"
+            print(f"  {status} {label}" + (f" ({'; '.join(problems)})" if problems else ""))
+
+    interpreter = measure_command(["-c", "pass"], args.repeat)
+    startup = measure_command(["main.py", "--help"], args.repeat)
+    print(f"\n🚀 main.py --help: {startup * 1000:.0f} ms ({interpreter * 1000:.0f} ms of it interpreter startup)")
+
+    if failures:
+        print(f"\n❌ {failures} module(s) or command(s) failed, pulled in heavy dependencies or ran over budget")
+        return 1
+    print("\n✅ All entry points import without heavy dependencies")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
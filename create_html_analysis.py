@@ -1,47 +1,37 @@
 #!/usr/bin/env python3
-"""Create HTML manual analysis table for experimental results."""
+"""Create HTML manual analysis table for experimental results.
 
+Run with --watch to keep manual_analysis.html current during a sweep: only
+rows added since the last update are read, per-cell aggregates persist in
+data/analysis_state.json, and only value sections whose cells changed are
+re-rendered. A one-shot report aggregates in SQL through ResultsAnalytics
+(DuckDB when installed), which also reads Parquet exports given with
+--parquet.
+
+Every cell gets Wilson and bootstrap 95% intervals, and every (value,
+temperature) gets Fisher and chi-square tests of natural vs instructed vs
+resistance, plus a logistic-regression temperature trend per (value,
+scenario). They are computed in one vectorized pass over the values that
+changed and cached in the state with the rendered sections.
+"""
+
+import argparse
+import json
+import os
 import sqlite3
-from collections import defaultdict
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set
 
-def create_html_analysis():
-    """Create HTML analysis table from experimental results."""
-    
-    conn = sqlite3.connect('data/results.db')
-    cursor = conn.cursor()
-    
-    # Get all results
-    query = """
-    SELECT 
-        model_name,
-        test_category,
-        value_direction, 
-        value_name,
-        automated_score,
-        session_id
-    FROM test_results 
-    ORDER BY value_name, test_category, value_direction, session_id
-    """
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    conn.close()
-    
-    # Process results
-    results = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-    
-    for row in rows:
-        model_name, test_category, value_direction, value_name, automated_score, session_id = row
-        
-        # Extract temperature from model_name (e.g., "openai-chatgpt-4o-mini_T0.7" -> "0.7")
-        temp = model_name.split('_T')[1] if '_T' in model_name else 'unknown'
-        
-        scenario = f"{test_category}_{value_direction}"
-        results[temp][value_name][scenario].append(automated_score)
-    
-    # Generate HTML
-    html_content = """
-<!DOCTYPE html>
+from src.analysis.analytics import ResultsAnalytics
+from src.utils.model_names import split_model_name
+from src.utils.html_tables import virtual_table_assets, virtual_table_html
+from src.utils.statistics import wilson_interval
+
+SCENARIOS = ['natural_positive', 'natural_negative', 'instructed_positive',
+             'instructed_negative', 'resistance_positive', 'resistance_negative']
+
+PAGE_HEAD = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -144,6 +134,7 @@ def create_html_analysis():
             border-radius: 3px;
         }
     </style>
+    __ASSETS__
 </head>
 <body>
     <div class="container">
@@ -164,14 +155,115 @@ def create_html_analysis():
             </div>
         </div>
 """
+
+
+# Bump whenever the meaning of the persisted aggregates changes (how Yes is
+# counted, how temperatures are keyed, what is cached); older states are rebuilt
+ANALYSIS_STATE_VERSION = 2
+
+
+def new_analysis_state() -> Dict:
+    """Empty aggregate state: nothing processed yet."""
+    return {
+        "version": ANALYSIS_STATE_VERSION,
+        "last_rowid": 0,
+        "cells": {},          # temperature -> value -> scenario -> [successes, scored runs]
+        "temp_counts": {},    # temperature -> stored tests
+        "sessions": [],
+        "total_tests": 0,
+        "sections": {},       # value -> rendered HTML section
+        "section_temperatures": [],
+        "statistics": {}      # value -> [cell rows, scenario-test rows, trend rows]
+    }
+
+
+def load_analysis_state(state_path: str) -> Dict:
+    """Load persisted aggregates, or start fresh if there are none or they are from another version."""
+    if state_path and os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+        if state.get("version") == ANALYSIS_STATE_VERSION:
+            return state
+        print(f"♻️  {state_path} is from an older report version; rebuilding it from the database")
+    return new_analysis_state()
+
+
+def save_analysis_state(state: Dict, state_path: str):
+    _write_atomic(state_path, json.dumps(state))
+
+
+def temperature_label(temperature: Optional[float]) -> str:
+    """State key for a temperature: "0.7", or "unknown" when a result has none."""
+    return 'unknown' if temperature is None else str(float(temperature))
+
+
+def fold_analytics(state: Dict, analytics: ResultsAnalytics):
+    """Fill a fresh state from aggregate queries instead of reading rows one by one."""
+    totals = analytics.totals()
+    state["total_tests"] = totals["tests"]
+    state["sessions"] = totals["session_ids"]
+    for row in analytics.score_summary(by=("temperature",)):
+        state["temp_counts"][temperature_label(row["temperature"])] = row["tests"]
+    for row in analytics.cell_counts():
+        temp = temperature_label(row["temperature"])
+        by_value = state["cells"].setdefault(temp, {}).setdefault(row["value_name"], {})
+        by_value[row["scenario"]] = [int(row["yes"]), int(row["scored"])]
+
+
+def fold_new_rows(state: Dict, db_path: str = 'data/results.db') -> Set[str]:
+    """Fold rows added since the last rowid into the aggregates; return the values that changed."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    # Only rows past the high-water mark
+    query = """
+    SELECT 
+        rowid,
+        model_name,
+        test_type,
+        test_category,
+        value_direction, 
+        value_name,
+        automated_score,
+        session_id,
+        metadata
+    FROM test_results 
+    WHERE rowid > ?
+    ORDER BY rowid
+    """
+    
+    cursor.execute(query, (state["last_rowid"],))
+    rows = cursor.fetchall()
+    conn.close()
     
-    # Get all values from database dynamically
-    values = list(set(row[3] for row in rows))  # row[3] is value_name
-    values.sort()  # Sort for consistent ordering
-    value_titles = [value.replace('_', ' ').title() for value in values]
+    changed = set()
+    sessions = set(state["sessions"])
+    for row in rows:
+        rowid, model_name, test_type, test_category, value_direction, value_name, automated_score, session_id, metadata = row
+        state["last_rowid"] = rowid
+        state["total_tests"] += 1
+        sessions.add(session_id)
+        
+        # Temperature from model_name (e.g., "openai-chatgpt-4o-mini_T0.7" -> "0.7") or metadata
+        temp = temperature_label(split_model_name(model_name, metadata)[1])
+        state["temp_counts"][temp] = state["temp_counts"].get(temp, 0) + 1
+        if automated_score is None:
+            continue
+        
+        scenario = f"{test_category}_{value_direction}" if test_category and value_direction else test_type
+        cell = state["cells"].setdefault(temp, {}).setdefault(value_name, {}).setdefault(scenario, [0, 0])
+        cell[0] += automated_score > 0
+        cell[1] += 1
+        changed.add(value_name)
     
-    for value, title in zip(values, value_titles):
-        html_content += f"""
+    state["sessions"] = sorted(sessions)
+    return changed
+
+
+def render_value_section(state: Dict, value: str, temperatures) -> str:
+    """Render one value's temperature x scenario table."""
+    title = value.replace('_', ' ').title()
+    html_content = f"""
         <div class="value-section">
             <h2>📊 {title}</h2>
             <table>
@@ -188,54 +280,209 @@ def create_html_analysis():
                 </thead>
                 <tbody>
 """
+    
+    # Add data rows for each temperature
+    for temp in temperatures:
+        html_content += f"                    <tr>\n                        <td class=\"temp-header\">{temp}</td>\n"
         
-        # Add data rows for each temperature
-        for temp in sorted(results.keys()):
-            if temp == 'unknown':
-                continue
+        for scenario in SCENARIOS:
+            cell = state["cells"].get(temp, {}).get(value, {}).get(scenario)
+            if cell:
+                successes, total_runs = cell
+                success_rate = (successes / total_runs) * 100 if total_runs > 0 else 0
                 
-            html_content += f"                    <tr>\n                        <td class=\"temp-header\">{temp}</td>\n"
-            
-            scenarios = ['natural_positive', 'natural_negative', 'instructed_positive', 
-                        'instructed_negative', 'resistance_positive', 'resistance_negative']
-            
-            for scenario in scenarios:
-                if value in results[temp] and scenario in results[temp][value]:
-                    scores = results[temp][value][scenario]
-                    total_runs = len(scores)
-                    successes = sum(scores)
-                    success_rate = (successes / total_runs) * 100 if total_runs > 0 else 0
-                    
-                    # Determine color class
-                    if success_rate == 100:
-                        color_class = "perfect"
-                    elif success_rate == 0:
-                        color_class = "failed"
-                    else:
-                        color_class = "partial"
-                    
-                    cell_content = f'<span class="success-rate {color_class}">{success_rate:.0f}%</span><br><small>({successes}/{total_runs})</small>'
+                # Determine color class
+                if success_rate == 100:
+                    color_class = "perfect"
+                elif success_rate == 0:
+                    color_class = "failed"
                 else:
-                    cell_content = '<span class="failed">No data</span>'
+                    color_class = "partial"
                 
-                html_content += f"                        <td>{cell_content}</td>\n"
+                low, high = wilson_interval(successes, total_runs)
+                cell_content = (f'<span class="success-rate {color_class}">{success_rate:.0f}%</span><br><small>({successes}/{total_runs})</small>'
+                                f'<br><small>95% CI {low * 100:.0f}–{high * 100:.0f}%</small>')
+            else:
+                cell_content = '<span class="failed">No data</span>'
             
-            html_content += "                    </tr>\n"
+            html_content += f"                        <td>{cell_content}</td>\n"
         
-        html_content += """                </tbody>
+        html_content += "                    </tr>\n"
+    
+    html_content += """                </tbody>
             </table>
         </div>
 """
+    return html_content
+
+
+def update_sections(state: Dict, changed: Set[str]) -> int:
+    """Re-render the sections of changed values (all of them if a temperature was added)."""
+    temperatures = sorted(temp for temp in state["cells"] if temp != 'unknown')
+    values = sorted({value for by_value in state["cells"].values() for value in by_value})
+    if temperatures != state["section_temperatures"]:
+        # Every table gains a row for the new temperature
+        changed = set(values)
+        state["section_temperatures"] = temperatures
+    for value in changed:
+        state["sections"][value] = render_value_section(state, value, temperatures)
+    return len(changed)
+
+
+def _number(value, digits: int = 6):
+    """JSON-safe float: None for NaN."""
+    value = float(value)
+    return None if value != value else round(value, digits)
+
+
+def cell_statistics(state: Dict, values: Iterable[str]) -> Dict[str, List[List[List]]]:
+    """Intervals and significance tests over the cells of ``values``, in one vectorized pass.
+
+    A value's statistics depend only on its own cells, so they are computed
+    per value: returns value -> [all-cells rows, scenario-test rows,
+    temperature-trend rows].
+    """
+    import numpy as np
+    from src.analysis.intervals import bootstrap_intervals, wilson_intervals
+    from src.analysis.significance import DIRECTIONS, compare_scenarios, temperature_trends
+    
+    temperatures = sorted(state["cells"])
+    values = sorted(values)
+    statistics = {value: [[], [], []] for value in values}
+    if not values:
+        return statistics
+    extra = {scenario for by_value in state["cells"].values() for by_scenario in by_value.values()
+             for scenario in by_scenario} - set(SCENARIOS)
+    scenarios = SCENARIOS + sorted(extra)
+    yes = np.zeros((len(temperatures), len(values), len(scenarios)), dtype=np.int64)
+    runs = np.zeros_like(yes)
+    t_index = {temp: i for i, temp in enumerate(temperatures)}
+    v_index = {value: i for i, value in enumerate(values)}
+    s_index = {scenario: i for i, scenario in enumerate(scenarios)}
+    for temp, by_value in state["cells"].items():
+        for value, by_scenario in by_value.items():
+            if value not in v_index:
+                continue
+            for scenario, (successes, total) in by_scenario.items():
+                position = t_index[temp], v_index[value], s_index[scenario]
+                yes[position], runs[position] = successes, total
+    
+    wilson_low, wilson_high = wilson_intervals(yes, runs)
+    bootstrap_low, bootstrap_high = bootstrap_intervals(yes, runs)
+    for t, v, s in zip(*np.nonzero(runs)):
+        statistics[values[v]][0].append([values[v], scenarios[s], temperatures[t], int(yes[t, v, s]), int(runs[t, v, s]),
+                          _number(yes[t, v, s] / runs[t, v, s]),
+                          _number(wilson_low[t, v, s]), _number(wilson_high[t, v, s]),
+                          _number(bootstrap_low[t, v, s]), _number(bootstrap_high[t, v, s])])
+    
+    tests = compare_scenarios(yes, runs, scenarios)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = yes / runs
+    for t, temp in enumerate(temperatures):
+        for v, value in enumerate(values):
+            for d, direction in enumerate(DIRECTIONS):
+                if np.isnan(tests["chi_square_p"][t, v, d]):
+                    continue
+                statistics[value][1].append(
+                    [value, temp, direction]
+                    + [_number(rates[t, v, s_index[f"{category}_{direction}"]])
+                       for category in ("natural", "instructed", "resistance")]
+                    + [_number(tests[name][t, v, d]) for name in
+                       ("natural_vs_instructed", "natural_vs_resistance", "instructed_vs_resistance", "chi_square_p")]
+                )
+    
+    # Trends need numeric temperatures ('unknown' rows are left out)
+    numeric = [i for i, temp in enumerate(temperatures) if temp.replace('.', '', 1).isdigit()]
+    if len(numeric) > 1:
+        trends = temperature_trends(yes[numeric], runs[numeric], [float(temperatures[i]) for i in numeric], axis=0)
+        for v, value in enumerate(values):
+            for s, scenario in enumerate(scenarios):
+                if np.isnan(trends["slope"][v, s]):
+                    continue
+                statistics[value][2].append([value, scenario, _number(trends["slope"][v, s], 3),
+                                   _number(trends["standard_error"][v, s], 3), _number(trends["p_value"][v, s])])
+    return statistics
+
+
+def update_statistics(state: Dict, changed: Set[str]):
+    """Recompute the cached statistics of changed values only."""
+    state.setdefault("statistics", {}).update(cell_statistics(state, changed))
+
+
+def render_page(state: Dict) -> str:
+    """Assemble the report from cached value sections plus the all-cells table and summary."""
+    html_content = PAGE_HEAD.replace("__ASSETS__", virtual_table_assets())
+    values = sorted(state["sections"])
+    for value in values:
+        html_content += state["sections"][value]
+    
+    statistics = [state["statistics"][value] for value in sorted(state.get("statistics", {}))]
+    cell_rows = sorted((row for rows in statistics for row in rows[0]), key=lambda row: (row[2], row[0], row[1]))
+    scenario_rows = sorted((row for rows in statistics for row in rows[1]), key=lambda row: (row[1], row[0]))
+    trend_rows = [row for rows in statistics for row in rows[2]]
+    scenarios = {row[1] for row in cell_rows}
+    
+    html_content += f"""
+        <div class="value-section">
+            <h2>🔎 All Cells</h2>
+            {virtual_table_html(
+                "all-cells",
+                [("value", "Value"), ("scenario", "Scenario"), ("temperature", "Temperature"),
+                 ("yes", "Yes"), ("runs", "Runs"), ("yes_rate", "Yes-Rate"),
+                 ("wilson_low", "Wilson Low"), ("wilson_high", "Wilson High"),
+                 ("bootstrap_low", "Bootstrap Low"), ("bootstrap_high", "Bootstrap High")],
+                cell_rows,
+                filters=("value", "scenario", "temperature"),
+                categorical=("value", "scenario", "temperature"),
+                formats={name: "percent" for name in ("yes_rate", "wilson_low", "wilson_high",
+                                                      "bootstrap_low", "bootstrap_high")}
+            )}
+        </div>
+        
+        <div class="value-section">
+            <h2>⚖️ Scenario Tests</h2>
+            <p>Fisher exact p-values for each pair of natural, instructed and resistance scenarios, and a chi-square test across all three, per value, temperature and direction.</p>
+            {virtual_table_html(
+                "scenario-tests",
+                [("value", "Value"), ("temperature", "Temperature"), ("direction", "Direction"),
+                 ("natural", "Natural"), ("instructed", "Instructed"), ("resistance", "Resistance"),
+                 ("p_natural_instructed", "p Nat vs Inst"), ("p_natural_resistance", "p Nat vs Res"),
+                 ("p_instructed_resistance", "p Inst vs Res"), ("p_chi_square", "p χ²")],
+                scenario_rows,
+                filters=("value", "temperature", "direction"),
+                categorical=("value", "temperature", "direction"),
+                formats={"natural": "percent", "instructed": "percent", "resistance": "percent",
+                         "p_natural_instructed": "pvalue", "p_natural_resistance": "pvalue",
+                         "p_instructed_resistance": "pvalue", "p_chi_square": "pvalue"}
+            )}
+        </div>
+        
+        <div class="value-section">
+            <h2>🌡️ Temperature Trends</h2>
+            <p>Logistic regression of the Yes-rate on temperature: slope in log-odds per unit of temperature, with its Wald p-value.</p>
+            {virtual_table_html(
+                "temperature-trends",
+                [("value", "Value"), ("scenario", "Scenario"), ("slope", "Slope"),
+                 ("standard_error", "Std. Error"), ("p_value", "p")],
+                trend_rows,
+                filters=("value", "scenario"),
+                categorical=("value", "scenario"),
+                formats={"p_value": "pvalue"}
+            )}
+        </div>
+"""
     
     # Add summary section
+    total_tests = state["total_tests"]
+    session_count = len(state["sessions"])
     html_content += f"""
         <div class="summary">
             <h2>📊 Analysis Summary</h2>
             <div class="key-finding">
-                <strong>Tested Values:</strong> {len(values)} values across {len(set(row[4] for row in rows))} test scenarios each
+                <strong>Tested Values:</strong> {len(values)} values across {len(scenarios)} test scenarios each
             </div>
             <div class="key-finding">
-                <strong>Data Coverage:</strong> {len(rows)} total tests across {len(set(row[5] for row in rows))} experimental sessions
+                <strong>Data Coverage:</strong> {total_tests} total tests across {session_count} experimental sessions
             </div>
             <div class="key-finding">
                 <strong>Analysis:</strong> Review the data patterns above to identify malleable vs immutable AI values, instruction following vs resistance patterns, and temperature effects.
@@ -243,27 +490,94 @@ def create_html_analysis():
         </div>
         
         <div style="text-align: center; margin-top: 40px; color: #7f8c8d; font-size: 12px;">
-            Generated from experimental data • Total tests analyzed: {len(rows)} across {len(set(row[5] for row in rows))} sessions
+            Generated from experimental data • Total tests analyzed: {total_tests} across {session_count} sessions
         </div>
     </div>
 </body>
 </html>
 """
+    return html_content
+
+
+def _write_atomic(path: str, content: str):
+    """Write to a temp file and rename it over ``path`` so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".analysis-", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def update_html_analysis(state: Dict, db_path: str = 'data/results.db',
+                         output_path: str = 'manual_analysis.html') -> int:
+    """Fold new rows into ``state`` and rewrite the report if anything changed.
     
-    # Write HTML file
-    with open('manual_analysis.html', 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    Returns the number of value sections re-rendered.
+    """
+    last_rowid = state["last_rowid"]
+    changed = fold_new_rows(state, db_path)
+    if state["last_rowid"] == last_rowid and os.path.exists(output_path):
+        return 0
+    values = {value for by_value in state["cells"].values() for value in by_value}
+    update_statistics(state, changed | (values - set(state.get("statistics", {}))))
+    rendered = update_sections(state, changed)
+    _write_atomic(output_path, render_page(state))
+    return rendered
+
+
+def create_html_analysis(db_path: str = 'data/results.db', output_path: str = 'manual_analysis.html',
+                         parquet: Sequence[str] = ()):
+    """Create HTML analysis table from experimental results (and any Parquet exports)."""
+    state = new_analysis_state()
+    with ResultsAnalytics(db_path, parquet=parquet) as analytics:
+        fold_analytics(state, analytics)
+    update_statistics(state, {value for by_value in state["cells"].values() for value in by_value})
+    update_sections(state, set())
+    _write_atomic(output_path, render_page(state))
     
-    print("✅ HTML analysis table created: manual_analysis.html")
+    print(f"✅ HTML analysis table created: {output_path}")
     
     # Count tests by temperature
-    temp_counts = {}
-    for row in rows:
-        temp = row[0].split('_T')[1] if '_T' in row[0] else 'unknown'
-        temp_counts[temp] = temp_counts.get(temp, 0) + 1
-    
-    temp_summary = ", ".join([f"Temperature {temp} = {count} tests" for temp, count in sorted(temp_counts.items())])
+    temp_summary = ", ".join([f"Temperature {temp} = {count} tests" for temp, count in sorted(state["temp_counts"].items())])
     print(f"📊 Dataset: {temp_summary}")
 
+
+def watch_html_analysis(db_path: str = 'data/results.db', output_path: str = 'manual_analysis.html',
+                        state_path: str = 'data/analysis_state.json', interval: float = 5.0):
+    """Keep the report current, folding in only new rows every ``interval`` seconds."""
+    state = load_analysis_state(state_path)
+    print(f"👀 Watching {db_path} (from row {state['last_rowid']}); updating {output_path} every {interval:g}s. Ctrl+C to stop.")
+    try:
+        while True:
+            last_rowid = state["last_rowid"]
+            rendered = update_html_analysis(state, db_path, output_path)
+            if state["last_rowid"] != last_rowid:
+                save_analysis_state(state, state_path)
+                print(f"   {state['total_tests']} tests; re-rendered {rendered} value sections")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
 if __name__ == "__main__":
-    create_html_analysis()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create the manual analysis HTML report")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep updating the report incrementally as new results arrive")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between updates in --watch mode (default: 5)")
+    parser.add_argument("--db", default="data/results.db", help="Results database (default: data/results.db)")
+    parser.add_argument("--parquet", nargs="+", default=[], metavar="PATH",
+                        help="Parquet exports to include in a one-shot report (needs DuckDB)")
+    parser.add_argument("--state", default="data/analysis_state.json",
+                        help="Aggregate state file for --watch (default: data/analysis_state.json)")
+    args = parser.parse_args()
+    if args.watch and args.parquet:
+        parser.error("--parquet only applies to a one-shot report; --watch reads new rows from --db")
+    
+    if args.watch:
+        watch_html_analysis(args.db, state_path=args.state, interval=args.interval)
+    else:
+        create_html_analysis(args.db, parquet=args.parquet)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Export binary scores from results.db into a memory-mapped NumPy cube.
+
+Re-running folds in only results added since the last export. Open the
+cube from a notebook or report with:
+
+    from src.analysis.score_cube import ScoreCube
+    cube = ScoreCube.open("data/score_cube")
+    cube.rates()  # Yes-rate per (model, temperature, value, scenario)
+"""
+
+import argparse
+
+from src.analysis.score_cube import export_score_cube
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export scores to a [model, temperature, run, value, scenario] cube")
+    parser.add_argument("--db", default="data/results.db", help="Results database (default: data/results.db)")
+    parser.add_argument("--out", default="data/score_cube",
+                        help="Cube path without extension (default: data/score_cube)")
+    args = parser.parse_args()
+    
+    cube = export_score_cube(args.db, args.out)
+    shape = " x ".join(f"{size} {axis}s" for axis, size in zip(("model", "temperature", "run", "value", "scenario"), cube.shape))
+    print(f"✅ Score cube: {cube.cube_path} ({shape})")
+    print(f"📊 {int(cube.counts.sum())} scores, {int((cube.counts > 0).sum())} cells with data")
+
+
+if __name__ == "__main__":
+    main()
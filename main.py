@@ -5,11 +5,17 @@ import asyncio
 import sys
 import os
 import argparse
+import json
+import time
+from datetime import datetime
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+# Delay between API calls (seconds); also used for runtime forecasts
+RATE_LIMIT_DELAY = 0.5
+
 async def main():
     """Main application entry point."""
     print("🧪 LMCA Value Preservation Study Framework")
@@ -21,13 +27,81 @@ async def main():
     parser.add_argument("--data-dir", default="data", help="Data storage directory")
     parser.add_argument("--results-dir", default="results", help="Results output directory")
     parser.add_argument("--models", nargs="+", help="Models to test (overrides config)")
-    parser.add_argument("--values", nargs="+", help="Values to test (overrides config)")
+    parser.add_argument("--values", nargs="+", help="Values from values.yaml to test (default: all of them)")
+    parser.add_argument("--spec", metavar="PATH",
+                        help="YAML experiment spec (models, values, temperatures, runs, scenarios, per-cell "
+                             "overrides) used instead of the grid flags; see config/experiment.yaml")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="With --spec, run only shard I of N (cells are dealt round-robin to shards)")
     parser.add_argument("--baseline-only", action="store_true", help="Run only baseline tests")
     parser.add_argument("--validate-config", action="store_true", help="Validate configuration and exit")
     parser.add_argument("--setup", action="store_true", help="Set up default configuration files")
-    parser.add_argument("--temperature", type=float, nargs="+", default=[0.7], help="Temperature(s) to test (default: 0.7)")
-    parser.add_argument("--runs", type=int, default=1, help="Number of runs per temperature (default: 1)")
-    parser.add_argument("--estimate-only", action="store_true", help="Show cost estimate only, don't run experiment")
+    # No argparse defaults for these two, so explicit use can be told apart (see --spec)
+    parser.add_argument("--temperature", type=float, nargs="+", help="Temperature(s) to test (default: 0.7)")
+    parser.add_argument("--runs", type=int, help="Number of runs per temperature (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Maximum number of API calls in flight (default: 1)")
+    parser.add_argument("--adaptive-concurrency", action="store_true",
+                        help="Adapt the in-flight limit (AIMD): start at --concurrency, grow while latency "
+                             "stays flat, halve on latency spikes, timeouts or 429s")
+    parser.add_argument("--max-concurrency", type=int, default=32,
+                        help="Upper bound for --adaptive-concurrency (default: 32)")
+    parser.add_argument("--call-timeout", type=float, default=60.0,
+                        help="Seconds before a single API call is cancelled and retried (default: 60)")
+    parser.add_argument("--max-retries", type=int, default=3,
+                        help="Retries with exponential backoff for transient errors such as timeouts, "
+                             "429s and 5xx responses (default: 3)")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Send a duplicate request when a call outlives its model's rolling p95 "
+                             "latency; the first response wins")
+    parser.add_argument("--hedge-budget", type=float, default=0.05,
+                        help="Maximum fraction of requests that may be hedged (default: 0.05)")
+    parser.add_argument("--coalesce-temperatures", nargs="*", default=["0.0"],
+                        help="Temperatures at which identical in-flight requests share one API call "
+                             "('all' for every temperature; pass no values to disable; default: 0.0)")
+    parser.add_argument("--order", choices=["plan", "cache", "stratified"], default="plan",
+                        help="Dispatch order: 'plan' (temperature, run, value, scenario), 'stratified' "
+                             "(interleaved rounds so a partial sweep is a balanced sample) or 'cache' "
+                             "(group requests sharing a system prompt for provider prompt caching)")
+    parser.add_argument("--adaptive-runs", action="store_true",
+                        help="Stop sampling each (model, temperature, value, scenario) cell once its "
+                             "Yes-rate confidence interval is narrower than --ci-width")
+    parser.add_argument("--ci-width", type=float, default=0.3,
+                        help="Target 95%% Wilson interval width for --adaptive-runs (default: 0.3)")
+    parser.add_argument("--min-runs", type=int, default=3,
+                        help="Minimum runs per cell for --adaptive-runs and --plan-power (default: 3)")
+    parser.add_argument("--max-runs-per-cell", type=int,
+                        help="Cap on runs per cell for --adaptive-runs (default: 3 x --runs), --plan-power and --deadline (default: 100)")
+    parser.add_argument("--adaptive-temperature", action="store_true",
+                        help="Treat --temperature as a coarse grid (default 0.0 0.5 1.0) and bisect only "
+                             "where Yes-rates flip between neighbouring temperatures")
+    parser.add_argument("--flip-threshold", type=float, default=0.5,
+                        help="Yes-rate change between neighbours that triggers bisection (default: 0.5)")
+    parser.add_argument("--temperature-resolution", type=float, default=0.05,
+                        help="Smallest temperature gap --adaptive-temperature will bisect (default: 0.05)")
+    parser.add_argument("--plan-power", action="store_true",
+                        help="Size runs per cell from prior results in results.db, write a run allocation and exit")
+    parser.add_argument("--comparison", choices=["natural-resistance", "natural-instructed", "temperature"],
+                        default="natural-resistance", help="Effect --plan-power sizes runs for (default: natural-resistance)")
+    parser.add_argument("--effect-size", type=float, default=0.2,
+                        help="Yes-rate difference --plan-power should detect (default: 0.2)")
+    parser.add_argument("--power", type=float, default=0.8, help="Statistical power for --plan-power (default: 0.8)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level for --plan-power (default: 0.05)")
+    parser.add_argument("--allocation-out", help="Where --plan-power writes the allocation (default: <results-dir>/run_allocation.json)")
+    parser.add_argument("--run-allocation", help="Run allocation file from --plan-power giving runs per cell")
+    parser.add_argument("--deadline",
+                        help="Time-box the sweep: a duration (e.g. 90m, 2h, 45s; bare numbers are minutes) or "
+                             "an ISO time. Runs stratified rounds until the deadline, up to --max-runs-per-cell "
+                             "(default: 100) per cell")
+    parser.add_argument("--drain-margin", type=float, default=30.0,
+                        help="Seconds kept free before --deadline for in-flight calls to finish (default: 30)")
+    parser.add_argument("--save-plan", metavar="PATH",
+                        help="Write the compiled, ordered experiment plan to PATH as JSON")
+    parser.add_argument("--load-plan", metavar="PATH",
+                        help="Run a plan written by --save-plan instead of compiling one from the arguments")
+    parser.add_argument("--serve-dashboard", type=int, nargs="?", const=8765, metavar="PORT",
+                        help="Serve the live dashboard at http://127.0.0.1:PORT/ (default port: 8765), "
+                             "streaming updates instead of reloading the page")
+    parser.add_argument("--estimate-only", action="store_true", help="Show cost and runtime forecast only, don't run experiment")
     
     args = parser.parse_args()
     print("✅ Arguments parsed")
@@ -37,14 +111,10 @@ async def main():
     load_dotenv()
     print("✅ Environment loaded")
     
-    # Import components
+    # Import components; heavier ones (model SDKs, pandas, the dashboard) are
+    # imported where they are first needed so the quick commands start fast
     from src.config.settings import ConfigurationManager
-    from src.models.factory import ModelFactory
-    from src.core.values import ValueRegistry, INITIAL_VALUES
-    from src.evaluation.simple import SimpleYesNoEvaluator
-    from src.data_storage import DataStorage
-    from src.utils.live_dashboard import LiveDashboard
-    print("✅ All imports successful")
+    print("✅ Core imports successful")
     
     # Initialize configuration manager
     config_mgr = ConfigurationManager(args.config_dir)
@@ -74,7 +144,7 @@ async def main():
     print("📁 Loading configuration...")
     try:
         api_config = config_mgr.load_api_config()
-        value_registry = ValueRegistry(INITIAL_VALUES)
+        value_registry = config_mgr.load_values_config()
         print("✅ Configuration loaded")
     except Exception as e:
         print(f"Failed to load configuration: {e}")
@@ -83,29 +153,181 @@ async def main():
     # Determine models and values to test
     models_to_test = args.models or ["chatgpt-4o-mini"]
     values_to_test = value_registry.get_all_values()
+    if args.values:
+        unknown = [name for name in args.values if name not in value_registry.list_value_names()]
+        if unknown:
+            print(f"❌ Unknown values {unknown}; {config_mgr.values_config_file} defines "
+                  f"{value_registry.list_value_names()}")
+            return 1
+        values_to_test = [value for value in values_to_test if value.name in args.values]
+    
+    spec = None
+    shard = (0, 1)
+    if args.spec:
+        conflicting = [flag for flag, used in (("--adaptive-runs", args.adaptive_runs),
+                                               ("--adaptive-temperature", args.adaptive_temperature),
+                                               ("--run-allocation", args.run_allocation),
+                                               ("--load-plan", args.load_plan),
+                                               ("--deadline", args.deadline),
+                                               ("--plan-power", args.plan_power),
+                                               ("--models", args.models),
+                                               ("--values", args.values),
+                                               ("--temperature", args.temperature),
+                                               ("--runs", args.runs is not None)) if used]
+        if conflicting:
+            print(f"❌ --spec cannot be combined with {', '.join(conflicting)}")
+            return 1
+        from src.config.experiment_spec import ExperimentSpec, parse_shard
+        try:
+            spec = ExperimentSpec.load(args.spec, value_registry)
+            if args.shard:
+                shard = parse_shard(args.shard)
+        except (OSError, ValueError) as e:
+            print(f"❌ Invalid experiment spec {args.spec}: {e}")
+            return 1
+        models_to_test = spec.models
+        values_to_test = spec.values
+        shard_note = f", shard {shard[0] + 1}/{shard[1]}" if shard[1] > 1 else ""
+        print(f"📐 Spec '{spec.name}': {spec.cell_count} cells, "
+              f"{spec.count_work_items(*shard)} calls{shard_note}")
+    elif args.shard:
+        print("❌ --shard needs --spec")
+        return 1
+    if args.temperature is None:
+        args.temperature = [0.7]
+    if args.runs is None:
+        args.runs = 1
     
     print(f"🎯 Models: {models_to_test}")
     print(f"🎯 Values: {[v.name for v in values_to_test]}")
     
+    if args.plan_power:
+        from src.utils.power_planning import PowerPlanner, load_prior_rates, save_run_allocation
+        planner = PowerPlanner(
+            load_prior_rates(str(Path(args.data_dir) / "results.db")),
+            effect_size=args.effect_size,
+            alpha=args.alpha,
+            power=args.power,
+            min_runs=args.min_runs,
+            max_runs=args.max_runs_per_cell or 100
+        )
+        allocation = planner.allocate(models_to_test, values_to_test, args.temperature, args.comparison)
+        allocation_path = args.allocation_out or str(Path(args.results_dir) / "run_allocation.json")
+        save_run_allocation(planner.to_dict(allocation, args.comparison), allocation_path)
+        
+        print(f"\n📐 Power plan: detect a {args.effect_size:.2f} difference ({args.comparison}) "
+              f"at power {args.power} and alpha {args.alpha}")
+        for (model_name, temperature, value_name, scenario), runs in allocation.items():
+            print(f"  {model_name} T{temperature} {value_name} {scenario}: {runs} runs")
+        print(f"📈 Total calls: {sum(allocation.values())} "
+              f"(uniform {args.runs} runs would be {args.runs * len(allocation)})")
+        print(f"💾 Run allocation saved to {allocation_path}")
+        print(f"   Run it with: python main.py --run-allocation {allocation_path} ...")
+        return 0
+    
     # Initialize components
     print("💾 Initializing components...")
+    from src.data_storage import AsyncDataStorage, DataStorage
     storage = DataStorage(args.data_dir)
-    dashboard = LiveDashboard("live_progress.html")
-    dashboard_path = dashboard.get_dashboard_path()
     
-    print(f"📊 Live dashboard: file://{dashboard_path}")
-    print("   Open this URL in your browser to see real-time progress!")
+    # Compile the full experiment plan up front
+    from src.testing.experiment_plan import ExperimentPlan, compile_experiment_plan
+    from src.execution.scheduling import order_work_items
+    if args.adaptive_runs and args.adaptive_temperature:
+        print("❌ --adaptive-runs and --adaptive-temperature cannot be combined")
+        return 1
+    if args.adaptive_runs and args.runs < args.min_runs:
+        print(f"❌ --adaptive-runs needs --runs of at least --min-runs ({args.min_runs}); "
+              f"the budget of {args.runs} run(s) per cell would run out before any cell converged")
+        return 1
+    if args.run_allocation:
+        ignored = [flag for flag, used in (("--adaptive-runs", args.adaptive_runs),
+                                           ("--adaptive-temperature", args.adaptive_temperature),
+                                           ("--deadline", args.deadline),
+                                           ("--load-plan", args.load_plan)) if used]
+        if ignored:
+            print(f"❌ --run-allocation cannot be combined with {', '.join(ignored)}")
+            return 1
+    if args.deadline:
+        if args.adaptive_runs or args.adaptive_temperature:
+            print("❌ --deadline cannot be combined with --adaptive-runs or --adaptive-temperature")
+            return 1
+        from src.execution.deadline import parse_deadline
+        try:
+            deadline_seconds = parse_deadline(args.deadline)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        if deadline_seconds <= args.drain_margin:
+            print(f"❌ Deadline {args.deadline} leaves no time after the {args.drain_margin:.0f}s drain margin")
+            return 1
+        # Fix the deadline now, so time spent at the confirmation prompt counts against it
+        deadline_at = time.monotonic() + deadline_seconds
+    if args.load_plan:
+        if args.adaptive_runs or args.adaptive_temperature:
+            print("❌ --load-plan cannot be combined with --adaptive-runs or --adaptive-temperature")
+            return 1
+        try:
+            plan = ExperimentPlan.load(args.load_plan)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Could not load plan {args.load_plan}: {e}")
+            return 1
+        loaded_values = set(item.value_name for item in plan)
+        values_to_test = [value for value in values_to_test if value.name in loaded_values]
+        print(f"📐 Loaded {len(plan)} planned tests from {args.load_plan}")
+    elif spec:
+        # Estimates stream straight from the spec; only a run (or --save-plan) compiles the shard
+        plan = None if args.estimate_only and not args.save_plan else spec.compile_plan(*shard)
+    elif args.adaptive_temperature:
+        # The plan covers the coarse grid; bisection adds midpoints as it goes
+        from src.execution.temperature_search import DEFAULT_COARSE_TEMPERATURES
+        coarse_temperatures = sorted(args.temperature) if len(args.temperature) > 1 else list(DEFAULT_COARSE_TEMPERATURES)
+        plan = compile_experiment_plan(models_to_test, values_to_test, coarse_temperatures, args.runs)
+    elif args.run_allocation:
+        from src.utils.power_planning import load_run_allocation
+        plan = compile_experiment_plan(
+            models_to_test, values_to_test, args.temperature, args.runs,
+            runs_per_cell=load_run_allocation(args.run_allocation)
+        )
+        print(f"📐 Using run allocation from {args.run_allocation}")
+    elif args.deadline:
+        # Compile up to the cap; the deadline decides how many rounds actually run
+        plan = compile_experiment_plan(
+            models_to_test, values_to_test, args.temperature, args.max_runs_per_cell or 100
+        )
+    else:
+        plan = compile_experiment_plan(models_to_test, values_to_test, args.temperature, args.runs)
+    # A time-boxed sweep must be stratified so stopping early leaves a balanced sample
+    if plan is not None and (args.deadline or args.order != "plan"):
+        plan = ExperimentPlan(order_work_items(plan, "stratified" if args.deadline else args.order))
+    if args.save_plan:
+        plan.save(args.save_plan)
+        print(f"💾 Experiment plan saved to {args.save_plan} ({len(plan)} tests, {len(plan.prompts)} distinct prompts)")
     
-    # Cost estimation and confirmation
+    # Cost and runtime forecast from the real plan and historical latency
     from src.utils.cost_estimation import CostEstimator
+    from src.utils.forecasting import ExperimentForecaster, LatencyHistory
     cost_estimator = CostEstimator()
+    history = LatencyHistory.from_database(
+        str(storage.db_path), rate_limit_delay=RATE_LIMIT_DELAY, cost_estimator=cost_estimator
+    )
+    forecaster = ExperimentForecaster(cost_estimator, history)
+    
+    # With a deadline, forecast only the rounds history says will fit
+    forecast_plan = plan if plan is not None else spec.iter_work_items(*shard)
+    if args.deadline:
+        first_round = plan.filter(lambda item: item.run_index == 0)
+        round_seconds = forecaster.forecast(first_round, args.concurrency, RATE_LIMIT_DELAY).eta_seconds()
+        expected_runs = max(1, int((deadline_seconds - args.drain_margin) / max(round_seconds, 1e-6)))
+        forecast_plan = plan.filter(lambda item: item.run_index < expected_runs)
+        print(f"\n⏱️  Deadline in {deadline_seconds / 60:.1f} min: historical latency suggests "
+              f"~{min(expected_runs, max(item.run_index for item in plan) + 1)} runs per cell")
     
-    # Show detailed cost estimate 
-    proceed = cost_estimator.print_cost_estimate(
-        model_name=models_to_test[0],
-        num_values=len(values_to_test),
-        num_temperatures=len(args.temperature),
-        num_runs=args.runs,
+    # Show detailed cost and ETA forecast
+    proceed = forecaster.print_forecast(
+        forecast_plan,
+        concurrency=args.concurrency,
+        rate_limit_delay=RATE_LIMIT_DELAY,
         require_confirmation=not args.estimate_only  # Skip confirmation if estimate-only
     )
     
@@ -117,141 +339,219 @@ async def main():
         print("❌ Experiment cancelled by user")
         return 0
     
+    from src.utils.live_dashboard import LiveDashboard
+    if args.serve_dashboard is not None:
+        # The browser gets live updates from the server, so the file only needs occasional refreshes
+        from src.utils.dashboard_server import DashboardServer
+        dashboard = LiveDashboard("live_progress.html", max_writes_per_second=0.2)
+        dashboard_server = DashboardServer(dashboard, port=args.serve_dashboard)
+        dashboard_server.start()
+        print(f"📊 Live dashboard: {dashboard_server.url}")
+    else:
+        dashboard = LiveDashboard("live_progress.html")
+        dashboard_server = None
+        print(f"📊 Live dashboard: file://{dashboard.get_dashboard_path()}")
+    dashboard_path = dashboard.get_dashboard_path()
+    print("   Open this URL in your browser to see real-time progress!")
+    
     # Calculate total tests for dashboard
-    total_tests = len(values_to_test) * 6 * len(args.temperature) * args.runs
+    total_tests = len(forecast_plan)
     dashboard.start_experiment("LMCA Baseline Study", total_tests)
     
     print("🔧 Creating SimpleYesNoEvaluator...")
+    from src.evaluation.simple import SimpleYesNoEvaluator
     evaluator = SimpleYesNoEvaluator()
     print("✅ SimpleYesNoEvaluator created")
     
     print("✅ Test components initialized")
     
-    # Run comprehensive baseline tests
-    print("\n🚀 Starting comprehensive baseline tests...")
-    from src.core.results import TestType, TestPhase, TestCategory, ValueDirection
-    from src.testing.comprehensive_prompts import generate_comprehensive_test_matrix, get_test_type_from_scenario
+    # Identical in-flight requests share one API call at the configured temperatures
+    from src.execution.coalescing import SingleFlight
+    from src.execution.runner import ExperimentRunner
+    single_flight = None
+    if args.coalesce_temperatures:
+        coalesce_all = "all" in args.coalesce_temperatures
+        single_flight = SingleFlight(
+            None if coalesce_all else [float(t) for t in args.coalesce_temperatures]
+        )
+    
+    # Optionally adapt the in-flight limit to observed latency and errors
+    concurrency_controller = None
+    if args.adaptive_concurrency:
+        from src.execution.concurrency import AIMDConcurrencyController
+        concurrency_controller = AIMDConcurrencyController(
+            initial_limit=args.concurrency,
+            max_limit=args.max_concurrency,
+            on_change=dashboard.update_concurrency
+        )
+    
+    # Optionally race slow calls against a duplicate request
+    hedging_policy = None
+    if args.hedge:
+        from src.execution.hedging import HedgingPolicy
+        hedging_policy = HedgingPolicy(max_hedge_fraction=args.hedge_budget)
     
-    results = []
-    test_count = 0
+    # Every call gets a deadline; transient errors are retried with backoff
+    from src.execution.retry import RetryPolicy
+    retry_policy = RetryPolicy(call_timeout=args.call_timeout, max_retries=args.max_retries)
     
-    # Loop through temperatures
-    for temp_idx, temperature in enumerate(args.temperature):
-        print(f"\n🌡️ Temperature: {temperature}")
+    # Results are written by a background thread so sqlite never blocks API calls
+    result_writer = AsyncDataStorage(storage)
+    
+    from src.models.factory import ModelFactory
+    runner = ExperimentRunner(
+        client_factory=lambda model_name, temperature: ModelFactory.create_from_name(
+            model_name,
+            api_config.openai_api_key,
+            temperature=temperature
+        ),
+        evaluator=evaluator,
+        storage=result_writer,
+        dashboard=dashboard,
+        cost_estimator=cost_estimator,
+        concurrency=args.concurrency,
+        rate_limit_delay=RATE_LIMIT_DELAY,
+        single_flight=single_flight,
+        concurrency_controller=concurrency_controller,
+        hedging_policy=hedging_policy,
+        retry_policy=retry_policy
+    )
+    
+    # Run comprehensive baseline tests
+    print(f"\n🚀 Starting comprehensive baseline tests (concurrency {args.concurrency})...")
+    try:
+        if args.adaptive_runs:
+            from src.execution.adaptive import SequentialSampler
+            sampler = SequentialSampler(
+                (item for item in plan if item.run_index == 0),
+                runs=args.runs,
+                target_width=args.ci_width,
+                min_runs=args.min_runs,
+                max_runs_per_cell=args.max_runs_per_cell
+            )
+            completed = 0
+            round_number = 0
+            while True:
+                batch = sampler.next_round()
+                if not batch:
+                    break
+                round_number += 1
+                print(f"\n🔁 Adaptive round {round_number}: {len(batch)} cells still uncertain")
+                completed += await runner.run(batch, total_tests, on_result=sampler.record_result)
         
-        # Loop through runs for this temperature
-        for run_idx in range(args.runs):
-            if args.runs > 1:
-                print(f"  📊 Run {run_idx + 1}/{args.runs}")
-            
-            for value in values_to_test:
-                if args.runs == 1:
-                    print(f"    🔬 Testing value: {value.name}")
-                else:
-                    print(f"      🔬 Testing value: {value.name}")
-                
-                # Generate comprehensive test matrix for this value  
-                test_matrix = generate_comprehensive_test_matrix(value)
+            summary = sampler.summary()
+            total_tests = summary["calls_used"]
+            dashboard.set_total_tests(total_tests)
+            print(f"\n🎯 Adaptive sampling: {summary['converged']}/{summary['cells']} cells reached "
+                  f"CI width ≤ {args.ci_width} using {summary['calls_used']}/{summary['budget']} calls")
+            if summary["budget_exhausted"] and summary["unconverged"]:
+                print(f"⚠️  Budget exhausted with {summary['unconverged']} cells still wider than "
+                      f"{args.ci_width} ({summary['converged']} converged); raise --runs to sample them further")
+        elif args.adaptive_temperature:
+            from src.execution.temperature_search import TemperatureBisector
+            bisector = TemperatureBisector(
+                plan,
+                coarse_temperatures=coarse_temperatures,
+                runs=args.runs,
+                flip_threshold=args.flip_threshold,
+                resolution=args.temperature_resolution
+            )
+            completed = 0
+            round_number = 0
+            while True:
+                batch = bisector.next_round()
+                if not batch:
+                    break
+                round_number += 1
+                temperatures = sorted(set(item.temperature for item in batch))
+                print(f"\n🔁 Temperature round {round_number}: {len(batch)} calls at {temperatures}")
+                dashboard.set_total_tests(bisector.issued)
+                completed += await runner.run(batch, bisector.issued, on_result=bisector.record_result)
         
-                for test_scenario in test_matrix:
-                    test_count += 1
-                    category = test_scenario["category"]
-                    direction = test_scenario["direction"] 
-                    test_name = test_scenario["test_name"]
-                    
-                    test_desc = f"T{temperature}_R{run_idx+1}_{value.name}_{test_name}"
-                    
-                    indent = "      " if args.runs == 1 else "        "
-                    print(f"{indent}[{test_count}/{total_tests}] {test_name}")
-                    dashboard.update_current_test(f"[{test_count}/{total_tests}] {test_desc}")
-            
-                    try:
-                        # Use the system and user prompts from test matrix
-                        system_prompt = test_scenario["system_prompt"]
-                        user_prompt = test_scenario["user_prompt"]
-                        
-                        # Create test client for this temperature
-                        test_client = ModelFactory.create_from_name(
-                            models_to_test[0], 
-                            api_config.openai_api_key,
-                            temperature=temperature
-                        )
-                
-                        # Generate response
-                        response = await test_client.generate(
-                            prompt=user_prompt,
-                            system_prompt=system_prompt
-                        )
-                        
-                        # Create TestResult with temperature and run info
-                        from src.core.results import TestResult
-                        proper_test_type = get_test_type_from_scenario(category, direction)
-                        result = TestResult(
-                            model_name=f"{test_client.get_model_name()}_T{temperature}",
-                            test_phase=TestPhase.BASELINE,
-                            value_name=value.name,
-                            test_type=proper_test_type,
-                            test_category=category,
-                            value_direction=direction,
-                            system_prompt=system_prompt,
-                            prompt_used=user_prompt,
-                            response_text=response.text,
-                            session_id=f"temp_{temperature}_run_{run_idx}",
-                            metadata={"temperature": temperature, "run": run_idx}
-                        )
-                
-                        # Evaluate
-                        evaluation = evaluator.evaluate_result(result)
-                        result.evaluation = evaluation
-                        
-                        # Save
-                        storage.save_result(result)
-                        results.append(result)
-                        
-                        # Calculate actual cost for this test using dynamic estimation
-                        actual_cost = cost_estimator.calculate_test_cost(
-                            system_prompt, user_prompt, models_to_test[0]
-                        )
-                        
-                        # Update dashboard
-                        test_data = {
-                            "value": value.name,
-                            "test_type": f"{test_name}_T{temperature}_R{run_idx+1}",
-                            "model": result.model_name,
-                            "system_prompt": system_prompt,
-                            "question": user_prompt,
-                            "response": result.response_text,
-                            "cost": actual_cost,
-                            "evaluation_score": evaluation.automated_score,
-                            "evaluation_confidence": evaluation.automated_confidence.value
-                        }
-                        dashboard.complete_test(test_data)
-                        
-                        print(f"{indent}  ✅ Score: {evaluation.automated_score} | Response: {result.response_text[:30]}...")
-                        
-                    except Exception as e:
-                        print(f"{indent}  ❌ Error: {e}")
-                        dashboard.add_error(str(e), test_desc)
-                    
-                    await asyncio.sleep(0.5)  # Rate limiting
+            total_tests = bisector.issued
+            curves = bisector.transition_curves()
+            results_dir = Path(args.results_dir)
+            results_dir.mkdir(parents=True, exist_ok=True)
+            curves_path = results_dir / f"temperature_curves_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            with open(curves_path, 'w') as f:
+                json.dump(curves, f, indent=2)
+        
+            print(f"\n🌡️ Temperature transitions ({bisector.issued} calls vs "
+                  f"{bisector.uniform_grid_calls()} for a uniform {args.temperature_resolution} grid):")
+            for value_name, scenarios in curves.items():
+                flips = {name: c["transition_temperature"] for name, c in scenarios.items()
+                         if c["transition_temperature"] is not None}
+                print(f"  {value_name}: {flips if flips else 'no transitions'}")
+            print(f"📈 Transition curves saved to {curves_path}")
+        elif args.deadline:
+            from src.execution.deadline import DeadlineScheduler
+            scheduler = DeadlineScheduler(
+                deadline_at - time.monotonic(),
+                drain_margin=args.drain_margin,
+                initial_latency=max(
+                    history.latency_for(model_name, temperature).percentile(95)
+                    for model_name in plan.models for temperature in plan.temperatures
+                )
+            )
+            completed = await runner.run(plan, total_tests, on_result=scheduler.record_result, admit=scheduler.admit)
+        
+            total_tests = scheduler.issued
+            dashboard.set_total_tests(total_tests)
+            coverage = scheduler.coverage_report()
+            results_dir = Path(args.results_dir)
+            results_dir.mkdir(parents=True, exist_ok=True)
+            coverage_path = results_dir / f"deadline_coverage_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            with open(coverage_path, 'w') as f:
+                json.dump(coverage, f, indent=2)
+        
+            status = "before" if coverage["finished_before_deadline"] else "AFTER"
+            print(f"\n⏱️  Deadline sweep finished {status} the deadline: {coverage['completed']} results at "
+                  f"{coverage['throughput_per_second']:.2f} tests/s, {coverage['not_issued']} planned tests not issued")
+            for runs, cells in coverage["sample_sizes"].items():
+                print(f"  {cells} cells reached {runs} runs")
+            print(f"📈 Per-cell sample sizes saved to {coverage_path}")
+        else:
+            completed = await runner.run(plan, total_tests)
+    finally:
+        # Make sure every result is on disk before reporting on it, even after Ctrl+C or an error
+        await result_writer.close()
+    
+    if single_flight and single_flight.coalesced:
+        print(f"\n🔗 Coalesced {single_flight.coalesced} duplicate in-flight requests")
+    if concurrency_controller:
+        snapshot = concurrency_controller.snapshot()
+        print(f"🚦 Final in-flight limit: {snapshot['limit']} (p95 latency "
+              f"{snapshot['p95_latency'] or 0:.2f}s)")
+    if retry_policy.retries:
+        print(f"🔁 Retried {retry_policy.retries} calls ({retry_policy.timeouts} timeouts)")
+    if runner.failed:
+        print(f"⚠️  {runner.failed} tests failed; see the failed_tests table in {storage.db_path}")
+    if hedging_policy and hedging_policy.hedges:
+        print(f"🏁 Hedged {hedging_policy.hedges}/{hedging_policy.requests} requests "
+              f"({hedging_policy.hedge_wins} duplicates answered first)")
+    if runner.cached_tokens:
+        print(f"🗄️  Prompt cache: {runner.cached_tokens} cached input tokens "
+              f"(saved ~${runner.cache_savings:.6f})")
     
     # Complete experiment
     dashboard.complete_experiment()
+    if dashboard_server:
+        dashboard_server.stop()
     
     print("\n" + "=" * 50)
     print("🎉 BASELINE STUDY COMPLETE")
     print("=" * 50)
-    print(f"Tests completed: {len(results)}/{total_tests}")
+    print(f"Tests completed: {completed}/{total_tests}")
     print(f"📊 Live dashboard: file://{dashboard_path}")
     
-    # Quick analysis
-    if results:
+    # Quick analysis from the runner's running per-cell aggregates
+    if completed:
         print("\n📊 QUICK FINDINGS:")
+        by_value = runner.aggregator.by_value()
         for value in values_to_test:
-            value_results = [r for r in results if r.value_name == value.name and r.evaluation]
-            if value_results:
-                avg_score = sum(r.evaluation.automated_score for r in value_results) / len(value_results)
-                print(f"  {value.name}: avg score {avg_score:.2f}")
+            aggregate = by_value.get(value.name)
+            if aggregate and aggregate.scored:
+                print(f"  {value.name}: avg score {aggregate.mean_score:.2f}")
     
     # Auto-generate HTML analysis report
     print("\n📋 Generating analysis report...")
@@ -0,0 +1,265 @@
+"""Canned analytics queries over results.db and Parquet exports.
+
+``ResultsAnalytics`` runs on DuckDB when it is installed: results.db is
+attached read-only through DuckDB's sqlite extension, Parquet exports are
+read in place, and group-bys run on its columnar, multi-threaded engine.
+Without DuckDB (or its sqlite extension) the same queries run on sqlite3,
+over results.db only. Extensions are never downloaded on the fly; install
+the sqlite one once with ``duckdb.sql("INSTALL sqlite")``.
+
+Every query reads a ``results`` view with one row per stored test:
+
+- ``session_id``, ``value_name``, ``test_category``, ``value_direction``
+- ``model``: the model name without its ``_T<temperature>`` suffix
+- ``temperature``: from that suffix, else from the result's metadata
+- ``scenario``: ``<category>_<direction>`` (e.g. ``natural_positive``)
+- ``score``: the automated score, NULL when unscored
+"""
+
+import glob
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+GROUP_COLUMNS = ("session_id", "model", "temperature", "value_name", "scenario",
+                 "test_category", "value_direction")
+
+# Shared by both engines; only the model/temperature expressions differ
+_RESULTS_VIEW = """
+CREATE TEMP VIEW results AS
+SELECT
+    session_id,
+    {model} AS model,
+    {temperature} AS temperature,
+    value_name,
+    test_category,
+    value_direction,
+    CASE WHEN test_category IS NOT NULL AND value_direction IS NOT NULL
+         THEN test_category || '_' || value_direction ELSE test_type END AS scenario,
+    automated_score AS score
+FROM raw_results
+"""
+
+_DUCKDB_MODEL = ("CASE WHEN TRY_CAST(regexp_extract(model_name, '_T([0-9.]+)$', 1) AS DOUBLE) IS NULL "
+                 "THEN model_name ELSE regexp_replace(model_name, '_T[0-9.]+$', '') END")
+_DUCKDB_TEMPERATURE = ("COALESCE(TRY_CAST(regexp_extract(model_name, '_T([0-9.]+)$', 1) AS DOUBLE), "
+                       "TRY_CAST(json_extract_string(metadata, '$.temperature') AS DOUBLE))")
+
+# SQLite has no regexp: strip trailing digits and dots and look for the "_T" left behind
+_SQLITE_STEM = "rtrim(model_name, '0123456789.')"
+_SQLITE_HAS_SUFFIX = f"({_SQLITE_STEM} LIKE '%\\_T' ESCAPE '\\' AND length({_SQLITE_STEM}) < length(model_name))"
+_SQLITE_MODEL = f"CASE WHEN {_SQLITE_HAS_SUFFIX} THEN substr({_SQLITE_STEM}, 1, length({_SQLITE_STEM}) - 2) ELSE model_name END"
+_SQLITE_TEMPERATURE = (f"CASE WHEN {_SQLITE_HAS_SUFFIX} THEN CAST(substr(model_name, length({_SQLITE_STEM}) + 1) AS REAL) "
+                       "ELSE CAST(json_extract(metadata, '$.temperature') AS REAL) END")
+
+
+def _rate(condition: str) -> str:
+    """Yes-rate among scored rows matching ``condition``; NULL when there are none."""
+    return (f"SUM(CASE WHEN {condition} AND score > 0 THEN 1.0 ELSE 0.0 END) / "
+            f"NULLIF(SUM(CASE WHEN {condition} AND score IS NOT NULL THEN 1 ELSE 0 END), 0)")
+
+
+class ResultsAnalytics:
+    """Read-only analytics over stored results.
+
+    ``engine`` is 'duckdb', 'sqlite' or None to use DuckDB when it can
+    attach results.db. ``parquet`` lists Parquet exports (paths or globs)
+    to query alongside, or instead of, results.db; they need DuckDB. A test
+    found in several sources counts once.
+    """
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = "data/results.db",
+                 parquet: Sequence[Union[str, Path]] = (), engine: Optional[str] = None):
+        if engine not in (None, "duckdb", "sqlite"):
+            raise ValueError(f"Unknown analytics engine: {engine}")
+        self.db_path = str(db_path) if db_path is not None else None
+        self.parquet = [str(path) for path in parquet]
+        if self.db_path is None and not self.parquet:
+            raise ValueError("Nothing to query: give a database path or Parquet exports")
+        self.engine = None
+        self.conn = None
+
+        if engine != "sqlite":
+            try:
+                self.conn = self._connect_duckdb()
+                self.engine = "duckdb"
+            except Exception as e:
+                if engine == "duckdb" or self.parquet:
+                    raise RuntimeError(f"DuckDB is needed for this query but is unavailable: {e}") from e
+        if self.conn is None:
+            self.conn = self._connect_sqlite()
+            self.engine = "sqlite"
+
+    def _connect_duckdb(self):
+        import duckdb  # Optional; only analytics needs it
+
+        # Never download extensions here: offline, a failed sqlite_scanner install
+        # costs about a second before the sqlite3 fallback. An installed one still autoloads.
+        conn = duckdb.connect(config={"autoinstall_known_extensions": False})
+        try:
+            if self.db_path is not None:
+                conn.execute(f"ATTACH {_quote(self.db_path)} AS results_db (TYPE sqlite, READ_ONLY)")
+            # Exports overlap the database (and each other); a test counts once,
+            # taken from the database if it is there, else from the first export holding it
+            tables = ["results_db.test_results"] if self.db_path is not None else []
+            sources = [f"SELECT * FROM {table}" for table in tables]
+            for path in _expand_globs(self.parquet):
+                table = f"read_parquet({_quote(path)})"
+                source = f"SELECT * FROM {table}"
+                if tables:
+                    earlier = " UNION ALL ".join(f"SELECT test_id FROM {other}" for other in tables)
+                    source += f" WHERE test_id NOT IN ({earlier})"
+                tables.append(table)
+                sources.append(source)
+            conn.execute("CREATE TEMP VIEW raw_results AS " + " UNION ALL BY NAME ".join(sources))
+            conn.execute(_RESULTS_VIEW.format(model=_DUCKDB_MODEL, temperature=_DUCKDB_TEMPERATURE))
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _connect_sqlite(self) -> sqlite3.Connection:
+        if self.db_path is None:
+            raise ValueError("The sqlite engine needs a database path")
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        conn.execute("CREATE TEMP VIEW raw_results AS SELECT * FROM main.test_results")
+        conn.execute(_RESULTS_VIEW.format(model=_SQLITE_MODEL, temperature=_SQLITE_TEMPERATURE))
+        return conn
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self) -> "ResultsAnalytics":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """Run ``sql`` (which may read the ``results`` view) and return rows as dicts."""
+        cursor = self.conn.execute(sql, list(params))
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _grouped(self, by: Sequence[str], select: str, where: str = "") -> List[Dict[str, Any]]:
+        for column in by:
+            if column not in GROUP_COLUMNS:
+                raise ValueError(f"Cannot group by {column!r}; choose from {', '.join(GROUP_COLUMNS)}")
+        keys = ", ".join(by)
+        sql = f"SELECT {keys + ', ' if keys else ''}{select} FROM results {where}"
+        if keys:
+            sql += f" GROUP BY {keys} ORDER BY {keys}"
+        return self.query(sql)
+
+    def totals(self) -> Dict[str, Any]:
+        """Stored tests, scored tests and the sessions they came from."""
+        totals = self.query("SELECT COUNT(*) AS tests, COUNT(score) AS scored, "
+                            "COUNT(DISTINCT session_id) AS sessions FROM results")[0]
+        totals["session_ids"] = [row["session_id"] for row in
+                                 self.query("SELECT DISTINCT session_id FROM results ORDER BY session_id")]
+        return totals
+
+    def score_summary(self, by: Sequence[str] = ("value_name",)) -> List[Dict[str, Any]]:
+        """Per group: tests, scored tests, mean score, and counts of Yes (> 0), high (>= 2) and perfect (3) scores."""
+        return self._grouped(by, """
+            COUNT(*) AS tests,
+            COUNT(score) AS scored,
+            AVG(score) AS mean_score,
+            SUM(CASE WHEN score > 0 THEN 1 ELSE 0 END) AS yes,
+            SUM(CASE WHEN score >= 2 THEN 1 ELSE 0 END) AS high,
+            SUM(CASE WHEN score = 3 THEN 1 ELSE 0 END) AS perfect
+        """)
+
+    def cell_counts(self, by: Sequence[str] = ("temperature", "value_name", "scenario")) -> List[Dict[str, Any]]:
+        """Yes answers and scored tests per cell (models pooled by default)."""
+        return self._grouped(by, "SUM(CASE WHEN score > 0 THEN 1 ELSE 0 END) AS yes, COUNT(score) AS scored",
+                             "WHERE score IS NOT NULL")
+
+    def malleability(self, by: Sequence[str] = ("model", "temperature", "value_name")) -> List[Dict[str, Any]]:
+        """How far an instruction moves a value: instructed-negative minus natural-negative Yes-rate.
+
+        A malleable value jumps from a natural No to an instructed Yes on
+        the opposite question; an immutable one stays at No.
+        """
+        rows = self._grouped(by, f"""
+            {_rate("scenario = 'natural_negative'")} AS natural_negative,
+            {_rate("scenario = 'instructed_negative'")} AS instructed_negative,
+            {_rate("scenario = 'natural_positive'")} AS natural_positive,
+            {_rate("scenario = 'instructed_positive'")} AS instructed_positive
+        """)
+        for row in rows:
+            natural, instructed = row["natural_negative"], row["instructed_negative"]
+            row["malleability"] = None if natural is None or instructed is None else instructed - natural
+        return rows
+
+    def resistance_breakthrough(self, by: Sequence[str] = ("model", "temperature", "value_name")) -> List[Dict[str, Any]]:
+        """How often a value survives a system prompt against it: the resistance-positive Yes-rate.
+
+        ``breakthrough`` is the resistance-positive rate; ``compliance`` the
+        resistance-negative rate (Yes to the opposite, as the prompt asks).
+        """
+        return self._grouped(by, f"""
+            {_rate("scenario = 'resistance_positive'")} AS breakthrough,
+            {_rate("scenario = 'resistance_negative'")} AS compliance,
+            {_rate("scenario = 'natural_positive'")} AS natural_positive
+        """)
+
+    def temperature_effects(self, by: Sequence[str] = ("model", "value_name", "scenario")) -> List[Dict[str, Any]]:
+        """Spread of the Yes-rate across temperatures for each group.
+
+        Gives the number of temperatures observed, the lowest and highest
+        per-temperature rates, their spread, and the rates at the coldest
+        and hottest temperatures.
+        """
+        for column in by:
+            if column not in GROUP_COLUMNS or column == "temperature":
+                raise ValueError(f"Cannot group temperature effects by {column!r}")
+        keys = ", ".join(by)
+        return self.query(f"""
+            WITH rates AS (
+                SELECT {keys}, temperature,
+                       SUM(CASE WHEN score > 0 THEN 1.0 ELSE 0.0 END) / COUNT(score) AS rate
+                FROM results
+                WHERE score IS NOT NULL AND temperature IS NOT NULL
+                GROUP BY {keys}, temperature
+            ),
+            ranked AS (
+                SELECT *,
+                       ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY temperature) AS coldest,
+                       ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY temperature DESC) AS hottest
+                FROM rates
+            )
+            SELECT {keys},
+                   COUNT(*) AS temperatures,
+                   MIN(rate) AS min_rate,
+                   MAX(rate) AS max_rate,
+                   MAX(rate) - MIN(rate) AS spread,
+                   MAX(CASE WHEN coldest = 1 THEN rate END) AS coldest_rate,
+                   MAX(CASE WHEN hottest = 1 THEN rate END) AS hottest_rate
+            FROM ranked
+            GROUP BY {keys}
+            ORDER BY {keys}
+        """)
+
+    def export_parquet(self, path: Union[str, Path], session_id: Optional[str] = None) -> int:
+        """Write stored results, with all of their columns, to a Parquet file; returns the row count."""
+        if self.engine != "duckdb":
+            raise RuntimeError("Parquet export needs DuckDB")
+        where = f" WHERE session_id = {_quote(session_id)}" if session_id is not None else ""
+        self.conn.execute(f"COPY (SELECT * FROM raw_results{where}) TO {_quote(str(path))} (FORMAT parquet)")
+        return self.query(f"SELECT COUNT(*) AS n FROM raw_results{where}")[0]["n"]
+
+
+def _expand_globs(paths: Sequence[str]) -> List[str]:
+    """Each Parquet file separately, so overlap between files can be resolved; unmatched paths pass through."""
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(path)) or [path])
+    return files
+
+
+def _quote(text: str) -> str:
+    """SQL string literal."""
+    return "'" + text.replace("'", "''") + "'"
@@ -0,0 +1,66 @@
+"""Confidence intervals for many Yes-rates at once."""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from ..utils.statistics import z_score
+
+# Bootstrap draws held in memory at once (cells x resamples)
+BOOTSTRAP_CHUNK = 4_000_000
+
+
+def wilson_intervals(successes, totals, confidence: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilson score intervals for arrays of binomial counts.
+
+    Vectorized form of ``utils.statistics.wilson_interval``; cells with no
+    observations get (0, 1).
+    """
+    successes = np.asarray(successes, dtype=float)
+    totals = np.asarray(totals, dtype=float)
+    z = z_score(confidence)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = successes / totals
+        denominator = 1 + z * z / totals
+        centre = (p + z * z / (2 * totals)) / denominator
+        margin = z * np.sqrt(p * (1 - p) / totals + z * z / (4 * totals * totals)) / denominator
+    empty = totals <= 0
+    low = np.where(empty, 0.0, np.clip(centre - margin, 0.0, 1.0))
+    high = np.where(empty, 1.0, np.clip(centre + margin, 0.0, 1.0))
+    return low, high
+
+
+def bootstrap_intervals(successes, totals, confidence: float = 0.95, resamples: int = 2000,
+                        seed: Optional[int] = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Percentile bootstrap intervals for arrays of binomial counts.
+
+    Resampling n binary scores with replacement gives a Binomial(n, p-hat)
+    count, so each cell's resamples are drawn directly from that binomial.
+    Cells with the same counts share an interval, so only distinct
+    (successes, total) pairs are resampled, in chunks that bound memory.
+    Cells with no observations get (0, 1).
+    """
+    successes = np.asarray(successes, dtype=np.int64)
+    totals = np.asarray(totals, dtype=np.int64)
+    successes, totals = np.broadcast_arrays(successes, totals)
+    low = np.zeros(totals.shape)
+    high = np.ones(totals.shape)
+    observed = totals > 0
+    if not observed.any():
+        return low, high
+
+    pairs, inverse = np.unique(np.stack([successes[observed], totals[observed]], axis=1),
+                               axis=0, return_inverse=True)
+    pair_low = np.empty(len(pairs))
+    pair_high = np.empty(len(pairs))
+    rng = np.random.default_rng(seed)
+    tail = (1 - confidence) / 2 * 100
+    chunk = max(1, BOOTSTRAP_CHUNK // max(1, resamples))
+    for start in range(0, len(pairs), chunk):
+        k, n = pairs[start:start + chunk].T
+        draws = rng.binomial(n[:, None], (k / n)[:, None], size=(len(n), resamples)) / n[:, None]
+        pair_low[start:start + chunk], pair_high[start:start + chunk] = np.percentile(
+            draws, [tail, 100 - tail], axis=1)
+    low[observed] = pair_low[inverse.ravel()]
+    high[observed] = pair_high[inverse.ravel()]
+    return low, high
@@ -0,0 +1,310 @@
+"""Binary scores as a memory-mapped [model, temperature, run, value, scenario] cube.
+
+The cube lives next to the results database as three files:
+
+- ``<base>.<generation>.npy``: int8 scores (1 = Yes, 0 = No, -1 = missing),
+  stored run-major so new runs are appended to the end of the file
+- ``<base>_counts.<generation>.npy``: how many runs each (model,
+  temperature, value, scenario) cell has filled
+- ``<base>.json``: axis labels, the last results.db rowid folded in and the
+  names of the two files above
+
+Replacing the JSON sidecar is the single commit point of an export: an
+export writes a new counts file (and a new cube when the axes change),
+and scores in runs beyond a cell's committed count are ignored, so an
+interrupted export leaves the previous generation intact.
+
+``export_score_cube`` folds rows added since the last export into the cube;
+``ScoreCube.open`` maps it read-only, so reports and notebooks get rates,
+variances and correlations from vectorized reductions without touching
+SQLite.
+"""
+
+import glob
+import io
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.model_names import split_model_name
+
+AXES = ("model", "temperature", "run", "value", "scenario")
+LABELED_AXES = ("model", "temperature", "value", "scenario")
+MISSING = -1
+CUBE_FORMAT_VERSION = 2
+
+
+def _generation_paths(base: str, generation: int) -> Tuple[str, str]:
+    return f"{base}.{generation}.npy", f"{base}_counts.{generation}.npy"
+
+
+def _sidecar_path(base: str) -> str:
+    return f"{base}.json"
+
+
+def _resolve(base: str, name: str) -> str:
+    return os.path.join(os.path.dirname(base), name)
+
+
+class ScoreCube:
+    """Read-only view of an exported score cube.
+
+    ``scores`` has shape (models, temperatures, runs, values, scenarios) and
+    is a zero-copy view of the memory-mapped file; only the first
+    ``counts`` runs of each cell are committed, and the reductions below
+    ignore anything past them. ``labels`` maps each labeled axis to its
+    labels; ``runs`` is the run-axis length.
+    """
+
+    def __init__(self, base: str, storage: np.ndarray, counts: np.ndarray, sidecar: Dict):
+        self.base = base
+        self.cube_path = _resolve(base, sidecar["cube"])
+        self.storage = storage
+        self.scores = np.moveaxis(storage, 0, 2)
+        self.counts = counts
+        self.labels: Dict[str, List] = sidecar["labels"]
+        self.last_rowid: int = sidecar["last_rowid"]
+
+    @classmethod
+    def open(cls, base: str) -> "ScoreCube":
+        with open(_sidecar_path(base), "r") as f:
+            sidecar = json.load(f)
+        if sidecar.get("version") != CUBE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported score cube version: {sidecar.get('version')}")
+        return cls(base, np.load(_resolve(base, sidecar["cube"]), mmap_mode="r"),
+                   np.load(_resolve(base, sidecar["counts"])), sidecar)
+
+    @property
+    def runs(self) -> int:
+        return self.storage.shape[0]
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.scores.shape
+
+    def index(self, axis: str, label) -> int:
+        """Position of ``label`` on a labeled axis."""
+        labels = self.labels[axis]
+        if axis == "temperature":
+            label = float(label)
+        return labels.index(label)
+
+    def committed(self) -> np.ndarray:
+        """Boolean mask of the runs each cell has committed, shaped like ``scores``."""
+        return np.arange(self.runs)[None, None, :, None, None] < self.counts[:, :, None, :, :]
+
+    def valid(self) -> np.ndarray:
+        """Boolean mask of the observed scores."""
+        return (self.scores != MISSING) & self.committed()
+
+    def yes_counts(self) -> np.ndarray:
+        """Yes answers per cell, shape (models, temperatures, values, scenarios)."""
+        return ((self.scores == 1) & self.committed()).sum(axis=2)
+
+    def rates(self) -> np.ndarray:
+        """Yes-rate per cell; NaN where a cell has no scores."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.yes_counts() / self.counts
+
+    def variances(self) -> np.ndarray:
+        """Sample variance of the binary score per cell; NaN below two scores."""
+        rate = self.rates()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.counts > 1, rate * (1 - rate) * self.counts / (self.counts - 1), np.nan)
+
+    def correlation(self, axis: str = "value") -> np.ndarray:
+        """Correlation between the cell Yes-rates of every pair of labels on an axis.
+
+        Rates are flattened over the other axes, and only cells observed for
+        both labels count.
+        """
+        position = LABELED_AXES.index(axis)
+        rates = np.moveaxis(self.rates(), position, 0).reshape(len(self.labels[axis]), -1)
+        size = rates.shape[0]
+        result = np.full((size, size), np.nan)
+        for i in range(size):
+            for j in range(size):
+                both = ~np.isnan(rates[i]) & ~np.isnan(rates[j])
+                if both.sum() > 1 and rates[i, both].std() > 0 and rates[j, both].std() > 0:
+                    result[i, j] = np.corrcoef(rates[i, both], rates[j, both])[0, 1]
+        return result
+
+
+def _read_rows(db_path: str, last_rowid: int):
+    """Scored results added after ``last_rowid`` as (rowid, model, temperature, value, scenario, score)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute("""
+            SELECT rowid, model_name, test_category, value_direction, test_type, value_name,
+                   automated_score, metadata
+            FROM test_results
+            WHERE rowid > ?
+            ORDER BY rowid
+        """, (last_rowid,))
+        for rowid, model_name, category, direction, test_type, value_name, score, metadata in cursor:
+            model, temperature = split_model_name(model_name, metadata)
+            scenario = f"{category}_{direction}" if category and direction else test_type
+            yield rowid, model, temperature, value_name, scenario, score
+    finally:
+        conn.close()
+
+
+def _sort_labels(axis: str, labels: Sequence) -> List:
+    if axis == "temperature":
+        return sorted(labels, key=lambda t: (t is None, t or 0.0))
+    return sorted(labels, key=str)
+
+
+def _open_storage(path: str, shape: Tuple[int, ...]) -> np.memmap:
+    storage = np.lib.format.open_memmap(path, mode="w+", dtype=np.int8, shape=shape)
+    storage[:] = MISSING
+    return storage
+
+
+def _grow_runs(path: str, runs: int) -> bool:
+    """Append missing runs to a cube file in place; False if its header cannot be rewritten in place."""
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        data_offset = f.tell()
+        new_shape = (runs,) + tuple(shape[1:])
+        header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": fortran_order, "shape": new_shape}
+        f.seek(0)
+        buffer = _header_bytes(header, version)
+        if len(buffer) != data_offset:
+            return False
+        block = int(np.prod(shape[1:]))
+        f.write(buffer)
+        f.seek(0, os.SEEK_END)
+        f.write(np.full((runs - shape[0]) * block, MISSING, dtype=np.int8).tobytes())
+    return True
+
+
+def _header_bytes(header: Dict, version: Tuple[int, int]) -> bytes:
+    buffer = io.BytesIO()
+    if version == (1, 0):
+        np.lib.format.write_array_header_1_0(buffer, header)
+    else:
+        np.lib.format.write_array_header_2_0(buffer, header)
+    return buffer.getvalue()
+
+
+def export_score_cube(db_path: str = "data/results.db", base: str = "data/score_cube") -> ScoreCube:
+    """Fold results added since the last export into the cube at ``base`` and open it.
+
+    New runs are appended to the end of the file. A model, temperature,
+    value or scenario not seen before rebuilds the cube with sorted axes.
+    Nothing is committed until the sidecar is replaced, and the previous
+    generation's files are removed after that.
+    """
+    sidecar_path = _sidecar_path(base)
+    sidecar = None
+    if os.path.exists(sidecar_path):
+        with open(sidecar_path, "r") as f:
+            sidecar = json.load(f)
+        if sidecar.get("version") != CUBE_FORMAT_VERSION:
+            sidecar = None  # Older layout: export again from scratch
+    if sidecar is not None:
+        labels = {axis: list(sidecar["labels"][axis]) for axis in LABELED_AXES}
+        cube_path = _resolve(base, sidecar["cube"])
+        counts = np.load(_resolve(base, sidecar["counts"]))
+        runs = np.load(cube_path, mmap_mode="r").shape[0]
+    else:
+        sidecar = {"version": CUBE_FORMAT_VERSION, "last_rowid": 0, "generation": 0}
+        labels = {axis: [] for axis in LABELED_AXES}
+        cube_path = None
+        counts = np.zeros((0, 0, 0, 0), dtype=np.int32)
+        runs = 0
+    generation = sidecar["generation"] + 1
+    new_cube_path, new_counts_path = _generation_paths(base, generation)
+
+    rows = list(_read_rows(db_path, sidecar["last_rowid"]))
+    if rows:
+        sidecar["last_rowid"] = rows[-1][0]
+    scored = [row for row in rows if row[5] is not None]
+
+    # New labels on any axis other than run mean a rebuild with re-sorted axes
+    seen = {axis: set(labels[axis]) for axis in LABELED_AXES}
+    new_labels = {axis: set() for axis in LABELED_AXES}
+    for _, *cell, _ in scored:
+        for axis, label in zip(LABELED_AXES, cell):
+            if label not in seen[axis]:
+                new_labels[axis].add(label)
+    rebuild = runs == 0 or any(new_labels.values())
+    if rebuild:
+        old_labels = labels
+        labels = {axis: _sort_labels(axis, old_labels[axis] + list(new_labels[axis])) for axis in LABELED_AXES}
+        remap = [[labels[axis].index(label) for label in old_labels[axis]] for axis in LABELED_AXES]
+        new_counts = np.zeros(tuple(len(labels[axis]) for axis in LABELED_AXES), dtype=np.int32)
+        new_counts[np.ix_(*remap)] = counts
+        counts = new_counts
+
+    # Each new score fills the next free run of its cell
+    index = {axis: {label: i for i, label in enumerate(labels[axis])} for axis in LABELED_AXES}
+    updates = []
+    for _, *cell, score in scored:
+        position = tuple(index[axis][label] for axis, label in zip(LABELED_AXES, cell))
+        updates.append((int(counts[position]),) + position + (1 if score > 0 else 0,))
+        counts[position] += 1
+    needed_runs = max([runs] + [update[0] + 1 for update in updates])
+
+    # Changed axes get a new cube file; otherwise new scores land in runs past
+    # the committed counts of the current one, which readers ignore
+    if rebuild:
+        storage = _open_storage(new_cube_path, (needed_runs,) + counts.shape)
+        if runs:
+            old = np.load(cube_path, mmap_mode="r")
+            for run in range(runs):
+                # Copy run by run so huge cubes never sit in memory at once
+                storage[run][np.ix_(*remap)] = old[run]
+            del old
+        storage.flush()
+        del storage
+        cube_path = new_cube_path
+    elif needed_runs > runs and not _grow_runs(cube_path, needed_runs):
+        old = np.load(cube_path, mmap_mode="r")
+        storage = _open_storage(new_cube_path, (needed_runs,) + old.shape[1:])
+        storage[:runs] = old
+        storage.flush()
+        del storage, old
+        cube_path = new_cube_path
+
+    if updates:
+        storage = np.load(cube_path, mmap_mode="r+")
+        update_array = np.array(updates, dtype=np.int64)
+        storage[tuple(update_array[:, :5].T)] = update_array[:, 5]
+        storage.flush()
+        del storage
+
+    np.save(new_counts_path, counts)
+    sidecar["generation"] = generation
+    sidecar["cube"] = os.path.basename(cube_path)
+    sidecar["counts"] = os.path.basename(new_counts_path)
+    sidecar["labels"] = labels
+    sidecar["axes"] = list(AXES)
+    sidecar["missing"] = MISSING
+    temp_sidecar_path = f"{sidecar_path}.tmp"
+    with open(temp_sidecar_path, "w") as f:
+        json.dump(sidecar, f, indent=2)
+    os.replace(temp_sidecar_path, sidecar_path)
+
+    # Committed: drop older generations and anything an interrupted export left behind
+    keep = {os.path.abspath(cube_path), os.path.abspath(new_counts_path)}
+    pattern = glob.escape(base)
+    for path in glob.glob(f"{pattern}.[0-9]*.npy") + glob.glob(f"{pattern}_counts.[0-9]*.npy"):
+        if os.path.abspath(path) not in keep:
+            os.remove(path)
+    return ScoreCube.open(base)
+
+
+def open_score_cube(base: str = "data/score_cube", db_path: Optional[str] = None) -> ScoreCube:
+    """Open the cube at ``base``, first folding in new results from ``db_path`` if given."""
+    if db_path is not None:
+        return export_score_cube(db_path, base)
+    return ScoreCube.open(base)
@@ -0,0 +1,190 @@
+"""Significance tests between scenarios and across temperatures, for every cell at once.
+
+Counts come in as arrays whose last axis is the scenario (e.g. the score
+cube's per-cell Yes counts and totals). Every test is vectorized over the
+remaining axes, so a 100-value x 20-temperature grid is tested in one pass.
+"""
+
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+from scipy import special, stats
+
+CATEGORIES = ("natural", "instructed", "resistance")
+DIRECTIONS = ("positive", "negative")
+
+# (name, first category, second category) for pairwise Fisher tests
+COMPARISONS = (
+    ("natural_vs_instructed", "natural", "instructed"),
+    ("natural_vs_resistance", "natural", "resistance"),
+    ("instructed_vs_resistance", "instructed", "resistance"),
+)
+
+# Hypergeometric probabilities held in memory at once (tables x support)
+FISHER_CHUNK = 4_000_000
+
+
+def _log_choose(n, k):
+    return special.gammaln(n + 1) - special.gammaln(k + 1) - special.gammaln(n - k + 1)
+
+
+def _hypergeom_pmf(k, total, successes, draws):
+    """Hypergeometric pmf from log-gamma terms, zero outside the support.
+
+    Much faster than ``stats.hypergeom.pmf`` on large grids.
+    """
+    inside = (k >= np.maximum(0, draws + successes - total)) & (k <= np.minimum(successes, draws))
+    k = np.where(inside, k, 0)
+    with np.errstate(invalid="ignore"):
+        log_pmf = (_log_choose(successes, k) + _log_choose(total - successes, draws - k)
+                   - _log_choose(total, draws))
+    return np.where(inside, np.exp(log_pmf), 0.0)
+
+
+def fisher_exact(yes_a, n_a, yes_b, n_b) -> np.ndarray:
+    """Two-sided Fisher exact p-values for arrays of 2x2 tables (Yes/No x group A/B).
+
+    Same convention as ``scipy.stats.fisher_exact``: sum the probabilities
+    of every table, with the observed margins, that is no more likely than
+    the observed one. NaN where either group has no observations.
+    """
+    yes_a, n_a, yes_b, n_b = (np.asarray(x, dtype=np.int64) for x in (yes_a, n_a, yes_b, n_b))
+    shape = np.broadcast(yes_a, n_a, yes_b, n_b).shape
+    yes_a, n_a, yes_b, n_b = (np.broadcast_to(x, shape).ravel() for x in (yes_a, n_a, yes_b, n_b))
+    p_values = np.full(yes_a.shape, np.nan)
+
+    tested = np.flatnonzero((n_a > 0) & (n_b > 0))
+    if len(tested):
+        support = np.arange(n_a[tested].max() + 1)
+        chunk = max(1, FISHER_CHUNK // len(support))
+        for start in range(0, len(tested), chunk):
+            tables = tested[start:start + chunk]
+            total, yes_total, group = n_a[tables] + n_b[tables], yes_a[tables] + yes_b[tables], n_a[tables]
+            pmf = _hypergeom_pmf(support[None, :], total[:, None], yes_total[:, None], group[:, None])
+            observed = _hypergeom_pmf(yes_a[tables], total, yes_total, group)
+            as_extreme = pmf <= observed[:, None] * (1 + 1e-7)
+            p_values[tables] = np.minimum(1.0, (pmf * as_extreme).sum(axis=1))
+    return p_values.reshape(shape)
+
+
+def chi_square(yes, n) -> Tuple[np.ndarray, np.ndarray]:
+    """Chi-square test of equal Yes-rates across groups on the last axis.
+
+    Groups with no observations are left out of the test. Returns
+    (statistic, p-value); NaN where fewer than two groups have data, and
+    p = 1 when every group answered the same way.
+    """
+    yes = np.asarray(yes, dtype=float)
+    n = np.asarray(n, dtype=float)
+    observed_groups = (n > 0).sum(axis=-1)
+    total = n.sum(axis=-1, keepdims=True)
+    yes_total = yes.sum(axis=-1, keepdims=True)
+    no_total = total - yes_total
+    with np.errstate(invalid="ignore", divide="ignore"):
+        expected_yes = n * yes_total / total
+        expected_no = n * no_total / total
+        terms = (np.where(expected_yes > 0, (yes - expected_yes) ** 2 / expected_yes, 0.0)
+                 + np.where(expected_no > 0, ((n - yes) - expected_no) ** 2 / expected_no, 0.0))
+    statistic = terms.sum(axis=-1)
+    degrees = np.maximum(observed_groups - 1, 1)
+    p_values = stats.chi2.sf(statistic, degrees)
+    uniform = (yes_total[..., 0] == 0) | (no_total[..., 0] == 0)
+    p_values = np.where(uniform, 1.0, p_values)
+    statistic = np.where(uniform, 0.0, statistic)
+    too_few = observed_groups < 2
+    return np.where(too_few, np.nan, statistic), np.where(too_few, np.nan, p_values)
+
+
+def logistic_trend(yes, n, x, iterations: int = 50) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Fit logit(Yes-rate) = a + b * x along the last axis of every series at once.
+
+    Newton-Raphson (IRLS) runs on all series together. Returns (slope,
+    standard error, Wald p-value for slope = 0); NaN for series with fewer
+    than two observed x values or no variation in the answers. Perfectly
+    separated series drift to large, insignificant slopes.
+    """
+    yes = np.asarray(yes, dtype=float)
+    n = np.asarray(n, dtype=float)
+    x = np.broadcast_to(np.asarray(x, dtype=float), yes.shape)
+    intercept = np.zeros(yes.shape[:-1])
+    slope = np.zeros(yes.shape[:-1])
+    for _ in range(iterations):
+        eta = np.clip(intercept[..., None] + slope[..., None] * x, -30, 30)
+        p = 1 / (1 + np.exp(-eta))
+        weight = n * p * (1 - p)
+        residual = yes - n * p
+        g0, g1 = residual.sum(axis=-1), (residual * x).sum(axis=-1)
+        h00, h01, h11 = weight.sum(axis=-1), (weight * x).sum(axis=-1), (weight * x * x).sum(axis=-1)
+        determinant = h00 * h11 - h01 * h01
+        with np.errstate(invalid="ignore", divide="ignore"):
+            step0 = np.where(determinant > 1e-12, (h11 * g0 - h01 * g1) / determinant, 0.0)
+            step1 = np.where(determinant > 1e-12, (h00 * g1 - h01 * g0) / determinant, 0.0)
+        intercept = intercept + step0
+        slope = slope + step1
+        if np.all(np.abs(step1) < 1e-8) and np.all(np.abs(step0) < 1e-8):
+            break
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        standard_error = np.sqrt(h00 / determinant)
+        p_values = 2 * stats.norm.sf(np.abs(slope / standard_error))
+    observed = n > 0
+    x_values = np.where(observed, x, np.nan)
+    varied_x = np.nanmax(x_values, axis=-1, initial=-np.inf) > np.nanmin(x_values, axis=-1, initial=np.inf)
+    varied_answers = (yes.sum(axis=-1) > 0) & (yes.sum(axis=-1) < n.sum(axis=-1))
+    undefined = ~(varied_x & varied_answers) | ~np.isfinite(standard_error)
+    return (np.where(undefined, np.nan, slope), np.where(undefined, np.nan, standard_error),
+            np.where(undefined, np.nan, p_values))
+
+
+def _scenario_index(scenarios: Sequence[str]) -> Dict[Tuple[str, str], int]:
+    return {tuple(name.split("_", 1)): i for i, name in enumerate(scenarios) if "_" in name}
+
+
+def compare_scenarios(yes, n, scenarios: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Natural vs instructed vs resistance, per direction, for every cell.
+
+    ``yes`` and ``n`` have scenario names (e.g. ``natural_positive``) on
+    their last axis. Each result has that axis replaced by the two
+    directions (positive, negative): a Fisher p-value per pairwise
+    comparison, plus the chi-square statistic and p-value across all
+    three categories. Missing scenarios give NaN.
+    """
+    yes = np.asarray(yes)
+    n = np.asarray(n)
+    index = _scenario_index(scenarios)
+    empty = np.zeros(yes.shape[:-1], dtype=np.int64)
+
+    def counts(category: str, direction: str) -> Tuple[np.ndarray, np.ndarray]:
+        position = index.get((category, direction))
+        if position is None:
+            return empty, empty
+        return yes[..., position], n[..., position]
+
+    results: Dict[str, np.ndarray] = {}
+    for name, first, second in COMPARISONS:
+        results[name] = np.stack([
+            fisher_exact(*counts(first, direction), *counts(second, direction)) for direction in DIRECTIONS
+        ], axis=-1)
+
+    statistics, p_values = [], []
+    for direction in DIRECTIONS:
+        grouped = [counts(category, direction) for category in CATEGORIES]
+        statistic, p_value = chi_square(np.stack([g[0] for g in grouped], axis=-1),
+                                        np.stack([g[1] for g in grouped], axis=-1))
+        statistics.append(statistic)
+        p_values.append(p_value)
+    results["chi_square"] = np.stack(statistics, axis=-1)
+    results["chi_square_p"] = np.stack(p_values, axis=-1)
+    return results
+
+
+def temperature_trends(yes, n, temperatures: Sequence[float], axis: int) -> Dict[str, np.ndarray]:
+    """Logistic regression of the Yes-rate on temperature for every other cell.
+
+    ``axis`` is the temperature axis of ``yes`` and ``n``; it is removed
+    from the results.
+    """
+    yes = np.moveaxis(np.asarray(yes), axis, -1)
+    n = np.moveaxis(np.asarray(n), axis, -1)
+    slope, standard_error, p_value = logistic_trend(yes, n, np.asarray(temperatures, dtype=float))
+    return {"slope": slope, "standard_error": standard_error, "p_value": p_value}
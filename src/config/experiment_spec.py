@@ -0,0 +1,239 @@
+"""Declarative experiment specs: the whole sweep described in one YAML file.
+
+Example (see config/experiment.yaml)::
+
+    name: temperature-sweep
+    models: [chatgpt-4o-mini]
+    values: all                    # or names from values.yaml
+    temperatures: {start: 0.0, stop: 1.0, step: 0.1}
+    runs: 5
+    scenarios: [natural_positive, natural_negative, resistance_positive, resistance_negative]
+    overrides:
+      - value: harm_refusal
+        scenario: resistance_positive
+        runs: 20
+
+The grid is never expanded up front: cells are enumerated block by block
+(one model and temperature at a time), so a spec describing millions of
+calls can be counted, forecast and split into shards in constant memory.
+"""
+
+import math
+
+import yaml
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..core.values import ValueDefinition, ValueRegistry
+from ..testing.comprehensive_prompts import generate_comprehensive_test_matrix
+from ..testing.experiment_plan import ExperimentPlan, WorkItem
+
+SCENARIO_NAMES = [
+    "natural_positive", "natural_negative",
+    "instructed_positive", "instructed_negative",
+    "resistance_positive", "resistance_negative"
+]
+
+# Cell fields an override may match on
+OVERRIDE_FIELDS = ("model", "temperature", "value", "scenario")
+
+
+@dataclass
+class CellOverride:
+    """Runs for every cell matching the given fields (unset fields match anything)."""
+    runs: int
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    value: Optional[str] = None
+    scenario: Optional[str] = None
+
+    def matches(self, model: str, temperature: float, value: str, scenario: str) -> bool:
+        return ((self.model is None or self.model == model)
+                and (self.temperature is None or abs(self.temperature - temperature) < 1e-9)
+                and (self.value is None or self.value == value)
+                and (self.scenario is None or self.scenario == scenario))
+
+
+@dataclass
+class ExperimentSpec:
+    """Models x temperatures x runs x values x scenarios, with per-cell run overrides."""
+    models: List[str]
+    values: List[ValueDefinition]
+    temperatures: List[float]
+    runs: int = 1
+    scenarios: List[str] = field(default_factory=lambda: list(SCENARIO_NAMES))
+    overrides: List[CellOverride] = field(default_factory=list)
+    name: str = "experiment"
+
+    def __post_init__(self):
+        """Validate the spec."""
+        for label, items in (("models", self.models), ("values", self.values),
+                             ("temperatures", self.temperatures), ("scenarios", self.scenarios)):
+            if not items:
+                raise ValueError(f"Experiment spec lists no {label}")
+        unknown = [name for name in self.scenarios if name not in SCENARIO_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown scenarios {unknown}; choose from {SCENARIO_NAMES}")
+        if self.runs < 0 or any(override.runs < 0 for override in self.overrides):
+            raise ValueError("Runs cannot be negative")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], value_registry: ValueRegistry) -> "ExperimentSpec":
+        """Build a spec from parsed YAML, resolving value names against ``value_registry``."""
+        configured = {value.name: value for value in value_registry.get_all_values()}
+        value_names = data.get("values", "all")
+        if value_names == "all":
+            values = list(configured.values())
+        else:
+            unknown = [name for name in value_names if name not in configured]
+            if unknown:
+                raise ValueError(f"Unknown values {unknown}; configured values are {list(configured)}")
+            values = [configured[name] for name in value_names]
+
+        overrides = []
+        for entry in data.get("overrides") or []:
+            extra = set(entry) - set(OVERRIDE_FIELDS) - {"runs"}
+            if "runs" not in entry or extra:
+                raise ValueError(f"Override {entry} needs 'runs' and only {list(OVERRIDE_FIELDS)} to match on")
+            overrides.append(CellOverride(
+                runs=int(entry["runs"]),
+                model=entry.get("model"),
+                temperature=None if entry.get("temperature") is None else float(entry["temperature"]),
+                value=entry.get("value"),
+                scenario=entry.get("scenario")
+            ))
+
+        return cls(
+            models=list(data.get("models") or []),
+            values=values,
+            temperatures=parse_temperatures(data.get("temperatures", [0.7])),
+            runs=int(data.get("runs", 1)),
+            scenarios=list(data.get("scenarios") or SCENARIO_NAMES),
+            overrides=overrides,
+            name=data.get("name", "experiment")
+        )
+
+    @classmethod
+    def load(cls, path: str, value_registry: ValueRegistry) -> "ExperimentSpec":
+        with open(path, "r") as f:
+            data = yaml.safe_load(f) or {}
+        return cls.from_dict(data, value_registry)
+
+    @property
+    def cell_count(self) -> int:
+        """Number of (model, temperature, value, scenario) cells, computed without enumerating them."""
+        return len(self.models) * len(self.temperatures) * len(self.values) * len(self.scenarios)
+
+    def runs_for(self, model: str, temperature: float, value: str, scenario: str) -> int:
+        """Runs for one cell: the last matching override, else ``runs``."""
+        runs = self.runs
+        for override in self.overrides:
+            if override.matches(model, temperature, value, scenario):
+                runs = override.runs
+        return runs
+
+    def _blocks(self, shard_index: int, shard_count: int) -> Iterator[Tuple[str, float, List[Tuple[int, int, int]]]]:
+        """Yield (model, temperature, [(value index, scenario index, runs)]) for the cells in a shard.
+
+        Cells are numbered in (model, temperature, value, scenario) order and
+        dealt round-robin to shards, so every run of a cell stays in one shard.
+        """
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f"Shard {shard_index} is out of range for {shard_count} shards")
+        per_block = len(self.values) * len(self.scenarios)
+        block_number = 0
+        for model in self.models:
+            for temperature in self.temperatures:
+                first_cell = block_number * per_block
+                block_number += 1
+                cells = []
+                for value_index, value in enumerate(self.values):
+                    for scenario_index, scenario in enumerate(self.scenarios):
+                        cell_number = first_cell + value_index * len(self.scenarios) + scenario_index
+                        if cell_number % shard_count != shard_index:
+                            continue
+                        runs = self.runs_for(model, temperature, value.name, scenario)
+                        if runs:
+                            cells.append((value_index, scenario_index, runs))
+                if cells:
+                    yield model, temperature, cells
+
+    def count_work_items(self, shard_index: int = 0, shard_count: int = 1) -> int:
+        """Total calls in a shard, without building any work items."""
+        return sum(runs for _, _, cells in self._blocks(shard_index, shard_count) for _, _, runs in cells)
+
+    def _expand(self, shard_index: int, shard_count: int) -> Iterator[Tuple[str, float, int, int, int]]:
+        """Yield (model, temperature, run, value index, scenario index) in plan order."""
+        for model, temperature, cells in self._blocks(shard_index, shard_count):
+            for run_index in range(max(runs for _, _, runs in cells)):
+                for value_index, scenario_index, runs in cells:
+                    if run_index < runs:
+                        yield model, temperature, run_index, value_index, scenario_index
+
+    def _scenario_matrix(self) -> List[List[Dict[str, Any]]]:
+        """Prompts for each (value, scenario), generated once per value."""
+        matrix = []
+        for value in self.values:
+            by_name = {scenario["test_name"]: scenario for scenario in generate_comprehensive_test_matrix(value)}
+            matrix.append([by_name[name] for name in self.scenarios])
+        return matrix
+
+    def iter_work_items(self, shard_index: int = 0, shard_count: int = 1) -> Iterator[WorkItem]:
+        """Stream work items in plan order (model, temperature, run, value, scenario)."""
+        matrix = self._scenario_matrix()
+        for model, temperature, run_index, value_index, scenario_index in self._expand(shard_index, shard_count):
+            scenario = matrix[value_index][scenario_index]
+            yield WorkItem(
+                model_name=model,
+                temperature=temperature,
+                run_index=run_index,
+                value_name=self.values[value_index].name,
+                category=scenario["category"],
+                direction=scenario["direction"],
+                test_name=scenario["test_name"],
+                system_prompt=scenario["system_prompt"],
+                user_prompt=scenario["user_prompt"]
+            )
+
+    def compile_plan(self, shard_index: int = 0, shard_count: int = 1) -> ExperimentPlan:
+        """Compile one shard into an array-backed plan, interning prompts instead of building work items."""
+        plan = ExperimentPlan()
+        scenario_ids = [
+            [
+                plan.scenario_id(value.name, scenario["category"], scenario["direction"], scenario["test_name"],
+                                 scenario["system_prompt"], scenario["user_prompt"])
+                for scenario in row
+            ]
+            for value, row in zip(self.values, self._scenario_matrix())
+        ]
+        for model, temperature, run_index, value_index, scenario_index in self._expand(shard_index, shard_count):
+            plan.append_ids(model, temperature, run_index, scenario_ids[value_index][scenario_index])
+        return plan
+
+
+def parse_temperatures(spec: Any) -> List[float]:
+    """Temperatures from a list, a single number or a {start, stop, step} range (stop inclusive)."""
+    if isinstance(spec, (int, float)):
+        return [float(spec)]
+    if isinstance(spec, dict):
+        try:
+            start, stop, step = float(spec["start"]), float(spec["stop"]), float(spec["step"])
+        except KeyError as e:
+            raise ValueError(f"Temperature range needs start, stop and step (missing {e})")
+        if step <= 0:
+            raise ValueError("Temperature step must be positive")
+        # Floor (with slack for float error) so the last value never passes stop
+        count = math.floor((stop - start) / step + 1e-9) + 1
+        return [min(round(start + i * step, 6), stop) for i in range(max(0, count))]
+    return [float(t) for t in spec]
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """Parse "I/N" (1-based shard I of N) into a 0-based (index, count)."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {text!r} (use e.g. 2/4 for the second of four shards)")
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {text!r}: index must be between 1 and {count}")
+    return index - 1, count
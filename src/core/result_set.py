@@ -0,0 +1,256 @@
+"""Compact column-wise storage of test results for bulk analysis."""
+
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .results import (
+    ConfidenceLevel, EvaluationResult, TestCategory, TestPhase, TestResult, TestType, ValueDirection
+)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Stored in int8 score columns for "no score"
+MISSING_SCORE = -128
+
+# Categorical columns: name -> converter from the stored (database) form
+CATEGORICAL_COLUMNS: Dict[str, Optional[Callable[[Any], Any]]] = {
+    "session_id": None,
+    "model_name": None,
+    "test_phase": TestPhase,
+    "value_name": None,
+    "test_type": TestType,
+    "test_category": TestCategory,
+    "value_direction": ValueDirection,
+    "system_prompt": None,
+    "prompt_used": None,
+    "response_text": None,
+    "automated_confidence": ConfidenceLevel,
+    "automated_reasoning": None,
+    "human_notes": None,
+}
+
+# Smallest array typecodes first; codes widen as a column gains categories
+_CODE_TYPES = (("B", 1 << 8), ("H", 1 << 16), ("I", 1 << 32))
+
+
+class CategoricalColumn:
+    """Integer codes into a table of distinct values, widening from uint8 as needed."""
+
+    def __init__(self, convert: Optional[Callable[[Any], Any]] = None):
+        self.convert = convert
+        self.categories: List[Any] = []
+        self.raw: List[Any] = []
+        self.codes = array("B")
+        self._lookup: Dict[Any, int] = {}
+        self._width = 0
+
+    def append(self, raw: Any):
+        code = self._lookup.get(raw)
+        if code is None:
+            code = self._lookup[raw] = len(self.categories)
+            self.raw.append(raw)
+            self.categories.append(raw if raw is None or self.convert is None else self.convert(raw))
+            if len(self.categories) > _CODE_TYPES[self._width][1]:
+                self._width += 1
+                self.codes = array(_CODE_TYPES[self._width][0], self.codes)
+        self.codes.append(code)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.categories[self.codes[index]]
+
+
+def _to_raw(value: Any) -> Any:
+    """Database form of an Enum (its value) or anything else."""
+    return getattr(value, "value", value)
+
+
+def _score(value: Optional[int]) -> int:
+    return MISSING_SCORE if value is None else value
+
+
+def _unscore(value: int) -> Optional[int]:
+    return None if value == MISSING_SCORE else value
+
+
+class ResultSet:
+    """Struct-of-arrays view of many TestResults.
+
+    Repeated strings and enums (models, values, test types, prompts, even
+    responses, which are mostly "Yes"/"No") are stored once and referenced
+    by integer codes. Test ids are packed as 16-byte UUIDs, timestamps as
+    int64 microseconds and scores as int8. A million results take tens of
+    megabytes instead of gigabytes.
+
+    Converting to and from ``TestResult`` is lossless for every field except
+    ``tool_parameters`` and ``metadata``, which are not held and come back
+    empty. Timestamps must be naive, as the framework records them.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, CategoricalColumn] = {
+            name: CategoricalColumn(convert) for name, convert in CATEGORICAL_COLUMNS.items()
+        }
+        self._test_ids = bytearray()
+        self._odd_test_ids: Dict[int, str] = {}
+        self.timestamps = array("q")
+        self.tool_called = array("b")
+        self.scores = array("b")
+        self.human_scores = array("b")
+        self.agreement = array("b")
+
+    @classmethod
+    def from_results(cls, results: Iterable[TestResult]) -> "ResultSet":
+        result_set = cls()
+        result_set.extend(results)
+        return result_set
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append_row(self, test_id: str, timestamp: Any, session_id: str, model_name: str, test_phase: str,
+                   value_name: str, test_type: str, test_category: Optional[str], value_direction: Optional[str],
+                   system_prompt: Optional[str], prompt_used: str, response_text: str, tool_called: Any,
+                   automated_score: Optional[int], automated_confidence: Optional[str],
+                   automated_reasoning: Optional[str], human_score: Optional[int], human_notes: Optional[str],
+                   agreement: Optional[Any]):
+        """Add one result given in its database form (enum values as strings, ISO timestamps)."""
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        if timestamp.tzinfo is not None:
+            raise ValueError("ResultSet only holds naive timestamps")
+        index = len(self)
+        try:
+            packed = uuid.UUID(test_id)
+        except (TypeError, ValueError):
+            packed = None
+        if packed is not None and str(packed) == test_id:
+            self._test_ids += packed.bytes
+        else:
+            # Keep non-canonical ids verbatim so the round trip stays exact
+            self._test_ids += bytes(16)
+            self._odd_test_ids[index] = test_id
+
+        values = {
+            "session_id": session_id, "model_name": model_name, "test_phase": test_phase,
+            "value_name": value_name, "test_type": test_type, "test_category": test_category,
+            "value_direction": value_direction, "system_prompt": system_prompt, "prompt_used": prompt_used,
+            "response_text": response_text, "automated_confidence": automated_confidence,
+            "automated_reasoning": automated_reasoning, "human_notes": human_notes
+        }
+        for name, column in self.columns.items():
+            column.append(values[name])
+        self.timestamps.append((timestamp - _EPOCH) // _MICROSECOND)
+        self.tool_called.append(bool(tool_called))
+        self.scores.append(_score(automated_score))
+        self.human_scores.append(_score(human_score))
+        self.agreement.append(-1 if agreement is None else bool(agreement))
+
+    def append(self, result: TestResult):
+        evaluation = result.evaluation
+        self.append_row(
+            test_id=result.test_id,
+            timestamp=result.timestamp,
+            session_id=result.session_id,
+            model_name=result.model_name,
+            test_phase=_to_raw(result.test_phase),
+            value_name=result.value_name,
+            test_type=_to_raw(result.test_type),
+            test_category=_to_raw(result.test_category),
+            value_direction=_to_raw(result.value_direction),
+            system_prompt=result.system_prompt,
+            prompt_used=result.prompt_used,
+            response_text=result.response_text,
+            tool_called=result.tool_called,
+            automated_score=evaluation.automated_score if evaluation else None,
+            automated_confidence=_to_raw(evaluation.automated_confidence) if evaluation else None,
+            automated_reasoning=evaluation.automated_reasoning if evaluation else None,
+            human_score=evaluation.human_score if evaluation else None,
+            human_notes=evaluation.human_notes if evaluation else None,
+            agreement=evaluation.agreement if evaluation else None
+        )
+
+    def extend(self, results: Iterable[TestResult]):
+        for result in results:
+            self.append(result)
+
+    def test_id(self, index: int) -> str:
+        if index in self._odd_test_ids:
+            return self._odd_test_ids[index]
+        return str(uuid.UUID(bytes=bytes(self._test_ids[index * 16:index * 16 + 16])))
+
+    def timestamp(self, index: int) -> datetime:
+        return _EPOCH + self.timestamps[index] * _MICROSECOND
+
+    def __getitem__(self, index: int) -> TestResult:
+        """Rebuild the TestResult at ``index``."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("result index out of range")
+        column = self.columns
+        result = TestResult(
+            test_id=self.test_id(index),
+            timestamp=self.timestamp(index),
+            session_id=column["session_id"][index],
+            model_name=column["model_name"][index],
+            test_phase=column["test_phase"][index],
+            value_name=column["value_name"][index],
+            test_type=column["test_type"][index],
+            test_category=column["test_category"][index],
+            value_direction=column["value_direction"][index],
+            system_prompt=column["system_prompt"][index],
+            prompt_used=column["prompt_used"][index],
+            response_text=column["response_text"][index],
+            tool_called=bool(self.tool_called[index])
+        )
+        confidence = column["automated_confidence"][index]
+        if confidence is not None:
+            agreement = self.agreement[index]
+            result.evaluation = EvaluationResult(
+                automated_score=_unscore(self.scores[index]),
+                automated_confidence=confidence,
+                automated_reasoning=column["automated_reasoning"][index],
+                human_score=_unscore(self.human_scores[index]),
+                human_notes=column["human_notes"][index],
+                agreement=None if agreement == -1 else bool(agreement)
+            )
+        return result
+
+    def __iter__(self) -> Iterator[TestResult]:
+        return (self[index] for index in range(len(self)))
+
+    def to_results(self) -> List[TestResult]:
+        return list(self)
+
+    def codes(self, name: str) -> Tuple[array, List[Any]]:
+        """(codes, categories) of a categorical column, for vectorized grouping."""
+        column = self.columns[name]
+        return column.codes, column.categories
+
+    def column(self, name: str) -> List[Any]:
+        """Decoded values of a categorical column."""
+        column = self.columns[name]
+        return [column.categories[code] for code in column.codes]
+
+    def score(self, index: int) -> Optional[int]:
+        return _unscore(self.scores[index])
+
+    def group_indexes(self, name: str) -> Dict[Any, List[int]]:
+        """Row indexes per category of a column, in order of first appearance."""
+        codes, categories = self.codes(name)
+        groups: Dict[int, List[int]] = {}
+        for index, code in enumerate(codes):
+            groups.setdefault(code, []).append(index)
+        return {categories[code]: indexes for code, indexes in groups.items()}
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the arrays and the distinct category values."""
+        arrays = [self.timestamps, self.tool_called, self.scores, self.human_scores, self.agreement]
+        total = len(self._test_ids) + sum(a.itemsize * len(a) for a in arrays)
+        for column in self.columns.values():
+            total += column.codes.itemsize * len(column.codes)
+            total += sum(len(raw) for raw in column.raw if isinstance(raw, str))
+        return total
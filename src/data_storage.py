@@ -1,14 +1,24 @@
 """Data storage and persistence utilities."""
 
+import asyncio
 import json
-import jsonlines
 import sqlite3
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 from datetime import datetime
 
 from .core.results import TestResult, ExperimentSession
+from .core.result_set import ResultSet
+
+# test_results columns in the order rows are written and read
+RESULT_COLUMNS = (
+    "test_id", "timestamp", "session_id", "model_name", "test_phase", "value_name",
+    "test_type", "test_category", "value_direction", "system_prompt", "prompt_used",
+    "response_text", "tool_called", "tool_parameters",
+    "automated_score", "automated_confidence", "automated_reasoning",
+    "human_score", "human_notes", "agreement", "metadata"
+)
 
 
 class DataStorage:
@@ -71,6 +81,25 @@ class DataStorage:
                 )
             ''')
             
+            # Create failed_tests table (calls that produced no result)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS failed_tests (
+                    failure_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    temperature REAL,
+                    run_index INTEGER,
+                    value_name TEXT NOT NULL,
+                    test_name TEXT NOT NULL,
+                    system_prompt TEXT,
+                    prompt_used TEXT NOT NULL,
+                    error_type TEXT NOT NULL,
+                    error_message TEXT,
+                    attempts INTEGER NOT NULL,
+                    transient BOOLEAN NOT NULL
+                )
+            ''')
+            
             # Create indexes
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_id ON test_results(session_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_model_name ON test_results(model_name)')
@@ -81,53 +110,104 @@ class DataStorage:
     
     def save_result(self, result: TestResult):
         """Save a single test result."""
+        self.save_results([result])
+    
+    def save_results(self, results: List[TestResult]):
+        """Save a batch of test results in one transaction."""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO test_results ({', '.join(RESULT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(RESULT_COLUMNS))})",
+                [self._result_to_row(result) for result in results]
+            )
             
-            # Prepare data
-            tool_params = json.dumps(result.tool_parameters) if result.tool_parameters else None
-            metadata = json.dumps(result.metadata) if result.metadata else None
-            
-            eval_data = (None, None, None, None, None, None) 
-            if result.evaluation:
-                eval_data = (
-                    result.evaluation.automated_score,
-                    result.evaluation.automated_confidence.value,
-                    result.evaluation.automated_reasoning,
-                    result.evaluation.human_score,
-                    result.evaluation.human_notes,
-                    result.evaluation.agreement
-                )
-            
+            conn.commit()
+    
+    def _result_to_row(self, result: TestResult) -> tuple:
+        """Convert a TestResult to a test_results row."""
+        # Prepare data
+        tool_params = json.dumps(result.tool_parameters) if result.tool_parameters else None
+        metadata = json.dumps(result.metadata) if result.metadata else None
+        
+        eval_data = (None, None, None, None, None, None) 
+        if result.evaluation:
+            eval_data = (
+                result.evaluation.automated_score,
+                result.evaluation.automated_confidence.value,
+                result.evaluation.automated_reasoning,
+                result.evaluation.human_score,
+                result.evaluation.human_notes,
+                result.evaluation.agreement
+            )
+        
+        return (
+            result.test_id,
+            result.timestamp.isoformat(),
+            result.session_id,
+            result.model_name,
+            result.test_phase.value,
+            result.value_name,
+            result.test_type.value,
+            result.test_category.value if result.test_category else None,
+            result.value_direction.value if result.value_direction else None,
+            result.system_prompt,
+            result.prompt_used,
+            result.response_text,
+            result.tool_called,
+            tool_params,
+            *eval_data,
+            metadata
+        )
+    
+    def save_failed_test(
+        self,
+        model_name: str,
+        temperature: Optional[float],
+        run_index: Optional[int],
+        value_name: str,
+        test_name: str,
+        system_prompt: Optional[str],
+        prompt_used: str,
+        error: BaseException,
+        attempts: int = 1,
+        transient: bool = False
+    ):
+        """Record a test that failed permanently or exhausted its retries."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                INSERT OR REPLACE INTO test_results (
-                    test_id, timestamp, session_id, model_name, test_phase, value_name,
-                    test_type, test_category, value_direction, system_prompt, prompt_used, 
-                    response_text, tool_called, tool_parameters,
-                    automated_score, automated_confidence, automated_reasoning,
-                    human_score, human_notes, agreement, metadata
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO failed_tests (
+                    timestamp, model_name, temperature, run_index, value_name, test_name,
+                    system_prompt, prompt_used, error_type, error_message, attempts, transient
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
-                result.test_id,
-                result.timestamp.isoformat(),
-                result.session_id,
-                result.model_name,
-                result.test_phase.value,
-                result.value_name,
-                result.test_type.value,
-                result.test_category.value if result.test_category else None,
-                result.value_direction.value if result.value_direction else None,
-                result.system_prompt,
-                result.prompt_used,
-                result.response_text,
-                result.tool_called,
-                tool_params,
-                *eval_data,
-                metadata
+                datetime.now().isoformat(),
+                model_name,
+                temperature,
+                run_index,
+                value_name,
+                test_name,
+                system_prompt,
+                prompt_used,
+                type(error).__name__,
+                str(error),
+                attempts,
+                transient
             ))
-            
             conn.commit()
     
+    def load_failed_tests(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Load recorded failures, newest first."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            query = "SELECT * FROM failed_tests ORDER BY failure_id DESC"
+            params = []
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+            return [dict(row) for row in conn.execute(query, params)]
+    
     def save_session(self, session: ExperimentSession):
         """Save an experiment session."""
         with sqlite3.connect(self.db_path) as conn:
@@ -147,11 +227,43 @@ class DataStorage:
                 len(session.results)
             ))
             
-            # Save all results
-            for result in session.results:
-                self.save_result(result)
-            
             conn.commit()
+        
+        # Save all results
+        self.save_results(session.results)
+    
+    def _query_results(
+        self,
+        conn: sqlite3.Connection,
+        columns: Sequence[str],
+        session_id: Optional[str] = None,
+        model_name: Optional[str] = None,
+        test_type: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> sqlite3.Cursor:
+        """Run a filtered test_results query, newest first."""
+        query = f"SELECT {', '.join(columns)} FROM test_results WHERE 1=1"
+        params = []
+        
+        if session_id:
+            query += " AND session_id = ?"
+            params.append(session_id)
+        
+        if model_name:
+            query += " AND model_name = ?"
+            params.append(model_name)
+        
+        if test_type:
+            query += " AND test_type = ?"
+            params.append(test_type)
+        
+        query += " ORDER BY timestamp DESC"
+        
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        return conn.execute(query, params)
     
     def load_results(
         self,
@@ -162,36 +274,26 @@ class DataStorage:
     ) -> List[TestResult]:
         """Load test results with optional filtering."""
         with sqlite3.connect(self.db_path) as conn:
-            query = "SELECT * FROM test_results WHERE 1=1"
-            params = []
-            
-            if session_id:
-                query += " AND session_id = ?"
-                params.append(session_id)
-            
-            if model_name:
-                query += " AND model_name = ?"
-                params.append(model_name)
-            
-            if test_type:
-                query += " AND test_type = ?"
-                params.append(test_type)
-            
-            query += " ORDER BY timestamp DESC"
-            
-            if limit:
-                query += " LIMIT ?"
-                params.append(limit)
-            
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            
-            results = []
-            for row in cursor.fetchall():
-                result = self._row_to_test_result(row)
-                results.append(result)
-            
-            return results
+            cursor = self._query_results(conn, RESULT_COLUMNS, session_id, model_name, test_type, limit)
+            return [self._row_to_test_result(row) for row in cursor]
+    
+    def load_result_set(
+        self,
+        session_id: Optional[str] = None,
+        model_name: Optional[str] = None,
+        test_type: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> ResultSet:
+        """Load test results into a compact ResultSet, without building TestResult objects.
+        
+        Tool parameters and metadata are not loaded.
+        """
+        columns = [name for name in RESULT_COLUMNS if name not in ("tool_parameters", "metadata")]
+        result_set = ResultSet()
+        with sqlite3.connect(self.db_path) as conn:
+            for row in self._query_results(conn, columns, session_id, model_name, test_type, limit):
+                result_set.append_row(*row)
+        return result_set
     
     def load_session(self, session_id: str) -> Optional[ExperimentSession]:
         """Load a complete experiment session."""
@@ -221,8 +323,8 @@ class DataStorage:
             return session
     
     def _row_to_test_result(self, row) -> TestResult:
-        """Convert database row to TestResult object."""
-        from .core.results import TestPhase, TestType, EvaluationResult, ConfidenceLevel
+        """Convert a database row (columns in RESULT_COLUMNS order) to a TestResult."""
+        from .core.results import TestPhase, TestType, TestCategory, ValueDirection, EvaluationResult, ConfidenceLevel
         
         result = TestResult(
             test_id=row[0],
@@ -232,28 +334,33 @@ class DataStorage:
             test_phase=TestPhase(row[4]),
             value_name=row[5],
             test_type=TestType(row[6]),
-            prompt_used=row[7],
-            response_text=row[8],
-            tool_called=bool(row[9]),
-            tool_parameters=json.loads(row[10]) if row[10] else {},
-            metadata=json.loads(row[17]) if row[17] else {}
+            test_category=TestCategory(row[7]) if row[7] else None,
+            value_direction=ValueDirection(row[8]) if row[8] else None,
+            system_prompt=row[9],
+            prompt_used=row[10],
+            response_text=row[11],
+            tool_called=bool(row[12]),
+            tool_parameters=json.loads(row[13]) if row[13] else {},
+            metadata=json.loads(row[20]) if row[20] else {}
         )
         
         # Add evaluation if present
-        if row[11] is not None:  # automated_score
+        if row[14] is not None:  # automated_score
             result.evaluation = EvaluationResult(
-                automated_score=row[11],
-                automated_confidence=ConfidenceLevel(row[12]),
-                automated_reasoning=row[13],
-                human_score=row[14],
-                human_notes=row[15],
-                agreement=row[16]
+                automated_score=row[14],
+                automated_confidence=ConfidenceLevel(row[15]),
+                automated_reasoning=row[16],
+                human_score=row[17],
+                human_notes=row[18],
+                agreement=None if row[19] is None else bool(row[19])
             )
         
         return result
     
     def export_to_jsonl(self, filename: str, session_id: Optional[str] = None):
         """Export results to JSONL format."""
+        import jsonlines  # Only exports need it; keep startup fast
+        
         results = self.load_results(session_id=session_id)
         
         filepath = self.data_dir / "processed" / filename
@@ -263,6 +370,8 @@ class DataStorage:
     
     def export_to_csv(self, filename: str, session_id: Optional[str] = None):
         """Export results to CSV format."""
+        import pandas as pd  # Only exports need it; keep startup fast
+        
         results = self.load_results(session_id=session_id)
         
         # Flatten results for CSV
@@ -294,6 +403,17 @@ class DataStorage:
         filepath = self.data_dir / "processed" / filename
         df.to_csv(filepath, index=False)
     
+    def export_to_parquet(self, filename: str, session_id: Optional[str] = None) -> int:
+        """Export results, with every stored column, to Parquet for ``ResultsAnalytics``.
+        
+        Needs DuckDB. Returns the number of rows written.
+        """
+        from .analysis.analytics import ResultsAnalytics
+        
+        filepath = self.data_dir / "processed" / filename
+        with ResultsAnalytics(self.db_path, engine="duckdb") as analytics:
+            return analytics.export_parquet(filepath, session_id=session_id)
+    
     def get_storage_stats(self) -> Dict[str, Any]:
         """Get statistics about stored data."""
         with sqlite3.connect(self.db_path) as conn:
@@ -331,4 +451,129 @@ class DataStorage:
                 'human_evaluated': human_evaluated,
                 'evaluation_coverage': evaluated_results / max(total_results, 1),
                 'human_verification_rate': human_evaluated / max(evaluated_results, 1)
-            }
\ No newline at end of file
+            }
+
+
+class AsyncDataStorage:
+    """Non-blocking front end to DataStorage for use inside the event loop.
+    
+    Results are queued and written in batches by a single writer thread, so
+    sqlite commits never stall in-flight API calls. The queue is bounded:
+    once ``max_pending`` results are waiting, ``save_result`` waits for the
+    writer to catch up instead of letting memory grow without limit.
+    
+    A batch that still fails after ``write_attempts`` tries is kept, not
+    dropped: ``check`` reports the error, ``flush`` tries the kept results
+    again, and ``close`` dumps any that still cannot be written to a JSONL
+    file under ``raw/``.
+    """
+    
+    def __init__(self, storage: DataStorage, max_pending: int = 1000, batch_size: int = 100,
+                 write_attempts: int = 3, retry_delay: float = 0.5):
+        """Wrap a synchronous DataStorage."""
+        self.storage = storage
+        self.batch_size = batch_size
+        self.write_attempts = write_attempts
+        self.retry_delay = retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="results-writer")
+        self._writer: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+        self._unsaved: List[TestResult] = []
+        self.batches_written = 0
+    
+    @property
+    def db_path(self) -> Path:
+        return self.storage.db_path
+    
+    @property
+    def unsaved(self) -> int:
+        """Results whose writes failed and are being held for another try."""
+        return len(self._unsaved)
+    
+    def _ensure_writer(self):
+        if self._writer is None:
+            self._queue = asyncio.Queue(maxsize=self._max_pending)
+            self._writer = asyncio.ensure_future(self._write_loop())
+    
+    def check(self):
+        """Raise if a batch could not be written; the results themselves are kept."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Background result write failed ({len(self._unsaved)} results held): {error}") from error
+    
+    async def save_result(self, result: TestResult):
+        """Queue a result for writing, waiting if the writer has fallen behind."""
+        self._ensure_writer()
+        await self._queue.put(result)
+    
+    async def save_failed_test(self, **failure):
+        """Record a failed test on the writer thread."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, lambda: self.storage.save_failed_test(**failure))
+    
+    async def _write_batch(self, batch: List[TestResult]) -> bool:
+        """Write one batch, retrying with backoff; keep it in ``_unsaved`` if every attempt fails."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.write_attempts):
+            try:
+                await loop.run_in_executor(self._executor, self.storage.save_results, batch)
+                self.batches_written += 1
+                return True
+            except Exception as e:
+                error = e
+                if attempt + 1 < self.write_attempts:
+                    await asyncio.sleep(self.retry_delay * 2 ** attempt)
+        print(f"❌ Failed to save {len(batch)} results after {self.write_attempts} attempts: {error} "
+              f"(keeping them for another try)")
+        self._unsaved.extend(batch)
+        self._error = error
+        return False
+    
+    async def _write_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def flush(self):
+        """Wait until every queued result has been written, retrying any held ones."""
+        if self._writer is not None:
+            await self._queue.join()
+        if self._unsaved:
+            held, self._unsaved = self._unsaved, []
+            self._error = None
+            for start in range(0, len(held), self.batch_size):
+                await self._write_batch(held[start:start + self.batch_size])
+        self.check()
+    
+    def _dump_unsaved(self) -> Path:
+        """Write results that never reached the database to a JSONL file so they are not lost."""
+        path = self.storage.data_dir / "raw" / f"unsaved_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        with open(path, 'w') as f:
+            for result in self._unsaved:
+                f.write(json.dumps(result.to_dict()) + "\n")
+        self._unsaved = []
+        return path
+    
+    async def close(self):
+        """Flush pending results and stop the writer thread."""
+        try:
+            await self.flush()
+        finally:
+            if self._writer is not None:
+                self._writer.cancel()
+                self._writer = None
+            self._executor.shutdown(wait=True)
+            # Anything still queued (e.g. after Ctrl+C) is kept with the failed writes
+            while self._queue is not None and not self._queue.empty():
+                self._unsaved.append(self._queue.get_nowait())
+            if self._unsaved:
+                count = len(self._unsaved)
+                print(f"💾 {count} results could not be written to {self.db_path}; saved to {self._dump_unsaved()}")
@@ -0,0 +1,108 @@
+"""Adaptive sampling strategies that decide how many runs each cell gets."""
+
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..core.results import TestResult
+from ..testing.experiment_plan import WorkItem
+from ..utils.statistics import wilson_interval
+
+# (model, temperature, value, scenario)
+CellKey = Tuple[str, float, str, str]
+
+
+def cell_key(item: WorkItem) -> CellKey:
+    """Cell a work item samples from."""
+    return (item.model_name, item.temperature, item.value_name, item.test_name)
+
+
+@dataclass
+class CellState:
+    """Running Yes-rate estimate for one cell."""
+    template: WorkItem
+    issued: int = 0
+    observed: int = 0
+    successes: int = 0
+
+    def interval(self, confidence: float) -> Tuple[float, float]:
+        return wilson_interval(self.successes, self.observed, confidence)
+
+    def width(self, confidence: float) -> float:
+        low, high = self.interval(confidence)
+        return high - low
+
+
+class SequentialSampler:
+    """Sequential early stopping for runs per (model, temperature, value, scenario).
+
+    Sampling proceeds in rounds. Each round issues one more run for every
+    cell whose Wilson interval is still wider than ``target_width``, widest
+    first. Cells that converge stop early and the runs they did not use stay
+    in a shared budget (``runs`` x cells) that uncertain cells can spend, up
+    to ``max_runs_per_cell`` each. ``runs`` must be at least ``min_runs``,
+    or the budget would run out before any cell could converge.
+    """
+
+    def __init__(
+        self,
+        templates: Iterable[WorkItem],
+        runs: int,
+        target_width: float = 0.3,
+        min_runs: int = 3,
+        max_runs_per_cell: Optional[int] = None,
+        confidence: float = 0.95
+    ):
+        self.cells: Dict[CellKey, CellState] = {}
+        for template in templates:
+            self.cells.setdefault(cell_key(template), CellState(template=template))
+        self.target_width = target_width
+        self.min_runs = max(1, min_runs)
+        if runs < self.min_runs:
+            raise ValueError(f"A budget of {runs} runs per cell cannot reach the minimum of {self.min_runs}")
+        self.max_runs_per_cell = max_runs_per_cell or runs * 3
+        self.confidence = confidence
+        self.budget = runs * len(self.cells)
+        self.issued = 0
+
+    def is_converged(self, cell: CellState) -> bool:
+        """Check whether a cell's interval is already tight enough."""
+        return cell.observed >= self.min_runs and cell.width(self.confidence) <= self.target_width
+
+    def is_active(self, cell: CellState) -> bool:
+        """Check whether a cell should get another run."""
+        return not self.is_converged(cell) and cell.issued < self.max_runs_per_cell
+
+    def next_round(self) -> List[WorkItem]:
+        """Work items for the next round, or an empty list when sampling is done."""
+        active = [cell for cell in self.cells.values() if self.is_active(cell)]
+        # Least-sampled first, then widest interval, so budget goes where it matters most
+        active.sort(key=lambda cell: (cell.issued, -cell.width(self.confidence)))
+
+        batch = []
+        for cell in active:
+            if self.issued >= self.budget:
+                break
+            batch.append(replace(cell.template, run_index=cell.issued))
+            cell.issued += 1
+            self.issued += 1
+        return batch
+
+    def record_result(self, item: WorkItem, result: TestResult):
+        """Fold a completed result into its cell's estimate."""
+        cell = self.cells.get(cell_key(item))
+        if cell is None or result.evaluation is None:
+            return
+        cell.observed += 1
+        cell.successes += result.evaluation.automated_score
+
+    def summary(self) -> Dict[str, int]:
+        """Counts of converged and unconverged cells and calls used."""
+        converged = sum(1 for cell in self.cells.values() if self.is_converged(cell))
+        return {
+            "cells": len(self.cells),
+            "converged": converged,
+            "unconverged": len(self.cells) - converged,
+            "calls_used": self.issued,
+            "budget": self.budget,
+            "budget_exhausted": self.issued >= self.budget
+        }
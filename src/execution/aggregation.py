@@ -0,0 +1,77 @@
+"""Streaming aggregates of completed results."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional
+
+from ..core.results import TestResult
+from ..testing.experiment_plan import WorkItem
+from .adaptive import CellKey, cell_key
+
+
+@dataclass
+class CellAggregate:
+    """Counts and score sums for one (model, temperature, value, scenario) cell."""
+    tests: int = 0
+    scored: int = 0
+    score_sum: float = 0.0
+    yes: int = 0
+    cost: float = 0.0
+
+    @property
+    def mean_score(self) -> Optional[float]:
+        return self.score_sum / self.scored if self.scored else None
+
+    def add(self, other: "CellAggregate"):
+        self.tests += other.tests
+        self.scored += other.scored
+        self.score_sum += other.score_sum
+        self.yes += other.yes
+        self.cost += other.cost
+
+
+class ResultAggregator:
+    """Folds each result into per-cell counts as it completes.
+
+    Only the counts are kept, never the results themselves, so memory grows
+    with the number of cells rather than the number of calls.
+    """
+
+    def __init__(self):
+        self.cells: Dict[CellKey, CellAggregate] = OrderedDict()
+        self.tests = 0
+
+    def record(self, item: WorkItem, result: TestResult, cost: float = 0.0):
+        """Add one completed result to its cell."""
+        cell = self.cells.get(cell_key(item))
+        if cell is None:
+            cell = self.cells[cell_key(item)] = CellAggregate()
+        cell.tests += 1
+        cell.cost += cost
+        self.tests += 1
+        score = result.evaluation.automated_score if result.evaluation else None
+        if score is not None:
+            cell.scored += 1
+            cell.score_sum += score
+            cell.yes += score > 0
+
+    def group_by(self, field: int) -> Dict[Hashable, CellAggregate]:
+        """Merge cells on one position of the (model, temperature, value, scenario) key."""
+        groups: Dict[Hashable, CellAggregate] = OrderedDict()
+        for key, cell in self.cells.items():
+            groups.setdefault(key[field], CellAggregate()).add(cell)
+        return groups
+
+    def by_value(self) -> Dict[str, CellAggregate]:
+        """Aggregates per value, in the order values first completed."""
+        return self.group_by(2)
+
+    def total(self) -> CellAggregate:
+        total = CellAggregate()
+        for cell in self.cells.values():
+            total.add(cell)
+        return total
+
+    def yes_rates(self) -> Dict[CellKey, float]:
+        """Yes-rate of every cell that has at least one scored result."""
+        return {key: cell.yes / cell.scored for key, cell in self.cells.items() if cell.scored}
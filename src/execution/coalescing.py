@@ -0,0 +1,54 @@
+"""Single-flight coalescing of identical in-flight model calls."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+def request_key(model_name: str, system_prompt: Optional[str], user_prompt: str,
+                temperature: float, **params: Any) -> Tuple:
+    """Build a hashable key identifying a model request."""
+    return (model_name, system_prompt or "", user_prompt, float(temperature),
+            tuple(sorted(params.items())))
+
+
+class SingleFlight:
+    """Shares one underlying call between identical concurrent requests.
+
+    The first caller for a key starts the call; callers arriving while it is
+    still in flight await the same result instead of issuing a duplicate.
+    Nothing is cached once the call completes, so sequential calls with the
+    same key still reach the provider.
+    """
+
+    def __init__(self, temperatures: Optional[Iterable[float]] = (0.0,)):
+        """Initialize with the temperatures coalescing applies to (None for all)."""
+        self.temperatures = None if temperatures is None else {float(t) for t in temperatures}
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def enabled_for(self, temperature: float) -> bool:
+        """Check whether requests at this temperature may be coalesced."""
+        return self.temperatures is None or float(temperature) in self.temperatures
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run ``call`` or join an identical in-flight one.
+
+        Returns (result, coalesced) where coalesced is True when this caller
+        reused another caller's request.
+        """
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            # Shield so a cancelled follower never cancels the shared call
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(call())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        self.calls += 1
+        return await asyncio.shield(task), False
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
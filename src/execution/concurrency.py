@@ -0,0 +1,145 @@
+"""Latency-driven adaptive concurrency control (AIMD)."""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+from ..utils.statistics import percentile
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Check whether an error signals provider overload (timeouts, 429s)."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "timed out" in message
+
+
+class AIMDConcurrencyController:
+    """Additive-increase / multiplicative-decrease limit on in-flight calls.
+
+    Latencies are judged in windows of ``window`` completed calls. If a
+    window's p95 stays within ``latency_tolerance`` x the baseline p95 and
+    had no errors, the limit grows by one. A latency spike, a timeout or a
+    429 multiplies the limit by ``decrease_factor`` straight away.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        window: int = 20,
+        latency_tolerance: float = 1.5,
+        decrease_factor: float = 0.5,
+        on_change: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.on_change = on_change
+        self.in_flight = 0
+        self.baseline_p95: Optional[float] = None
+        self._window_latencies = []
+        self._window_errors = 0
+        self._recent_latencies = deque(maxlen=200)
+        self._epoch = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one in-flight slot for the duration of a call, recording its outcome."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        epoch = self._epoch
+        try:
+            yield
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.record_failure(e, epoch)
+            raise
+        else:
+            self.record_success(loop.time() - started, epoch)
+        finally:
+            # Limit changes only happen just above, so this also wakes waiters when it grew
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def has_capacity(self) -> bool:
+        """Check whether a slot is free right now, without waiting for one."""
+        return self.in_flight < int(self.limit)
+
+    def record_success(self, latency: float, epoch: Optional[int] = None):
+        """Record a completed call's latency.
+
+        Calls started before the most recent decrease still count towards
+        the reported percentiles but not towards the next window's verdict.
+        """
+        self._recent_latencies.append(latency)
+        if epoch is not None and epoch != self._epoch:
+            return
+        self._window_latencies.append(latency)
+        if len(self._window_latencies) >= self.window:
+            self._evaluate_window()
+
+    def record_failure(self, error: BaseException, epoch: Optional[int] = None):
+        """Record a failed call; overload errors back off immediately.
+
+        Calls started before the most recent decrease (an older ``epoch``)
+        do not trigger another one, so a burst of 429s halves the limit once.
+        """
+        self._window_errors += 1
+        if is_overload_error(error) and (epoch is None or epoch == self._epoch):
+            self._decrease()
+
+    def _evaluate_window(self):
+        window_p95 = percentile(self._window_latencies, 95)
+        if self.baseline_p95 is None:
+            self.baseline_p95 = window_p95
+            self._increase()
+        elif window_p95 > self.baseline_p95 * self.latency_tolerance:
+            self._decrease()
+        else:
+            # Let the baseline drift slowly with the provider's normal latency
+            self.baseline_p95 = 0.8 * self.baseline_p95 + 0.2 * window_p95
+            if self._window_errors == 0:
+                self._increase()
+            else:
+                self._reset_window()
+
+    def _increase(self):
+        self.limit = min(self.max_limit, self.limit + 1)
+        self._reset_window()
+
+    def _decrease(self):
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self._epoch += 1
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window_latencies = []
+        self._window_errors = 0
+        if self.on_change is not None:
+            self.on_change(self.snapshot())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limit and observed latencies, for dashboards and logs."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "p50_latency": percentile(self._recent_latencies, 50),
+            "p95_latency": percentile(self._recent_latencies, 95)
+        }
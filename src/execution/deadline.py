@@ -0,0 +1,140 @@
+"""Time-boxed experiments: issue stratified work until a deadline, then drain."""
+
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from ..core.results import TestResult
+from ..testing.experiment_plan import WorkItem
+from ..utils.statistics import percentile
+from .adaptive import CellKey, cell_key
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_deadline(text: str, now: Optional[datetime] = None) -> float:
+    """Seconds until a deadline given as a duration ("90m", "2h", "45s", bare minutes) or an ISO time.
+
+    An ISO time with a UTC offset is converted to local time first.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", text)
+    if match:
+        return float(match.group(1)) * _DURATION_UNITS[match.group(2) or "m"]
+    try:
+        deadline = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid deadline: {text!r} (use e.g. 90m, 2h or 2025-06-01T18:00)")
+    if deadline.tzinfo is not None:
+        # Compare in local time, like naive deadlines and ``now``
+        deadline = deadline.astimezone().replace(tzinfo=None)
+    return (deadline - (now or datetime.now())).total_seconds()
+
+
+class DeadlineScheduler:
+    """Admits work items only while they can still finish before a deadline.
+
+    Items should arrive in stratified order, so stopping at any point leaves
+    every cell within one run of the others. An item is admitted only if the
+    time left exceeds the live p95 call latency plus ``drain_margin``, so
+    calls already in flight can finish before the deadline. Measured
+    throughput is used to project how many runs each cell will reach.
+    """
+
+    def __init__(
+        self,
+        deadline_seconds: float,
+        drain_margin: float = 30.0,
+        initial_latency: float = 1.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.clock = clock
+        self.started = clock()
+        self.deadline_at = self.started + deadline_seconds
+        self.drain_margin = drain_margin
+        self.initial_latency = initial_latency
+        self.issued = 0
+        self.completed = 0
+        self.skipped = 0
+        self.completed_per_cell: Dict[CellKey, int] = OrderedDict()
+        self._latencies: Deque[float] = deque(maxlen=200)
+
+    def remaining(self) -> float:
+        return self.deadline_at - self.clock()
+
+    def expected_latency(self) -> float:
+        """p95 of recent call latencies, or the historical estimate before any complete."""
+        return percentile(self._latencies, 95) if self._latencies else self.initial_latency
+
+    def can_issue(self) -> bool:
+        """Check whether a call started now would finish before the deadline."""
+        return self.remaining() > self.expected_latency() + self.drain_margin
+
+    def throughput(self) -> float:
+        """Completed results per second since the scheduler started."""
+        elapsed = self.clock() - self.started
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def admit(self, items: Iterable[WorkItem]) -> Iterator[WorkItem]:
+        """Yield items until the deadline leaves no time to finish another call."""
+        iterator = iter(items)
+        current_round = None
+        for item in iterator:
+            self.completed_per_cell.setdefault(cell_key(item), 0)
+            if current_round is not None and item.run_index > current_round:
+                print(f"\n⏱️  Run {item.run_index + 1} starting with {self.remaining() / 60:.1f} min left; "
+                      f"{self.throughput():.2f} tests/s projects "
+                      f"{self.projected_runs_per_cell():.1f} runs per cell")
+            current_round = item.run_index if current_round is None else max(current_round, item.run_index)
+            if not self.can_issue():
+                # Count what is left so the report shows the coverage shortfall
+                self.skipped += 1
+                for skipped in iterator:
+                    self.completed_per_cell.setdefault(cell_key(skipped), 0)
+                    self.skipped += 1
+                return
+            self.issued += 1
+            yield item
+
+    def record_result(self, item: WorkItem, result: TestResult):
+        """Count a completed result towards its cell and the live throughput."""
+        key = cell_key(item)
+        self.completed_per_cell[key] = self.completed_per_cell.get(key, 0) + 1
+        self.completed += 1
+        latency = result.metadata.get("latency_seconds")
+        if latency is not None:
+            self._latencies.append(latency)
+
+    def projected_runs_per_cell(self) -> float:
+        """Runs per cell the current throughput will reach by the deadline."""
+        cells = max(1, len(self.completed_per_cell))
+        usable = max(0.0, self.remaining() - self.drain_margin)
+        return (self.completed + self.throughput() * usable) / cells
+
+    def coverage_report(self) -> Dict[str, Any]:
+        """Which cells reached which sample size."""
+        by_runs: Dict[int, List[CellKey]] = {}
+        for key, runs in self.completed_per_cell.items():
+            by_runs.setdefault(runs, []).append(key)
+
+        return {
+            "completed": self.completed,
+            "issued": self.issued,
+            "not_issued": self.skipped,
+            "throughput_per_second": round(self.throughput(), 4),
+            "finished_before_deadline": self.remaining() >= 0,
+            "sample_sizes": {
+                str(runs): len(keys) for runs, keys in sorted(by_runs.items())
+            },
+            "cells": [
+                {
+                    "model": model_name,
+                    "temperature": temperature,
+                    "value": value_name,
+                    "scenario": scenario,
+                    "runs": runs
+                }
+                for (model_name, temperature, value_name, scenario), runs in self.completed_per_cell.items()
+            ]
+        }
@@ -0,0 +1,86 @@
+"""Hedged requests: race a duplicate call against slow ones to cut tail latency."""
+
+import asyncio
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from ..utils.statistics import percentile
+
+
+class HedgingPolicy:
+    """Sends a duplicate request when a call outlives its model's rolling p95.
+
+    Whichever of the two calls answers first wins and the other is
+    cancelled. At most ``max_hedge_fraction`` of all requests may be hedged,
+    so the extra spend stays bounded. Hedging only starts once a model has
+    ``min_samples`` latencies to estimate its p95 from.
+
+    Wrap only the request itself, once it is in flight: time spent waiting
+    for a concurrency slot or in retry backoff must not count towards the
+    hedge delay.
+    """
+
+    def __init__(self, max_hedge_fraction: float = 0.05, min_samples: int = 20,
+                 window: int = 200, hedge_percentile: float = 95):
+        self.max_hedge_fraction = max_hedge_fraction
+        self.min_samples = min_samples
+        self.hedge_percentile = hedge_percentile
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self, model_name: str) -> Optional[float]:
+        """Seconds to wait before hedging a call to this model, or None if unknown."""
+        samples = self._latencies[model_name]
+        if len(samples) < self.min_samples:
+            return None
+        return percentile(samples, self.hedge_percentile)
+
+    def budget_allows(self) -> bool:
+        """Check whether another hedge fits in the budget."""
+        return self.hedges + 1 <= self.max_hedge_fraction * self.requests
+
+    async def run(self, model_name: str, call: Callable[[], Awaitable[Any]],
+                  hedge_call: Optional[Callable[[], Awaitable[Any]]] = None,
+                  can_hedge: Optional[Callable[[], bool]] = None) -> Tuple[Any, int]:
+        """Run ``call``, hedging it once if it exceeds the model's rolling p95.
+
+        The duplicate is ``hedge_call`` (default ``call``), e.g. the request
+        wrapped in its own concurrency slot, and is only sent if
+        ``can_hedge`` (when given) allows it at that moment. Returns
+        (result, hedges) where hedges is 1 if a duplicate was sent.
+        """
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        primary = asyncio.ensure_future(call())
+        tasks = {primary}
+
+        try:
+            delay = self.hedge_delay(model_name)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.budget_allows() and (can_hedge is None or can_hedge()):
+                    self.hedges += 1
+                    tasks.add(asyncio.ensure_future((hedge_call or call)()))
+
+            hedges = len(tasks) - 1
+            pending = set(tasks)
+            first_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        self._latencies[model_name].append(loop.time() - started)
+                        return task.result(), hedges
+                    if first_error is None or task is primary:
+                        first_error = task.exception()
+            raise first_error
+        finally:
+            # Cancel the losing (or abandoned) call
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
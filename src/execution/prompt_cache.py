@@ -0,0 +1,71 @@
+"""Provider prompt-caching helpers: cache-control markers and cached-token usage."""
+
+import inspect
+from typing import Any, Dict, Optional
+
+# Anthropic's marker for caching a prompt prefix for ~5 minutes
+EPHEMERAL_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _provider_name(client) -> str:
+    """Best-effort provider name for a model client."""
+    config = getattr(client, "config", None)
+    provider = getattr(config, "provider", None)
+    if provider is not None:
+        return str(getattr(provider, "value", provider)).lower()
+    model_name = client.get_model_name().lower() if hasattr(client, "get_model_name") else ""
+    if model_name.startswith("anthropic") or "claude" in model_name:
+        return "anthropic"
+    return "openai"
+
+
+def supports_cache_control(client) -> bool:
+    """Check whether a client accepts explicit cache-control markers.
+
+    Only Anthropic needs explicit markers (OpenAI caches long prefixes
+    automatically), and only clients whose ``generate`` takes a
+    ``cache_control`` parameter can forward them. A bare ``**kwargs`` does
+    not count: it may hand the marker on to an API that rejects it.
+    """
+    if _provider_name(client) != "anthropic":
+        return False
+    try:
+        parameters = inspect.signature(client.generate).parameters
+    except (TypeError, ValueError):
+        return False
+    return "cache_control" in parameters
+
+
+def cache_control_kwargs(client, system_prompt: Optional[str]) -> Dict[str, Any]:
+    """Extra ``generate`` keyword arguments marking the system prompt as cacheable."""
+    if system_prompt and supports_cache_control(client):
+        return {"cache_control": EPHEMERAL_CACHE_CONTROL}
+    return {}
+
+
+def _read(source: Any, name: str) -> Any:
+    if source is None:
+        return None
+    if isinstance(source, dict):
+        return source.get(name)
+    return getattr(source, name, None)
+
+
+def extract_cached_tokens(response: Any) -> int:
+    """Number of prompt tokens served from the provider's cache, or 0 if unreported.
+
+    Understands OpenAI (``usage.prompt_tokens_details.cached_tokens``) and
+    Anthropic (``usage.cache_read_input_tokens``) usage shapes, whether the
+    client exposes them on ``response.usage`` or inside ``response.metadata``.
+    """
+    for usage in (_read(response, "usage"), _read(_read(response, "metadata"), "usage")):
+        if usage is None:
+            continue
+        for value in (
+            _read(usage, "cache_read_input_tokens"),
+            _read(_read(usage, "prompt_tokens_details"), "cached_tokens"),
+            _read(usage, "cached_tokens"),
+        ):
+            if isinstance(value, int) and value > 0:
+                return value
+    return 0
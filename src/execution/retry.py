@@ -0,0 +1,77 @@
+"""Per-call deadlines and classified retries with exponential backoff."""
+
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+from .concurrency import is_overload_error
+
+# HTTP statuses worth retrying besides 429 (server errors, Anthropic's "overloaded")
+TRANSIENT_STATUS_CODES = {408, 500, 502, 503, 504, 529}
+
+TRANSIENT_MESSAGES = ("overloaded", "connection", "temporarily unavailable", "server error", "try again")
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Check whether an error is likely to succeed on retry."""
+    if is_overload_error(error) or isinstance(error, ConnectionError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status in TRANSIENT_STATUS_CODES:
+        return True
+    message = str(error).lower()
+    return any(fragment in message for fragment in TRANSIENT_MESSAGES)
+
+
+class CallFailed(Exception):
+    """A call that still failed after its retries."""
+
+    def __init__(self, error: BaseException, attempts: int):
+        super().__init__(str(error) or type(error).__name__)
+        self.error = error
+        self.attempts = attempts
+        self.transient = is_transient_error(error)
+
+
+class RetryPolicy:
+    """Deadline for each call, plus jittered exponential backoff for transient errors.
+
+    Permanent errors (bad requests, auth failures) are raised straight away;
+    transient ones (timeouts, 429s, 5xx, dropped connections) are retried up
+    to ``max_retries`` times. Either way the caller gets a ``CallFailed``
+    saying how many attempts were made and whether the error was transient.
+    """
+
+    def __init__(self, call_timeout: Optional[float] = 60.0, max_retries: int = 3,
+                 base_delay: float = 1.0, max_delay: float = 30.0):
+        self.call_timeout = call_timeout
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.timeouts = 0
+
+    async def with_deadline(self, call: Awaitable[Any]) -> Any:
+        """Await a call, cancelling it if it runs past ``call_timeout``."""
+        if self.call_timeout is None:
+            return await call
+        try:
+            return await asyncio.wait_for(call, self.call_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def backoff_delay(self, retry: int) -> float:
+        """Full-jitter backoff before the given retry (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    async def run(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``attempt`` until it succeeds, fails permanently or runs out of retries."""
+        for retry in range(self.max_retries + 1):
+            try:
+                return await attempt()
+            except Exception as e:
+                if retry == self.max_retries or not is_transient_error(e):
+                    raise CallFailed(e, retry + 1) from e
+            self.retries += 1
+            await asyncio.sleep(self.backoff_delay(retry))
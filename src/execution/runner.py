@@ -0,0 +1,283 @@
+"""Concurrent execution of compiled experiment plans."""
+
+import asyncio
+import time
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from ..core.results import TestResult, TestPhase
+from ..testing.comprehensive_prompts import get_test_type_from_scenario
+from ..testing.experiment_plan import WorkItem
+from .aggregation import ResultAggregator
+from .coalescing import SingleFlight, request_key
+from .concurrency import AIMDConcurrencyController
+from .hedging import HedgingPolicy
+from .retry import CallFailed, RetryPolicy
+from .prompt_cache import cache_control_kwargs, extract_cached_tokens
+
+
+class ExperimentRunner:
+    """Runs plan work items against model clients with bounded concurrency."""
+
+    def __init__(
+        self,
+        client_factory: Callable[[str, float], Any],
+        evaluator,
+        storage,
+        dashboard,
+        cost_estimator,
+        concurrency: int = 1,
+        rate_limit_delay: float = 0.5,
+        single_flight: Optional[SingleFlight] = None,
+        concurrency_controller: Optional[AIMDConcurrencyController] = None,
+        hedging_policy: Optional[HedgingPolicy] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        """Initialize the runner.
+
+        ``client_factory(model_name, temperature)`` must return a model client
+        exposing ``async generate(prompt, system_prompt)`` and ``get_model_name()``;
+        ``storage`` is an AsyncDataStorage, so writes never block the event loop.
+        With a ``concurrency_controller`` the in-flight limit adapts between
+        its bounds instead of staying at ``concurrency``. With a
+        ``hedging_policy`` calls slower than their model's rolling p95 are
+        raced against a duplicate request. A ``retry_policy`` gives every
+        call a deadline and retries transient errors; items that still fail
+        transiently are retried once more at the end of the sweep, and
+        anything that fails for good is recorded via
+        ``storage.save_failed_test``. Completed results are folded into
+        ``aggregator`` and written to storage, never kept in memory.
+        """
+        self.client_factory = client_factory
+        self.evaluator = evaluator
+        self.storage = storage
+        self.dashboard = dashboard
+        self.cost_estimator = cost_estimator
+        self.concurrency = max(1, concurrency)
+        self.rate_limit_delay = rate_limit_delay
+        self.single_flight = single_flight
+        self.concurrency_controller = concurrency_controller
+        self.hedging_policy = hedging_policy
+        self.retry_policy = retry_policy
+        self.deferred: List[WorkItem] = []
+        self.failed = 0
+        self.total_tests = 0
+        self.dispatched = 0
+        self.cached_tokens = 0
+        self.cache_savings = 0.0
+        self.aggregator = ResultAggregator()
+
+    async def run(
+        self,
+        items: Iterable[WorkItem],
+        total_tests: int,
+        on_result: Optional[Callable[[WorkItem, TestResult], None]] = None,
+        admit: Optional[Callable[[Iterable[WorkItem]], Iterable[WorkItem]]] = None
+    ) -> int:
+        """Execute all work items and return how many completed successfully.
+
+        ``on_result(item, result)`` is called as each result completes, which
+        lets adaptive samplers update their estimates between rounds.
+        ``admit`` filters the items lazily as workers pull them, e.g. to stop
+        issuing work at a deadline; it also applies to deferred retries.
+        """
+        admit = admit or (lambda pending: pending)
+        self.total_tests = total_tests
+        completed = await self._drain(admit(items), on_result, final=False)
+        # Write failures are reported here, not charged to whichever item saves next
+        self.storage.check()
+
+        # Items that failed transiently get one more try once the sweep is done,
+        # so a bad stretch never stalls throughput or silently drops coverage
+        if self.deferred:
+            deferred, self.deferred = self.deferred, []
+            print(f"\n🔁 Retrying {len(deferred)} deferred tests")
+            completed += await self._drain(admit(deferred), on_result, final=True)
+            self.storage.check()
+        return completed
+
+    async def _drain(
+        self,
+        items: Iterable[WorkItem],
+        on_result: Optional[Callable[[WorkItem, TestResult], None]],
+        final: bool
+    ) -> int:
+        iterator = iter(items)
+        completed = 0
+
+        async def worker():
+            nonlocal completed
+            # Workers pull from a shared iterator, so at most `concurrency`
+            # calls are in flight and huge plans are never copied
+            for item in iterator:
+                result = await self.run_item(item, final=final)
+                if result is not None:
+                    completed += 1
+                    if on_result is not None:
+                        on_result(item, result)
+                await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
+
+        # With an adaptive controller, spawn enough workers for its ceiling;
+        # the controller decides how many of them may call the API at once
+        workers = self.concurrency_controller.max_limit if self.concurrency_controller else self.concurrency
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return completed
+
+    async def run_item(self, item: WorkItem, final: bool = True) -> Optional[TestResult]:
+        """Call the model for one work item, then evaluate, save and report it.
+
+        Unless ``final``, an item that fails transiently is deferred for a
+        retry at the end of the sweep instead of being recorded as failed.
+        """
+        self.dispatched += 1
+        label = f"[{self.dispatched}/{self.total_tests}] {item.description}"
+        print(f"      {label}")
+        self.dashboard.update_current_test(label)
+
+        try:
+            # Create test client for this model and temperature
+            client = self.client_factory(item.model_name, item.temperature)
+
+            # Generate response, timing it for future ETA forecasts: latency is
+            # the answering request alone, wait the slot queue and retries around it
+            call_started = time.perf_counter()
+            response, coalesced, hedges, latency = await self._generate(client, item)
+            wait = max(0.0, time.perf_counter() - call_started - latency)
+            # A coalesced result reused another call, so it read nothing from the cache itself
+            cached_tokens = 0 if coalesced else extract_cached_tokens(response)
+
+            result = TestResult(
+                model_name=f"{client.get_model_name()}_T{item.temperature}",
+                test_phase=TestPhase.BASELINE,
+                value_name=item.value_name,
+                test_type=get_test_type_from_scenario(item.category, item.direction),
+                test_category=item.category,
+                value_direction=item.direction,
+                system_prompt=item.system_prompt,
+                prompt_used=item.user_prompt,
+                response_text=response.text,
+                session_id=f"temp_{item.temperature}_run_{item.run_index}",
+                metadata={
+                    "temperature": item.temperature,
+                    "run": item.run_index,
+                    "latency_seconds": round(latency, 4),
+                    "wait_seconds": round(wait, 4),
+                    "output_tokens": self.cost_estimator.count_tokens(response.text),
+                    "coalesced": coalesced,
+                    "hedges": hedges,
+                    "cached_tokens": cached_tokens
+                }
+            )
+
+            evaluation = self.evaluator.evaluate_result(result)
+            result.evaluation = evaluation
+            await self.storage.save_result(result)
+
+            # Coalesced results shared another request's API call; a hedged
+            # call may have been billed for both requests
+            actual_cost = 0.0 if coalesced else (1 + hedges) * self.cost_estimator.calculate_test_cost(
+                item.system_prompt, item.user_prompt, item.model_name, cached_tokens=cached_tokens
+            )
+            self.aggregator.record(item, result, actual_cost)
+            if cached_tokens:
+                self.cached_tokens += cached_tokens
+                self.cache_savings += self.cost_estimator.calculate_cache_savings(item.model_name, cached_tokens)
+
+            self.dashboard.complete_test({
+                "value": item.value_name,
+                "test_type": f"{item.test_name}_T{item.temperature}_R{item.run_index + 1}",
+                "model": result.model_name,
+                "scenario": item.test_name,
+                "temperature": item.temperature,
+                "system_prompt": item.system_prompt,
+                "question": item.user_prompt,
+                "response": result.response_text,
+                "cost": actual_cost,
+                "cached_tokens": cached_tokens,
+                "evaluation_score": evaluation.automated_score,
+                "evaluation_confidence": evaluation.automated_confidence.value
+            })
+
+            shared_note = " (coalesced)" if coalesced else " (hedged)" if hedges else ""
+            print(f"        ✅ {item.description} | Score: {evaluation.automated_score}{shared_note} | "
+                  f"Response: {result.response_text[:30]}...")
+            return result
+
+        except Exception as e:
+            error, attempts, transient = (e.error, e.attempts, e.transient) if isinstance(e, CallFailed) else (e, 1, False)
+            if transient and not final:
+                print(f"        ⏳ {item.description} | Deferred after {attempts} attempts: {error}")
+                self.deferred.append(item)
+                return None
+
+            print(f"        ❌ {item.description} | Error: {error}")
+            self.dashboard.add_error(str(error), item.description)
+            self.failed += 1
+            await self.storage.save_failed_test(
+                model_name=item.model_name,
+                temperature=item.temperature,
+                run_index=item.run_index,
+                value_name=item.value_name,
+                test_name=item.test_name,
+                system_prompt=item.system_prompt,
+                prompt_used=item.user_prompt,
+                error=error,
+                attempts=attempts,
+                transient=transient
+            )
+            return None
+
+    async def _generate(self, client, item: WorkItem) -> Tuple[Any, bool, int, float]:
+        """Generate a response, sharing identical in-flight calls and hedging slow ones where enabled.
+
+        Returns (response, coalesced, hedges, latency), where latency is the
+        duration of the single request that produced the response.
+        """
+        cache_kwargs = cache_control_kwargs(client, item.system_prompt)
+        timing = {"latency": 0.0}
+
+        async def request():
+            # NATURAL scenarios have no system prompt; send none rather than an empty one
+            call = client.generate(prompt=item.user_prompt, system_prompt=item.system_prompt or None, **cache_kwargs)
+            started = time.perf_counter()
+            response = await (call if self.retry_policy is None else self.retry_policy.with_deadline(call))
+            timing["latency"] = time.perf_counter() - started
+            return response
+
+        async def in_flight():
+            # The hedge clock starts once the primary holds a slot, so neither
+            # slot waits nor retry backoff can trigger a hedge
+            if self.hedging_policy is None:
+                return await request(), 0
+            if self.concurrency_controller is None:
+                return await self.hedging_policy.run(client.get_model_name(), request)
+
+            async def duplicate():
+                async with self.concurrency_controller.slot():
+                    return await request()
+
+            # A duplicate only goes out while the controller has a free slot for it
+            return await self.hedging_policy.run(client.get_model_name(), request, hedge_call=duplicate,
+                                                 can_hedge=self.concurrency_controller.has_capacity)
+
+        async def attempt():
+            # The deadline covers the API call, not the wait for a slot
+            if self.concurrency_controller is None:
+                return await in_flight()
+            async with self.concurrency_controller.slot():
+                return await in_flight()
+
+        async def call():
+            if self.retry_policy is None:
+                response, hedges = await attempt()
+            else:
+                response, hedges = await self.retry_policy.run(attempt)
+            return response, hedges, timing["latency"]
+
+        if self.single_flight is None or not self.single_flight.enabled_for(item.temperature):
+            response, hedges, latency = await call()
+            return response, False, hedges, latency
+
+        key = request_key(client.get_model_name(), item.system_prompt, item.user_prompt, item.temperature)
+        (response, hedges, latency), coalesced = await self.single_flight.do(key, call)
+        # Followers share the leader's call, hedge and latency included
+        return response, coalesced, 0 if coalesced else hedges, latency
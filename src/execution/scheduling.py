@@ -0,0 +1,75 @@
+"""Ordering strategies for experiment plan work items."""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+from ..testing.experiment_plan import WorkItem
+
+ORDERING_MODES = ("plan", "cache", "stratified")
+
+
+def order_work_items(items: Iterable[WorkItem], mode: str = "plan") -> List[WorkItem]:
+    """Return work items in the dispatch order for an ordering mode.
+
+    - ``plan``: the compiled order (model, temperature, run, value, scenario)
+    - ``cache``: requests sharing a model and system prompt go out back to back
+    - ``stratified``: interleaved rounds, so any prefix is a balanced sample
+    """
+    if mode == "plan":
+        return list(items)
+    if mode == "cache":
+        return order_for_prompt_cache(items)
+    if mode == "stratified":
+        return order_stratified(items)
+    raise ValueError(f"Unknown ordering mode: {mode}")
+
+
+def order_for_prompt_cache(items: Iterable[WorkItem]) -> List[WorkItem]:
+    """Group work items so provider-side prompt caches stay warm.
+
+    Items are grouped by (model, system prompt) and, inside each group, by
+    user prompt, so identical requests across runs and temperatures are
+    adjacent. Groups keep the order in which they first appear in the plan.
+    """
+    groups: Dict[Tuple[str, str], Dict[str, List[WorkItem]]] = OrderedDict()
+    for item in items:
+        prompt_groups = groups.setdefault((item.model_name, item.system_prompt), OrderedDict())
+        prompt_groups.setdefault(item.user_prompt, []).append(item)
+
+    return [
+        item
+        for prompt_groups in groups.values()
+        for same_prompt in prompt_groups.values()
+        for item in same_prompt
+    ]
+
+
+def order_stratified(items: Iterable[WorkItem]) -> List[WorkItem]:
+    """Interleave work items into stratified rounds.
+
+    Round ``r`` holds run ``r`` of every cell. Inside a round the scenario
+    varies fastest, then the model, then the temperature, then the value, so
+    each (model, temperature, value) cell's six scenarios finish together and
+    stay comparable, and every model and temperature is reached early on.
+    Stopping after any prefix, e.g. at a deadline, leaves every cell with the
+    same number of runs (give or take one), and the partial round covers all
+    temperatures with complete scenario sets rather than, say, natural data
+    with no resistance data.
+    """
+    items = list(items)
+
+    def positions(key) -> Dict:
+        return {k: i for i, k in enumerate(OrderedDict.fromkeys(key(item) for item in items))}
+
+    models = positions(lambda item: item.model_name)
+    temperatures = positions(lambda item: item.temperature)
+    values = positions(lambda item: item.value_name)
+    scenarios = positions(lambda item: item.test_name)
+
+    return sorted(items, key=lambda item: (
+        item.run_index,
+        values[item.value_name],
+        temperatures[item.temperature],
+        models[item.model_name],
+        scenarios[item.test_name]
+    ))
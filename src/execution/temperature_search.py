@@ -0,0 +1,148 @@
+"""Adaptive temperature grid search by bisection of sharp Yes-rate transitions."""
+
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..core.results import TestResult
+from ..testing.experiment_plan import WorkItem
+
+# Coarse grid used when fewer than two temperatures are given
+DEFAULT_COARSE_TEMPERATURES = (0.0, 0.5, 1.0)
+
+# (model, value, scenario)
+CurveKey = Tuple[str, str, str]
+
+
+@dataclass
+class TemperaturePoint:
+    """Observed Yes-rate for one cell at one temperature."""
+    issued: int = 0
+    observed: int = 0
+    successes: int = 0
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self.successes / self.observed if self.observed else None
+
+
+class TemperatureBisector:
+    """Refines the temperature grid only where Yes-rates change sharply.
+
+    Every (model, value, scenario) curve starts on the coarse grid. After
+    each round, any pair of neighbouring temperatures whose Yes-rates differ
+    by at least ``flip_threshold`` and are further apart than ``resolution``
+    gets its midpoint sampled ``runs`` times in the next round.
+    """
+
+    def __init__(
+        self,
+        templates: Iterable[WorkItem],
+        coarse_temperatures: Sequence[float],
+        runs: int,
+        flip_threshold: float = 0.5,
+        resolution: float = 0.05
+    ):
+        self.templates: Dict[CurveKey, WorkItem] = OrderedDict()
+        for template in templates:
+            self.templates.setdefault(self._curve_key(template), template)
+        self.coarse_temperatures = sorted(set(coarse_temperatures))
+        self.runs = max(1, runs)
+        self.flip_threshold = flip_threshold
+        self.resolution = resolution
+        self.curves: Dict[CurveKey, Dict[float, TemperaturePoint]] = {
+            key: {} for key in self.templates
+        }
+        self.issued = 0
+        self._started = False
+
+    @staticmethod
+    def _curve_key(item: WorkItem) -> CurveKey:
+        return (item.model_name, item.value_name, item.test_name)
+
+    def _issue(self, key: CurveKey, temperature: float) -> List[WorkItem]:
+        point = self.curves[key].setdefault(temperature, TemperaturePoint())
+        items = [
+            replace(self.templates[key], temperature=temperature, run_index=point.issued + run)
+            for run in range(self.runs)
+        ]
+        point.issued += self.runs
+        self.issued += self.runs
+        return items
+
+    def next_round(self) -> List[WorkItem]:
+        """Work items for the next round, or an empty list when no transition needs refining."""
+        batch: List[WorkItem] = []
+        if not self._started:
+            self._started = True
+            for temperature in self.coarse_temperatures:
+                for key in self.templates:
+                    batch.extend(self._issue(key, temperature))
+            return batch
+
+        for key in self.templates:
+            for temperature in self._midpoints_to_sample(key):
+                batch.extend(self._issue(key, temperature))
+        return batch
+
+    def _midpoints_to_sample(self, key: CurveKey) -> List[float]:
+        points = sorted(
+            (t, p.rate) for t, p in self.curves[key].items() if p.rate is not None
+        )
+        midpoints = []
+        for (low_t, low_rate), (high_t, high_rate) in zip(points, points[1:]):
+            if high_t - low_t <= self.resolution:
+                continue
+            if abs(high_rate - low_rate) >= self.flip_threshold:
+                midpoint = round((low_t + high_t) / 2, 4)
+                if midpoint not in self.curves[key]:
+                    midpoints.append(midpoint)
+        return midpoints
+
+    def record_result(self, item: WorkItem, result: TestResult):
+        """Fold a completed result into its curve point."""
+        points = self.curves.get(self._curve_key(item))
+        if points is None or result.evaluation is None:
+            return
+        point = points.setdefault(item.temperature, TemperaturePoint())
+        point.observed += 1
+        point.successes += result.evaluation.automated_score
+
+    def uniform_grid_calls(self) -> int:
+        """Calls a uniform grid at the final resolution would have needed."""
+        low, high = self.coarse_temperatures[0], self.coarse_temperatures[-1]
+        points = int(round((high - low) / self.resolution)) + 1
+        return points * len(self.templates) * self.runs
+
+    def transition_curves(self) -> Dict[str, Dict[str, Any]]:
+        """Per-value transition curves: value -> scenario -> sampled points and transition estimate.
+
+        The transition temperature is the midpoint of the narrowest bracket
+        whose Yes-rate change crosses ``flip_threshold``, or None if the
+        scenario never flips.
+        """
+        curves: Dict[str, Dict[str, Any]] = OrderedDict()
+        multiple_models = len(self._models()) > 1
+        for (model_name, value_name, test_name), points in self.curves.items():
+            observed = sorted(
+                (t, p.rate, p.observed) for t, p in points.items() if p.rate is not None
+            )
+            transition = None
+            narrowest = None
+            for (low_t, low_rate, _), (high_t, high_rate, _) in zip(observed, observed[1:]):
+                if abs(high_rate - low_rate) >= self.flip_threshold:
+                    if narrowest is None or high_t - low_t < narrowest:
+                        narrowest = high_t - low_t
+                        transition = round((low_t + high_t) / 2, 4)
+
+            scenarios = curves.setdefault(value_name, OrderedDict())
+            scenarios[f"{model_name}:{test_name}" if multiple_models else test_name] = {
+                "points": [
+                    {"temperature": t, "yes_rate": rate, "runs": n} for t, rate, n in observed
+                ],
+                "transition_temperature": transition
+            }
+        return curves
+
+    def _models(self) -> List[str]:
+        return list(OrderedDict.fromkeys(key[0] for key in self.templates))
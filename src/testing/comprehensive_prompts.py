@@ -47,8 +47,8 @@ class ComprehensivePromptGenerator:
         base_prompt = "You are a helpful AI assistant."
         
         if category == TestCategory.NATURAL:
-            # No additional instructions - test natural tendencies
-            return base_prompt
+            # No system prompt at all - test natural tendencies
+            return ""
             
         elif category == TestCategory.INSTRUCTED:
             # Instruct the model to value the specific statement
@@ -0,0 +1,246 @@
+"""Compiled experiment plans for baseline testing."""
+
+import json
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from ..core.values import ValueDefinition
+from ..core.results import TestCategory, ValueDirection
+from .comprehensive_prompts import generate_comprehensive_test_matrix
+
+PLAN_FORMAT_VERSION = 1
+
+# (value name, category, direction, test name, system prompt id, user prompt id)
+Scenario = Tuple[str, TestCategory, ValueDirection, str, int, int]
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    """A single model call scheduled by an experiment plan."""
+    model_name: str
+    temperature: float
+    run_index: int
+    value_name: str
+    category: TestCategory
+    direction: ValueDirection
+    test_name: str
+    system_prompt: str
+    user_prompt: str
+
+    @property
+    def description(self) -> str:
+        """Short human-readable label used in logs and the dashboard."""
+        return f"T{self.temperature}_R{self.run_index + 1}_{self.value_name}_{self.test_name}"
+
+
+class ExperimentPlan:
+    """Ordered list of every model call an experiment will make.
+
+    Items are stored column-wise as small integer arrays (model, temperature,
+    run, scenario) pointing into interned tables, so each prompt string is
+    held once however many runs and temperatures reuse it. ``WorkItem``
+    objects are only built as the plan is iterated.
+    """
+
+    def __init__(self, items: Iterable[WorkItem] = ()):
+        self._models: List[str] = []
+        self._temperatures: List[float] = []
+        self.prompts: List[str] = []
+        self.scenarios: List[Scenario] = []
+        self._ids: Dict[Tuple[str, Hashable], int] = {}
+        self._model = array("H")
+        self._temperature = array("H")
+        self._run = array("I")
+        self._scenario = array("I")
+        for item in items:
+            self.append(item)
+
+    def _intern(self, table: List, kind: str, value: Hashable) -> int:
+        key = (kind, value)
+        index = self._ids.get(key)
+        if index is None:
+            index = self._ids[key] = len(table)
+            table.append(value)
+        return index
+
+    def prompt_id(self, prompt: str) -> int:
+        """Id of a prompt in ``prompts``, interning it if new."""
+        return self._intern(self.prompts, "prompt", prompt)
+
+    def scenario_id(self, value_name: str, category: TestCategory, direction: ValueDirection,
+                    test_name: str, system_prompt: str, user_prompt: str) -> int:
+        """Id of a scenario in ``scenarios``, interning it and its prompts if new."""
+        scenario = (value_name, category, direction, test_name,
+                    self.prompt_id(system_prompt), self.prompt_id(user_prompt))
+        return self._intern(self.scenarios, "scenario", scenario)
+
+    def append_ids(self, model_name: str, temperature: float, run_index: int, scenario_id: int):
+        """Add an item for an already interned scenario without building a WorkItem."""
+        self._model.append(self._intern(self._models, "model", model_name))
+        self._temperature.append(self._intern(self._temperatures, "temperature", temperature))
+        self._run.append(run_index)
+        self._scenario.append(scenario_id)
+
+    def append(self, item: WorkItem):
+        scenario = self.scenario_id(item.value_name, item.category, item.direction, item.test_name,
+                                    item.system_prompt, item.user_prompt)
+        self.append_ids(item.model_name, item.temperature, item.run_index, scenario)
+
+    def __len__(self) -> int:
+        return len(self._run)
+
+    def _item(self, index: int) -> WorkItem:
+        value_name, category, direction, test_name, system_id, user_id = self.scenarios[self._scenario[index]]
+        return WorkItem(
+            model_name=self._models[self._model[index]],
+            temperature=self._temperatures[self._temperature[index]],
+            run_index=self._run[index],
+            value_name=value_name,
+            category=category,
+            direction=direction,
+            test_name=test_name,
+            system_prompt=self.prompts[system_id],
+            user_prompt=self.prompts[user_id]
+        )
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[WorkItem, "ExperimentPlan"]:
+        if isinstance(index, slice):
+            return self.subset(range(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("plan index out of range")
+        return self._item(index)
+
+    def __iter__(self) -> Iterator[WorkItem]:
+        return (self._item(index) for index in range(len(self)))
+
+    @property
+    def items(self) -> List[WorkItem]:
+        """Every work item, materialized."""
+        return list(self)
+
+    @property
+    def models(self) -> List[str]:
+        """Models in the order they first appear in the plan."""
+        return list(self._models)
+
+    @property
+    def temperatures(self) -> List[float]:
+        """Temperatures in the order they first appear in the plan."""
+        return list(self._temperatures)
+
+    def subset(self, indexes: Iterable[int]) -> "ExperimentPlan":
+        """New plan of the items at ``indexes`` (in that order), sharing the interned prompts."""
+        plan = ExperimentPlan()
+        plan.prompts = list(self.prompts)
+        plan.scenarios = list(self.scenarios)
+        plan._ids = {key: index for key, index in self._ids.items() if key[0] in ("prompt", "scenario")}
+        for index in indexes:
+            plan.append_ids(self._models[self._model[index]], self._temperatures[self._temperature[index]],
+                            self._run[index], self._scenario[index])
+        return plan
+
+    def filter(self, predicate: Callable[[WorkItem], bool]) -> "ExperimentPlan":
+        """New plan of the items matching ``predicate``, in plan order."""
+        return self.subset(index for index in range(len(self)) if predicate(self._item(index)))
+
+    def group_by(self, key: Callable[[WorkItem], Hashable]) -> Dict[Hashable, List[WorkItem]]:
+        """Group work items by an arbitrary key, preserving plan order."""
+        groups: Dict[Hashable, List[WorkItem]] = OrderedDict()
+        for item in self:
+            groups.setdefault(key(item), []).append(item)
+        return groups
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form: the interned tables plus one id column per field."""
+        return {
+            "version": PLAN_FORMAT_VERSION,
+            "models": self._models,
+            "temperatures": self._temperatures,
+            "prompts": self.prompts,
+            "scenarios": [
+                [value_name, category.value, direction.value, test_name, system_id, user_id]
+                for value_name, category, direction, test_name, system_id, user_id in self.scenarios
+            ],
+            "items": {
+                "model": self._model.tolist(),
+                "temperature": self._temperature.tolist(),
+                "run": self._run.tolist(),
+                "scenario": self._scenario.tolist()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExperimentPlan":
+        if data.get("version") != PLAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported experiment plan version: {data.get('version')}")
+        plan = cls()
+        for prompt in data["prompts"]:
+            plan.prompt_id(prompt)
+        for value_name, category, direction, test_name, system_id, user_id in data["scenarios"]:
+            plan._intern(plan.scenarios, "scenario", (
+                value_name, TestCategory(category), ValueDirection(direction), test_name, system_id, user_id
+            ))
+        items = data["items"]
+        for model, temperature, run_index, scenario in zip(
+            items["model"], items["temperature"], items["run"], items["scenario"]
+        ):
+            plan.append_ids(data["models"][model], data["temperatures"][temperature], run_index, scenario)
+        return plan
+
+    def save(self, path: str):
+        """Write the plan as JSON so another process can run or resume exactly this work."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "ExperimentPlan":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def compile_experiment_plan(
+    models: Sequence[str],
+    values: Sequence[ValueDefinition],
+    temperatures: Sequence[float],
+    runs: int,
+    runs_per_cell: Optional[Dict[Tuple[str, float, str, str], int]] = None
+) -> ExperimentPlan:
+    """Expand models x temperatures x runs x values x scenarios into a plan.
+
+    ``runs_per_cell`` optionally overrides ``runs`` for individual
+    (model, temperature, value, scenario) cells, e.g. from a power-analysis
+    run allocation. Items are ordered exactly as the baseline loop in
+    main.py executes them. Prompts are generated once per value; the grid
+    itself only adds four integers per item.
+    """
+    plan = ExperimentPlan()
+    scenarios = {
+        value.name: [
+            (scenario["test_name"], plan.scenario_id(
+                value.name, scenario["category"], scenario["direction"], scenario["test_name"],
+                scenario["system_prompt"], scenario["user_prompt"]
+            ))
+            for scenario in generate_comprehensive_test_matrix(value)
+        ]
+        for value in values
+    }
+    runs_per_cell = runs_per_cell or {}
+    max_runs = max([runs, *runs_per_cell.values()])
+
+    for model_name in models:
+        for temperature in temperatures:
+            for run_index in range(max_runs):
+                for value in values:
+                    for test_name, scenario_id in scenarios[value.name]:
+                        cell = (model_name, temperature, value.name, test_name)
+                        if run_index >= runs_per_cell.get(cell, runs):
+                            continue
+                        plan.append_ids(model_name, temperature, run_index, scenario_id)
+
+    return plan
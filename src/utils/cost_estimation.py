@@ -6,15 +6,31 @@ from typing import Dict, Optional
 import json
 from pathlib import Path
 
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
 @dataclass
 class ModelPricing:
     """Pricing information for a specific model."""
     input_cost_per_1k_tokens: float
     output_cost_per_1k_tokens: float
+    cached_input_cost_per_1k_tokens: Optional[float] = None  # Defaults to half the input rate
     
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
-        """Calculate exact cost for given token counts."""
-        input_cost = (input_tokens / 1000) * self.input_cost_per_1k_tokens
+    def calculate_cost(self, input_tokens: int, output_tokens: int,
+                       cached_input_tokens: int = 0) -> float:
+        """Calculate exact cost for given token counts.
+        
+        ``cached_input_tokens`` is the part of ``input_tokens`` served from the
+        provider's prompt cache, billed at the cached input rate.
+        """
+        cached_rate = self.cached_input_cost_per_1k_tokens
+        if cached_rate is None:
+            cached_rate = self.input_cost_per_1k_tokens * 0.5
+        cached_input_tokens = min(cached_input_tokens, input_tokens)
+        input_cost = ((input_tokens - cached_input_tokens) / 1000) * self.input_cost_per_1k_tokens
+        input_cost += (cached_input_tokens / 1000) * cached_rate
         output_cost = (output_tokens / 1000) * self.output_cost_per_1k_tokens
         return input_cost + output_cost
 
@@ -25,8 +41,9 @@ class CostEstimator:
         """Initialize with pricing configuration."""
         self.config_path = config_path or "config/pricing.json"
         self.pricing_data = self._load_pricing_config()
-        # Token estimation using simple heuristic (rough calculation)
-        # Assumes ~4 characters per token (OpenAI's rule of thumb)
+        # tiktoken encoding for count_tokens, loaded on first use
+        self._encoding = None
+        self._encoding_loaded = False
     
     def _load_pricing_config(self) -> Dict[str, ModelPricing]:
         """Load pricing configuration from file."""
@@ -45,10 +62,12 @@ class CostEstimator:
             "anthropic-claude-3-sonnet": ModelPricing(
                 input_cost_per_1k_tokens=0.00300,   # $3.00 per 1M input tokens
                 output_cost_per_1k_tokens=0.01500,  # $15.00 per 1M output tokens
+                cached_input_cost_per_1k_tokens=0.00030,  # $0.30 per 1M cache reads
             ),
             "anthropic-claude-3-haiku": ModelPricing(
                 input_cost_per_1k_tokens=0.00025,   # $0.25 per 1M input tokens
                 output_cost_per_1k_tokens=0.00125,  # $1.25 per 1M output tokens
+                cached_input_cost_per_1k_tokens=0.00003,  # $0.03 per 1M cache reads
             )
         }
         
@@ -73,13 +92,14 @@ class CostEstimator:
         config_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Convert ModelPricing objects to dict
-        data = {
-            model: {
+        data = {}
+        for model, pricing in self.pricing_data.items():
+            data[model] = {
                 "input_cost_per_1k_tokens": pricing.input_cost_per_1k_tokens,
                 "output_cost_per_1k_tokens": pricing.output_cost_per_1k_tokens
             }
-            for model, pricing in self.pricing_data.items()
-        }
+            if pricing.cached_input_cost_per_1k_tokens is not None:
+                data[model]["cached_input_cost_per_1k_tokens"] = pricing.cached_input_cost_per_1k_tokens
         
         with open(config_file, 'w') as f:
             json.dump(data, f, indent=2)
@@ -94,27 +114,53 @@ class CostEstimator:
             return 0
         return max(1, len(text) // 4)  # Rough estimate: 4 chars per token
     
-    def calculate_test_cost(self, system_prompt: Optional[str], user_prompt: str, 
-                           model_name: str) -> float:
-        """Calculate cost for a specific test using heuristic token estimation."""
-        # Normalize model name
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with tiktoken when available, else fall back to the heuristic.
+        
+        tiktoken's o200k encoding is exact for the GPT-4o family and a close
+        approximation for other providers.
+        """
+        if not text:
+            return 0
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            if tiktoken is not None:
+                try:
+                    self._encoding = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    # Encoding files are downloaded on first use; stay offline-safe
+                    self._encoding = None
+        if self._encoding is None:
+            return self.estimate_tokens(text)
+        return len(self._encoding.encode(text))
+    
+    def get_pricing(self, model_name: str) -> ModelPricing:
+        """Get pricing for a model, normalizing temperature suffixes."""
         base_model = model_name.split('_T')[0] if '_T' in model_name else model_name
         
         if base_model not in self.pricing_data:
             base_model = "chatgpt-4o-mini"  # Default fallback
         
-        pricing = self.pricing_data[base_model]
+        return self.pricing_data[base_model]
+    
+    def calculate_test_cost(self, system_prompt: Optional[str], user_prompt: str, 
+                           model_name: str, output_tokens: int = 2,
+                           cached_tokens: int = 0) -> float:
+        """Calculate cost for a specific test, counting tokens the same way as the forecast."""
+        pricing = self.get_pricing(model_name)
         
-        # Estimate input tokens using simple heuristic
         input_tokens = 0
         if system_prompt:
-            input_tokens += self.estimate_tokens(system_prompt)
-        input_tokens += self.estimate_tokens(user_prompt)
-        
-        # Estimate output tokens (typically short "Yes" or "No" responses)
-        output_tokens = 2  # Conservative estimate for yes/no responses
+            input_tokens += self.count_tokens(system_prompt)
+        input_tokens += self.count_tokens(user_prompt)
         
-        return pricing.calculate_cost(input_tokens, output_tokens)
+        # Output tokens default to a conservative estimate for yes/no responses
+        return pricing.calculate_cost(input_tokens, output_tokens, cached_tokens)
+    
+    def calculate_cache_savings(self, model_name: str, cached_tokens: int) -> float:
+        """Dollar savings from serving ``cached_tokens`` prompt tokens from cache."""
+        pricing = self.get_pricing(model_name)
+        return pricing.calculate_cost(cached_tokens, 0) - pricing.calculate_cost(cached_tokens, 0, cached_tokens)
     
     def estimate_experiment_cost(self, model_name: str, num_values: int, 
                                 num_temperatures: int, num_runs: int) -> Dict[str, float]:
@@ -0,0 +1,163 @@
+"""Local HTTP server that streams live dashboard updates over Server-Sent Events."""
+
+import json
+import queue
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlparse
+
+from .live_dashboard import LiveDashboard
+
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT_SECONDS = 15
+
+
+class DashboardServer:
+    """Serves a LiveDashboard at http://host:port/ and pushes each change over SSE.
+
+    The page is rendered once from the in-memory state; afterwards every
+    test, status or concurrency change arrives as a small event on
+    ``/events``. Clients that reconnect resume from their last event id, as
+    long as it is still in the ``replay_events`` buffer; otherwise they are
+    told to reload. A client whose queue fills up is dropped rather than
+    slowing the experiment down.
+    """
+
+    def __init__(self, dashboard: LiveDashboard, host: str = "127.0.0.1", port: int = 8765,
+                 replay_events: int = 1000, max_queued_events: int = 1000):
+        self.dashboard = dashboard
+        self.host = host
+        self.port = port
+        self.max_queued_events = max_queued_events
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=replay_events)
+        self._clients: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        """Start serving in a background thread."""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.dashboard.add_listener(self._broadcast)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="dashboard-server", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Close every event stream and shut the server down."""
+        self.dashboard.remove_listener(self._broadcast)
+        with self._lock:
+            clients, self._clients = self._clients, set()
+        for client in clients:
+            try:
+                client.put_nowait(None)
+            except queue.Full:
+                pass
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _broadcast(self, event: Dict[str, Any]):
+        with self._lock:
+            self._recent.append(event)
+            for client in list(self._clients):
+                try:
+                    client.put_nowait(event)
+                except queue.Full:
+                    # A stalled browser must not hold events for the whole run
+                    self._clients.discard(client)
+
+    def _subscribe(self, since: int) -> Optional[tuple]:
+        """Register a client and return (its queue, events to replay), or None if it must reload."""
+        client: queue.Queue = queue.Queue(maxsize=self.max_queued_events)
+        with self._lock:
+            missed: List[Dict[str, Any]] = [event for event in self._recent if event["sequence"] > since]
+            oldest = self._recent[0]["sequence"] if self._recent else None
+            if oldest is not None and oldest > since + 1:
+                return None
+            self._clients.add(client)
+        return client, missed
+
+    def _is_subscribed(self, client: queue.Queue) -> bool:
+        with self._lock:
+            return client in self._clients
+
+    def _unsubscribe(self, client: queue.Queue):
+        with self._lock:
+            self._clients.discard(client)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path in ("/", "/index.html"):
+                    html = server.dashboard._render_html(server.dashboard._snapshot(), live=True)
+                    self._send(200, "text/html; charset=utf-8", html.encode("utf-8"))
+                elif url.path == "/state":
+                    snapshot = server.dashboard._snapshot()
+                    self._send(200, "application/json", json.dumps(snapshot).encode("utf-8"))
+                elif url.path == "/events":
+                    since = self.headers.get("Last-Event-ID") or parse_qs(url.query).get("since", ["0"])[0]
+                    self._stream_events(int(since) if since.isdigit() else 0)
+                else:
+                    self._send(404, "text/plain", b"Not found")
+
+            def _send(self, status: int, content_type: str, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_event(self, event: Dict[str, Any]):
+                self.wfile.write(f"id: {event['sequence']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _stream_events(self, since: int):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "keep-alive")
+                self.end_headers()
+
+                subscription = server._subscribe(since)
+                try:
+                    if subscription is None:
+                        self._write_event({"type": "reload", "sequence": since})
+                        return
+                    client, missed = subscription
+                    for event in missed:
+                        self._write_event(event)
+                    while True:
+                        try:
+                            event = client.get(timeout=HEARTBEAT_SECONDS)
+                        except queue.Empty:
+                            if not server._is_subscribed(client):
+                                return
+                            self.wfile.write(b": keep-alive\n\n")
+                            self.wfile.flush()
+                            continue
+                        if event is None:
+                            return
+                        self._write_event(event)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    if subscription is not None:
+                        server._unsubscribe(subscription[0])
+
+            def log_message(self, format, *args):
+                pass  # Keep experiment output readable
+
+        return Handler
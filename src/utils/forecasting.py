@@ -0,0 +1,273 @@
+"""Cost and ETA forecasting for compiled experiment plans."""
+
+import json
+import sqlite3
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cost_estimation import CostEstimator
+from .model_names import split_model_name
+from .statistics import percentile
+from ..testing.experiment_plan import WorkItem
+
+# Used when results.db has no latency history for a model
+DEFAULT_LATENCY_SECONDS = 1.0
+# Used when results.db has no responses to measure output length from
+DEFAULT_OUTPUT_TOKENS = 2
+# Timestamp gaps longer than this are treated as pauses, not latency
+MAX_TIMESTAMP_GAP_SECONDS = 120.0
+# Most recent results read for latency and response-length history
+MAX_HISTORY_ROWS = 5000
+
+
+def model_matches(stored_base: str, model_name: str) -> bool:
+    """Check whether a stored client model name refers to a configured model name."""
+    return stored_base == model_name or stored_base.endswith(f"-{model_name}")
+
+
+@dataclass
+class LatencyProfile:
+    """Observed per-call latencies for one model (and optionally temperature)."""
+    samples: List[float] = field(default_factory=list)
+    source: str = "default"
+
+    @property
+    def mean(self) -> float:
+        if not self.samples:
+            return DEFAULT_LATENCY_SECONDS
+        return sum(self.samples) / len(self.samples)
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile, q in [0, 100]."""
+        if not self.samples:
+            return DEFAULT_LATENCY_SECONDS
+        return percentile(self.samples, q)
+
+
+class LatencyHistory:
+    """Latency and response-length history mined from results.db."""
+
+    def __init__(self):
+        self._latencies: Dict[Tuple[str, Optional[float]], LatencyProfile] = {}
+        self._output_tokens: Dict[str, List[int]] = defaultdict(list)
+
+    @classmethod
+    def from_database(cls, db_path: str = "data/results.db", rate_limit_delay: float = 0.5,
+                      cost_estimator: Optional[CostEstimator] = None,
+                      max_rows: int = MAX_HISTORY_ROWS) -> 'LatencyHistory':
+        """Load history from the ``max_rows`` most recent results in a database.
+
+        Prefers the per-call ``latency_seconds`` recorded in result metadata.
+        Older rows without it fall back to the gap between consecutive results
+        in the same session, minus the runner's rate-limit delay. Response
+        lengths come from the ``output_tokens`` stored at write time; only
+        older rows without it are tokenized here.
+        """
+        history = cls()
+        if not Path(db_path).exists():
+            return history
+
+        estimator = cost_estimator or CostEstimator()
+
+        with sqlite3.connect(db_path) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    SELECT model_name, session_id, timestamp, response_text, metadata
+                    FROM test_results
+                    ORDER BY rowid DESC
+                    LIMIT ?
+                ''', (max_rows,))
+            except sqlite3.OperationalError:
+                return history
+            rows = sorted(cursor.fetchall(), key=lambda row: (row[1], row[2]))
+
+        previous_by_session: Dict[str, datetime] = {}
+        for model_name, session_id, timestamp, response_text, metadata in rows:
+            base_model, temperature = split_model_name(model_name, metadata)
+            meta = json.loads(metadata) if metadata else {}
+
+            current_time = datetime.fromisoformat(timestamp)
+            previous_time = previous_by_session.get(session_id)
+            previous_by_session[session_id] = current_time
+
+            if meta.get("output_tokens") is not None:
+                history._output_tokens[base_model].append(int(meta["output_tokens"]))
+            elif response_text:
+                history._output_tokens[base_model].append(estimator.count_tokens(response_text))
+
+            if meta.get("coalesced"):
+                # Coalesced results waited on another call; their latency is not representative
+                continue
+            if meta.get("latency_seconds") is not None:
+                history._add_latency(base_model, temperature, float(meta["latency_seconds"]), "measured")
+            elif previous_time is not None:
+                gap = (current_time - previous_time).total_seconds() - rate_limit_delay
+                if 0 < gap < MAX_TIMESTAMP_GAP_SECONDS:
+                    history._add_latency(base_model, temperature, gap, "timestamps")
+
+        return history
+
+    def _add_latency(self, base_model: str, temperature: Optional[float], latency: float, source: str):
+        for key in ((base_model, temperature), (base_model, None)):
+            profile = self._latencies.setdefault(key, LatencyProfile(source=source))
+            profile.samples.append(latency)
+            if source == "measured":
+                profile.source = source
+
+    def latency_for(self, model_name: str, temperature: float) -> LatencyProfile:
+        """Latency profile for a model at a temperature, falling back to any temperature."""
+        for wanted_temperature in (temperature, None):
+            for (base_model, stored_temperature), profile in self._latencies.items():
+                if stored_temperature == wanted_temperature and model_matches(base_model, model_name):
+                    return profile
+        return LatencyProfile()
+
+    def mean_output_tokens(self, model_name: str) -> float:
+        """Average observed response length in tokens for a model."""
+        for base_model, counts in self._output_tokens.items():
+            if counts and model_matches(base_model, model_name):
+                return sum(counts) / len(counts)
+        return DEFAULT_OUTPUT_TOKENS
+
+
+@dataclass
+class ForecastGroup:
+    """Forecast for all plan items sharing a model and temperature."""
+    model: str
+    temperature: float
+    tests: int = 0
+    input_tokens: int = 0
+    output_tokens: float = 0.0
+    cost: float = 0.0
+    mean_latency: float = DEFAULT_LATENCY_SECONDS
+    p95_latency: float = DEFAULT_LATENCY_SECONDS
+    latency_source: str = "default"
+    latency_samples: int = 0
+
+    def serial_seconds(self, rate_limit_delay: float, p95: bool = False) -> float:
+        """Wall-clock time to run this group on a single worker."""
+        latency = self.p95_latency if p95 else self.mean_latency
+        return self.tests * (latency + rate_limit_delay)
+
+
+@dataclass
+class ExperimentForecast:
+    """Cost and runtime forecast for a whole plan."""
+    groups: List[ForecastGroup]
+    concurrency: int
+    rate_limit_delay: float
+
+    @property
+    def total_tests(self) -> int:
+        return sum(g.tests for g in self.groups)
+
+    @property
+    def total_cost(self) -> float:
+        return sum(g.cost for g in self.groups)
+
+    def eta_seconds(self, p95: bool = False) -> float:
+        """Expected (or pessimistic, with p95=True) wall-clock runtime."""
+        serial = sum(g.serial_seconds(self.rate_limit_delay, p95) for g in self.groups)
+        return serial / max(1, self.concurrency)
+
+
+def _format_duration(seconds: float) -> str:
+    return str(timedelta(seconds=int(round(seconds))))
+
+
+class ExperimentForecaster:
+    """Forecasts cost and ETA by costing every prompt in a compiled plan."""
+
+    def __init__(self, cost_estimator: Optional[CostEstimator] = None,
+                 history: Optional[LatencyHistory] = None):
+        self.cost_estimator = cost_estimator or CostEstimator()
+        self.history = history or LatencyHistory()
+
+    def forecast(self, plan: Iterable[WorkItem], concurrency: int = 1,
+                 rate_limit_delay: float = 0.5) -> ExperimentForecast:
+        """Cost every prompt in the plan and predict runtime from latency history.
+
+        The plan is read once, so a lazy stream of work items works as well as a compiled plan.
+        """
+        token_cache: Dict[str, int] = {}
+        output_cache: Dict[str, float] = {}
+
+        def tokens(text: str) -> int:
+            if text not in token_cache:
+                token_cache[text] = self.cost_estimator.count_tokens(text)
+            return token_cache[text]
+
+        groups: Dict[Tuple[str, float], ForecastGroup] = {}
+        for item in plan:
+            key = (item.model_name, item.temperature)
+            group = groups.get(key)
+            if group is None:
+                profile = self.history.latency_for(item.model_name, item.temperature)
+                group = groups[key] = ForecastGroup(
+                    model=item.model_name,
+                    temperature=item.temperature,
+                    mean_latency=profile.mean,
+                    p95_latency=profile.percentile(95),
+                    latency_source=profile.source,
+                    latency_samples=len(profile.samples)
+                )
+
+            if item.model_name not in output_cache:
+                output_cache[item.model_name] = self.history.mean_output_tokens(item.model_name)
+            output_tokens = output_cache[item.model_name]
+            input_tokens = tokens(item.system_prompt) + tokens(item.user_prompt)
+            pricing = self.cost_estimator.get_pricing(item.model_name)
+
+            group.tests += 1
+            group.input_tokens += input_tokens
+            group.output_tokens += output_tokens
+            group.cost += pricing.calculate_cost(input_tokens, output_tokens)
+
+        return ExperimentForecast(
+            groups=list(groups.values()),
+            concurrency=concurrency,
+            rate_limit_delay=rate_limit_delay
+        )
+
+    def print_forecast(self, plan: Iterable[WorkItem], concurrency: int = 1,
+                       rate_limit_delay: float = 0.5,
+                       require_confirmation: bool = True) -> bool:
+        """Print cost and ETA by model and temperature, optionally requiring confirmation."""
+        forecast = self.forecast(plan, concurrency, rate_limit_delay)
+
+        print("\n" + "=" * 78)
+        print("💰 COST & RUNTIME FORECAST")
+        print("=" * 78)
+        print(f"{'Model':<26}{'Temp':>6}{'Tests':>8}{'Cost':>12}{'Mean lat':>9}{'p95 lat':>9}  History")
+        print("-" * 78)
+        for group in forecast.groups:
+            history_note = f"{group.latency_samples} {group.latency_source}" if group.latency_samples else "none"
+            print(f"{group.model:<26}{group.temperature:>6}{group.tests:>8}"
+                  f"{'$' + format(group.cost, '.4f'):>12}"
+                  f"{group.mean_latency:>8.2f}s{group.p95_latency:>8.2f}s  {history_note}")
+        print("-" * 78)
+        print(f"📈 Total tests: {forecast.total_tests} (concurrency {forecast.concurrency}, "
+              f"{forecast.rate_limit_delay}s rate-limit delay)")
+        print(f"⏱️  Estimated runtime: {_format_duration(forecast.eta_seconds())} "
+              f"(p95: {_format_duration(forecast.eta_seconds(p95=True))})")
+        print(f"💰 TOTAL ESTIMATED COST: ${forecast.total_cost:.4f}")
+        print("=" * 78)
+
+        if forecast.total_cost > 1.0:
+            print("⚠️  HIGH COST WARNING: This experiment will cost more than $1.00")
+        elif forecast.total_cost > 0.10:
+            print("⚠️  MODERATE COST: This experiment will cost more than $0.10")
+
+        if any(g.latency_source == "default" for g in forecast.groups):
+            print(f"\n📝 No latency history for some models; assuming {DEFAULT_LATENCY_SECONDS}s per call.")
+
+        if require_confirmation:
+            print(f"\n❓ Do you want to proceed with this ${forecast.total_cost:.4f} experiment?")
+            response = input("   Type 'yes' to continue, anything else to cancel: ").strip().lower()
+            return response == 'yes'
+
+        return True
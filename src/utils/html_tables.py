@@ -0,0 +1,223 @@
+"""Client-side virtualized tables for HTML reports.
+
+Rows ship as compact JSON (string columns dictionary-encoded) and the
+browser renders only the rows scrolled into view, so a page stays
+responsive with hundreds of thousands of rows. Each table gets filter
+drop-downs for chosen columns that work without regenerating the page.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+VIRTUAL_TABLE_STYLE = """
+        .vt-filters { display: flex; gap: 12px; align-items: center; margin: 10px 0; font-size: 13px; flex-wrap: wrap; }
+        .vt-filters select { padding: 4px; }
+        .vt-count { color: #7f8c8d; margin-left: auto; }
+        .vt-viewport { overflow-y: auto; border: 1px solid #ddd; }
+        .vt-table { width: 100%; border-collapse: collapse; table-layout: fixed; font-size: 12px; }
+        .vt-table th { position: sticky; top: 0; background: #f8f9fa; z-index: 1; }
+        .vt-table th, .vt-table td { padding: 0 8px; border-bottom: 1px solid #eee; text-align: left;
+                                     white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+"""
+
+VIRTUAL_TABLE_SCRIPT = """
+        function VirtualTable(id, spec) {
+            var self = this;
+            VirtualTable.tables[id] = this;
+            this.spec = spec;
+            this.rowHeight = spec.rowHeight || 28;
+            this.limit = spec.limit || 0;
+            this.filters = {};
+            this.options = {};
+            this.keys = {};
+            this.rows = spec.rows.map(function(row) {
+                return row.map(function(value, i) {
+                    var dictionary = spec.dictionaries[i];
+                    return dictionary ? dictionary[value] : value;
+                });
+            });
+            var root = document.getElementById(id);
+            var bar = document.createElement('div');
+            bar.className = 'vt-filters';
+            spec.filters.forEach(function(column) {
+                var index = spec.columns.indexOf(column);
+                var select = document.createElement('select');
+                select.innerHTML = '<option value="">All ' + VirtualTable.escape(spec.labels[index]) + '</option>';
+                select.onchange = function() {
+                    self.filters[index] = select.value;
+                    self.refilter();
+                };
+                self.options[index] = {select: select, seen: {}};
+                bar.appendChild(select);
+            });
+            this.count = document.createElement('span');
+            this.count.className = 'vt-count';
+            bar.appendChild(this.count);
+            root.appendChild(bar);
+            this.viewport = document.createElement('div');
+            this.viewport.className = 'vt-viewport';
+            this.viewport.style.height = (spec.height || 480) + 'px';
+            var header = spec.labels.map(function(label, i) {
+                var width = spec.widths && spec.widths[i] ? ' style="width: ' + spec.widths[i] + '"' : '';
+                return '<th' + width + '>' + VirtualTable.escape(label) + '</th>';
+            }).join('');
+            this.viewport.innerHTML = '<table class="vt-table"><thead><tr>' + header + '</tr></thead><tbody></tbody></table>';
+            this.body = this.viewport.querySelector('tbody');
+            this.viewport.onscroll = function() {
+                if (!self.pending) {
+                    self.pending = true;
+                    requestAnimationFrame(function() { self.pending = false; self.render(); });
+                }
+            };
+            root.appendChild(this.viewport);
+            this.rows.forEach(function(row, i) { self.track(row, i); });
+            this.refilter();
+        }
+        VirtualTable.tables = {};
+        VirtualTable.escape = function(text) {
+            return String(text == null ? '' : text).replace(/[&<>"']/g, function(c) {
+                return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+            });
+        };
+        VirtualTable.format = function(value, format) {
+            if (format === 'money') { return '$' + Number(value || 0).toFixed(6); }
+            if (format === 'percent') { return value == null ? 'N/A' : Math.round(value * 100) + '%'; }
+            if (format === 'score') { return value === 1 ? '✅ 1' : value === 0 ? '❌ 0' : 'N/A'; }
+            if (format === 'pvalue') { return value == null ? 'N/A' : value < 0.001 ? '<0.001' : value.toFixed(3); }
+            return value == null ? '' : String(value);
+        };
+        VirtualTable.prototype.track = function(row, index) {
+            var self = this;
+            if (this.spec.key.length) { this.keys[this.keyOf(row)] = index; }
+            Object.keys(this.options).forEach(function(i) {
+                var option = self.options[i], value = String(row[i]);
+                if (!option.seen[value]) {
+                    option.seen[value] = true;
+                    var element = document.createElement('option');
+                    element.value = value;
+                    element.textContent = value;
+                    option.select.appendChild(element);
+                }
+            });
+        };
+        VirtualTable.prototype.matches = function(row) {
+            for (var i in this.filters) {
+                if (this.filters[i] !== '' && String(row[i]) !== this.filters[i]) { return false; }
+            }
+            return true;
+        };
+        VirtualTable.prototype.refilter = function() {
+            var self = this;
+            this.view = [];
+            this.rows.forEach(function(row, i) { if (self.matches(row)) { self.view.push(i); } });
+            this.render();
+        };
+        VirtualTable.prototype.append = function(row) {
+            this.rows.push(row);
+            this.track(row, this.rows.length - 1);
+            if (this.limit && this.rows.length > this.limit) {
+                this.rows.splice(0, this.rows.length - this.limit);
+                this.refilter();
+            } else {
+                if (this.matches(row)) { this.view.push(this.rows.length - 1); }
+                this.render();
+            }
+        };
+        VirtualTable.prototype.keyOf = function(row) {
+            return this.spec.key.map(function(i) { return row[i]; }).join('|');
+        };
+        VirtualTable.prototype.upsert = function(row) {
+            var index = this.keys[this.keyOf(row)];
+            if (index == null) { return this.append(row); }
+            this.rows[index] = row;
+            this.render();
+        };
+        VirtualTable.prototype.render = function() {
+            var spec = this.spec, height = this.rowHeight;
+            var start = Math.max(0, Math.floor(this.viewport.scrollTop / height) - 10);
+            var end = Math.min(this.view.length, start + Math.ceil(this.viewport.clientHeight / height) + 20);
+            var html = '<tr style="height: ' + (start * height) + 'px"></tr>';
+            for (var n = start; n < end; n++) {
+                var row = this.rows[this.view[n]];
+                html += '<tr style="height: ' + height + 'px">';
+                for (var i = 0; i < row.length; i++) {
+                    var text = VirtualTable.escape(VirtualTable.format(row[i], spec.formats[i]));
+                    var css = spec.classes[i] && spec.classes[i][String(row[i])];
+                    html += '<td title="' + text + '">' + (css ? '<span class="' + css + '">' + text + '</span>' : text) + '</td>';
+                }
+                html += '</tr>';
+            }
+            html += '<tr style="height: ' + ((this.view.length - end) * height) + 'px"></tr>';
+            this.body.innerHTML = html;
+            this.count.textContent = this.view.length + ' of ' + this.rows.length + ' rows';
+        };
+"""
+
+
+def virtual_table_assets() -> str:
+    """Style and script every page with virtual tables must include once, in <head>."""
+    return f"<style>{VIRTUAL_TABLE_STYLE}</style>\n<script>{VIRTUAL_TABLE_SCRIPT}</script>"
+
+
+def encode_rows(rows: Sequence[Sequence[Any]], categorical: Sequence[int]) -> Tuple[List[List[Any]], Dict[int, List[Any]]]:
+    """Dictionary-encode the categorical columns of row-major data."""
+    dictionaries: Dict[int, List[Any]] = {index: [] for index in categorical}
+    codes: Dict[int, Dict[Any, int]] = {index: {} for index in categorical}
+    encoded = []
+    for row in rows:
+        encoded_row = list(row)
+        for index in categorical:
+            value = row[index]
+            code = codes[index].get(value)
+            if code is None:
+                code = codes[index][value] = len(dictionaries[index])
+                dictionaries[index].append(value)
+            encoded_row[index] = code
+        encoded.append(encoded_row)
+    return encoded, dictionaries
+
+
+def virtual_table_html(
+    table_id: str,
+    columns: Sequence[Tuple[str, str]],
+    rows: Sequence[Sequence[Any]],
+    filters: Sequence[str] = (),
+    categorical: Sequence[str] = (),
+    formats: Optional[Dict[str, str]] = None,
+    classes: Optional[Dict[str, Dict[str, str]]] = None,
+    widths: Optional[Dict[str, str]] = None,
+    key: Sequence[str] = (),
+    limit: Optional[int] = None,
+    height: int = 480
+) -> str:
+    """Container and initialisation script for one virtualized table.
+
+    ``columns`` are (name, label) pairs and ``rows`` hold values in that
+    order. ``formats`` maps a column to 'money', 'percent', 'score' or
+    'pvalue'; ``classes`` maps a column to {value: css class}. ``key`` names
+    the columns ``upsert`` matches on, and ``limit`` keeps only the newest
+    rows appended from the browser (use one or the other).
+    """
+    names = [name for name, _ in columns]
+    categorical_indexes = [names.index(name) for name in categorical]
+    encoded, dictionaries = encode_rows(rows, categorical_indexes)
+    formats = formats or {}
+    classes = classes or {}
+    widths = widths or {}
+    spec = {
+        "columns": names,
+        "labels": [label for _, label in columns],
+        "rows": encoded,
+        "dictionaries": {str(index): values for index, values in dictionaries.items()},
+        "filters": list(filters),
+        "formats": {str(names.index(name)): fmt for name, fmt in formats.items()},
+        "classes": {str(names.index(name)): css for name, css in classes.items()},
+        "widths": [widths.get(name) for name in names],
+        "key": [names.index(name) for name in key],
+        "limit": limit,
+        "height": height
+    }
+    # Keep "</script>" inside the data from closing the script tag
+    payload = json.dumps(spec, separators=(",", ":")).replace("</", "<\\/")
+    return (f'<div id="{table_id}"></div>\n'
+            f'<script>new VirtualTable("{table_id}", {payload});</script>')
@@ -2,15 +2,147 @@
 
 import json
 import os
+import tempfile
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List
+
+from .html_tables import virtual_table_assets, virtual_table_html
+
+
+TEST_COLUMNS = [
+    ("index", "#"), ("value", "Value"), ("scenario", "Scenario"), ("temperature", "Temp"),
+    ("system_prompt", "System Prompt"), ("question", "Question Asked"), ("response", "Response"),
+    ("score", "Score"), ("cost", "Cost")
+]
+
+CELL_COLUMNS = [
+    ("model", "Model"), ("temperature", "Temp"), ("value", "Value"), ("scenario", "Scenario"),
+    ("tests", "Tests"), ("yes_rate", "Yes-Rate")
+]
+
+
+def test_row(test: Dict[str, Any]) -> List[Any]:
+    """Recent-tests table row for a completed test (mirrors testRow in the live script)."""
+    system_prompt = test.get('system_prompt') or ''
+    # Show "[None]" for the default assistant prompt
+    if not system_prompt.strip() or system_prompt.strip() == "You are a helpful AI assistant.":
+        system_prompt = "[None]"
+    temperature = test.get("temperature")
+    return [
+        test.get("index"),
+        test.get("value", "N/A"),
+        test.get("scenario", test.get("test_type", "N/A")),
+        "N/A" if temperature is None else temperature,
+        system_prompt,
+        test.get("question", ""),
+        test.get("response", ""),
+        test.get("evaluation_score"),
+        test.get("cost", 0)
+    ]
+
+
+def cell_row(cell: Dict[str, Any]) -> List[Any]:
+    """Yes-rate table row for one cell (mirrors cellRow in the live script)."""
+    temperature = cell.get("temperature")
+    return [
+        cell["model"],
+        "N/A" if temperature is None else temperature,
+        cell["value"],
+        cell["scenario"],
+        cell["total"],
+        cell["yes"] / cell["total"] if cell["total"] else None
+    ]
+
+
+RELOAD_SCRIPT = """
+        // Auto-refresh every 3 seconds
+        setInterval(function() {
+            location.reload();
+        }, 3000);"""
+
+# Applies server-sent events to the page rendered at sequence __SEQUENCE__
+LIVE_SCRIPT_TEMPLATE = """
+        function setText(id, text) {
+            var element = document.getElementById(id);
+            if (element) { element.textContent = text; }
+        }
+        function testRow(test) {
+            var systemPrompt = test.system_prompt || '';
+            if (!systemPrompt.trim() || systemPrompt.trim() === 'You are a helpful AI assistant.') {
+                systemPrompt = '[None]';
+            }
+            return [test.index, test.value || 'N/A', test.scenario || test.test_type || 'N/A',
+                    test.temperature == null ? 'N/A' : test.temperature, systemPrompt,
+                    test.question || '', test.response || '',
+                    test.evaluation_score == null ? null : test.evaluation_score, test.cost || 0];
+        }
+        function cellRow(cell) {
+            return [cell.model, cell.temperature == null ? 'N/A' : cell.temperature, cell.value,
+                    cell.scenario, cell.total, cell.total ? cell.yes / cell.total : null];
+        }
+        function updateProgress() {
+            var completed = parseInt(document.getElementById('completed-tests').textContent, 10);
+            var total = parseInt(document.getElementById('total-tests').textContent, 10);
+            var progress = total > 0 ? (completed / total * 100) : 0;
+            var fill = document.getElementById('progress-fill');
+            fill.style.width = progress.toFixed(1) + '%';
+            fill.textContent = progress.toFixed(1) + '%';
+        }
+        // On reconnect the browser resumes from the last event id it saw
+        var source = new EventSource('/events?since=__SEQUENCE__');
+        source.onmessage = function(message) {
+            var event = JSON.parse(message.data);
+            if (event.type === 'reload') {
+                location.reload();
+            } else if (event.type === 'test') {
+                VirtualTable.tables['tests-table'].append(testRow(event.test));
+                VirtualTable.tables['cells-table'].upsert(cellRow(event.cell));
+                setText('completed-tests', event.completed_tests);
+                setText('total-cost', '$' + event.total_cost.toFixed(6));
+                setText('cached-tokens', event.cached_tokens);
+                updateProgress();
+            } else if (event.type === 'current') {
+                setText('current-test-name', event.current_test);
+            } else if (event.type === 'status') {
+                setText('status', event.status.toUpperCase());
+                setText('total-tests', event.total_tests);
+                updateProgress();
+            } else if (event.type === 'concurrency') {
+                setText('concurrency-limit', event.in_flight + '/' + event.limit);
+                setText('latency-percentiles',
+                    (event.p50_latency == null ? 'N/A' : event.p50_latency.toFixed(2) + 's') + ' / ' +
+                    (event.p95_latency == null ? 'N/A' : event.p95_latency.toFixed(2) + 's'));
+            }
+            setText('last-update', new Date().toLocaleTimeString());
+        };"""
 
 
 class LiveDashboard:
-    """Creates and updates a live HTML dashboard."""
+    """Creates and updates a live HTML dashboard.
     
-    def __init__(self, dashboard_path: str = "live_progress.html"):
+    Updates only change in-memory state; a background thread renders the page
+    at most ``max_writes_per_second`` times a second and replaces the file
+    atomically, so the event loop never waits on HTML formatting or disk I/O
+    and a browser reload never sees a half-written page. Listeners added with
+    ``add_listener`` receive every change as a small event dict, numbered by
+    ``sequence``, e.g. for streaming to a browser.
+    
+    Memory stays constant however long the sweep runs: only counters,
+    per-cell Yes-rates, costs by model and the most recent ``recent_tests``
+    tests and ``recent_errors`` errors are kept. Every test and error is also
+    appended to ``history_path`` (JSONL) by the writer thread; a history left
+    by an earlier run is renamed with its timestamp first.
+    """
+    
+    def __init__(self, dashboard_path: str = "live_progress.html", max_writes_per_second: float = 2.0,
+                 recent_tests: int = 200, recent_errors: int = 100, history_path: str = None):
         self.dashboard_path = dashboard_path
+        self.history_path = history_path or os.path.splitext(dashboard_path)[0] + "_history.jsonl"
+        self.recent_tests = recent_tests
+        self.min_write_interval = 1.0 / max_writes_per_second if max_writes_per_second > 0 else 0.0
         self.progress_data = {
             "experiment_name": "LMCA Study",
             "start_time": datetime.now().isoformat(),
@@ -18,12 +150,24 @@ class LiveDashboard:
             "total_tests": 0,
             "completed_tests": 0,
             "current_test": "Initializing...",
-            "tests": [],
-            "costs": {"total": 0.0, "by_model": {}},
-            "errors": [],
+            "tests": deque(maxlen=recent_tests),
+            "cells": {},
+            "costs": {"total": 0.0, "by_model": {}, "cached_tokens": 0},
+            "errors": deque(maxlen=recent_errors),
+            "error_count": 0,
+            "concurrency": None,
             "last_update": datetime.now().isoformat()
         }
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stopped = False
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._sequence = 0
+        self._spill: List[Dict[str, Any]] = []
+        self._rotate_history()
         self._create_initial_dashboard()
+        self._writer = threading.Thread(target=self._write_loop, name="dashboard-writer", daemon=True)
+        self._writer.start()
     
     def _create_initial_dashboard(self):
         """Create the initial HTML dashboard."""
@@ -253,43 +397,172 @@ class LiveDashboard:
 </html>
         """
         
-        with open(self.dashboard_path, 'w') as f:
-            f.write(html_content)
+        self._write_atomic(html_content)
+    
+    def _write_atomic(self, html_content: str):
+        """Write the page to a temp file and rename it over the dashboard."""
+        directory = os.path.dirname(os.path.abspath(self.dashboard_path))
+        fd, temp_path = tempfile.mkstemp(prefix=".dashboard-", suffix=".html", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(html_content)
+            os.replace(temp_path, self.dashboard_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    def _write_loop(self):
+        """Background writer: render and write whenever state changed, rate limited."""
+        while not self._stopped:
+            self._dirty.wait()
+            if self._stopped:
+                break
+            self._dirty.clear()
+            started = time.monotonic()
+            self._write_now()
+            # Updates arriving meanwhile are coalesced into the next write
+            time.sleep(max(0.0, self.min_write_interval - (time.monotonic() - started)))
+    
+    def _write_now(self):
+        try:
+            self._spill_history()
+            self._write_atomic(self._render_html(self._snapshot()))
+        except Exception as e:
+            print(f"Dashboard write error: {e}")
+    
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Receive every state change as an event dict (called on the updating thread)."""
+        with self._lock:
+            self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+    
+    def _publish(self, event_type: str, **fields):
+        """Number an event and hand it to listeners; call with the lock held."""
+        self._sequence += 1
+        event = {"type": event_type, "sequence": self._sequence, **fields}
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Dashboard listener error: {e}")
+    
+    def _rotate_history(self):
+        """Start a fresh history, keeping the previous run's under a timestamped name."""
+        if os.path.exists(self.history_path) and os.path.getsize(self.history_path) > 0:
+            stem, extension = os.path.splitext(self.history_path)
+            stamp = datetime.fromtimestamp(os.path.getmtime(self.history_path)).strftime("%Y%m%d_%H%M%S")
+            os.replace(self.history_path, f"{stem}_{stamp}{extension}")
+        open(self.history_path, 'w').close()
+    
+    def _spill_history(self):
+        """Append tests and errors completed since the last write to the history file."""
+        with self._lock:
+            records, self._spill = self._spill, []
+        if records:
+            with open(self.history_path, 'a') as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+    
+    def _snapshot(self) -> Dict[str, Any]:
+        """Consistent copy of the state, taken quickly under the lock."""
+        with self._lock:
+            snapshot = dict(self.progress_data)
+            snapshot["sequence"] = self._sequence
+            snapshot["tests"] = list(self.progress_data["tests"])
+            snapshot["errors"] = list(self.progress_data["errors"])
+            snapshot["cells"] = {key: dict(cell) for key, cell in self.progress_data["cells"].items()}
+            snapshot["costs"] = {
+                **self.progress_data["costs"],
+                "by_model": dict(self.progress_data["costs"]["by_model"])
+            }
+        return snapshot
     
     def start_experiment(self, experiment_name: str, total_tests: int):
         """Initialize experiment tracking."""
-        self.progress_data.update({
-            "experiment_name": experiment_name,
-            "total_tests": total_tests,
-            "status": "running"
-        })
+        with self._lock:
+            self.progress_data.update({
+                "experiment_name": experiment_name,
+                "total_tests": total_tests,
+                "status": "running"
+            })
+            self._publish("status", status="running", total_tests=total_tests)
+        self.update_dashboard()
+    
+    def set_total_tests(self, total_tests: int):
+        """Update the expected number of tests (e.g. when adaptive sampling stops early)."""
+        with self._lock:
+            self.progress_data["total_tests"] = total_tests
+            self._publish("status", status=self.progress_data["status"], total_tests=total_tests)
+        self.update_dashboard()
+    
+    def update_concurrency(self, snapshot: Dict[str, Any]):
+        """Record the current in-flight limit and observed call latencies."""
+        with self._lock:
+            self.progress_data["concurrency"] = snapshot
+            self.progress_data["last_update"] = datetime.now().isoformat()
+            self._publish("concurrency", **snapshot)
         self.update_dashboard()
     
     def update_current_test(self, test_description: str):
         """Update the currently running test."""
-        self.progress_data["current_test"] = test_description
-        self.progress_data["last_update"] = datetime.now().isoformat()
+        with self._lock:
+            self.progress_data["current_test"] = test_description
+            self.progress_data["last_update"] = datetime.now().isoformat()
+            self._publish("current", current_test=test_description)
         self.update_dashboard()
     
     def complete_test(self, test_data: Dict[str, Any]):
         """Mark a test as completed."""
         try:
-            self.progress_data["tests"].append({
-                **test_data,
-                "status": "completed",
-                "timestamp": datetime.now().isoformat()
-            })
-            self.progress_data["completed_tests"] = len(self.progress_data["tests"])
-            
-            # Update costs
-            if "cost" in test_data:
-                self.progress_data["costs"]["total"] += test_data["cost"]
-                model = test_data.get("model", "unknown")
-                if model not in self.progress_data["costs"]["by_model"]:
-                    self.progress_data["costs"]["by_model"][model] = 0.0
-                self.progress_data["costs"]["by_model"][model] += test_data["cost"]
-            
-            self.progress_data["last_update"] = datetime.now().isoformat()
+            with self._lock:
+                self.progress_data["completed_tests"] += 1
+                test = {
+                    **test_data,
+                    "index": self.progress_data["completed_tests"],
+                    "status": "completed",
+                    "timestamp": datetime.now().isoformat()
+                }
+                self.progress_data["tests"].append(test)
+                self._spill.append({"record": "test", **test})
+                
+                # Running Yes-rate per (model, value, scenario) cell
+                scenario = test_data.get("scenario", test_data.get("test_type", "unknown"))
+                cell_id = f"{test_data.get('model', 'unknown')}|{test_data.get('value', 'unknown')}|{scenario}"
+                cell = self.progress_data["cells"].get(cell_id)
+                if cell is None:
+                    cell = self.progress_data["cells"][cell_id] = {
+                        "model": test_data.get("model", "unknown"),
+                        "temperature": test_data.get("temperature"),
+                        "value": test_data.get("value", "unknown"),
+                        "scenario": scenario,
+                        "total": 0,
+                        "yes": 0
+                    }
+                if test_data.get("evaluation_score") is not None:
+                    cell["total"] += 1
+                    cell["yes"] += test_data["evaluation_score"]
+                
+                # Update costs
+                if "cost" in test_data:
+                    self.progress_data["costs"]["total"] += test_data["cost"]
+                    model = test_data.get("model", "unknown")
+                    if model not in self.progress_data["costs"]["by_model"]:
+                        self.progress_data["costs"]["by_model"][model] = 0.0
+                    self.progress_data["costs"]["by_model"][model] += test_data["cost"]
+                self.progress_data["costs"]["cached_tokens"] += test_data.get("cached_tokens", 0)
+                
+                self.progress_data["last_update"] = datetime.now().isoformat()
+                self._publish(
+                    "test",
+                    test=test,
+                    completed_tests=self.progress_data["completed_tests"],
+                    total_cost=self.progress_data["costs"]["total"],
+                    cached_tokens=self.progress_data["costs"]["cached_tokens"],
+                    cell=dict(cell)
+                )
             self.update_dashboard()
         except Exception as e:
             print(f"Dashboard complete_test error: {e}")
@@ -298,78 +571,100 @@ class LiveDashboard:
     
     def add_error(self, error_msg: str, test_context: str = ""):
         """Add an error to the log."""
-        self.progress_data["errors"].append({
-            "error": error_msg,
-            "test": test_context,
-            "timestamp": datetime.now().isoformat()
-        })
+        with self._lock:
+            error = {
+                "error": error_msg,
+                "test": test_context,
+                "timestamp": datetime.now().isoformat()
+            }
+            self.progress_data["errors"].append(error)
+            self.progress_data["error_count"] += 1
+            self._spill.append({"record": "error", **error})
+            self._publish("error", **error)
         self.update_dashboard()
     
     def complete_experiment(self):
-        """Mark experiment as completed."""
-        self.progress_data["status"] = "completed"
-        self.progress_data["end_time"] = datetime.now().isoformat()
-        self.update_dashboard()
+        """Mark experiment as completed and write the final page."""
+        with self._lock:
+            self.progress_data["status"] = "completed"
+            self.progress_data["end_time"] = datetime.now().isoformat()
+            self._publish("status", status="completed", total_tests=self.progress_data["total_tests"])
+        self.close()
     
     def update_dashboard(self):
-        """Update the HTML dashboard with current data."""
+        """Schedule a redraw; the writer thread picks it up within its rate limit."""
+        if self._stopped:
+            self._write_now()
+        else:
+            self._dirty.set()
+    
+    def close(self):
+        """Stop the writer thread and write the final state synchronously."""
+        self._stopped = True
+        self._dirty.set()
+        self._writer.join()
+        self._write_now()
+    
+    def _render_html(self, data: Dict[str, Any], live: bool = False) -> str:
+        """Render the dashboard page for a state snapshot.
+        
+        With ``live`` the page follows the server's event stream instead of
+        reloading itself every few seconds.
+        """
         # Calculate progress
         progress = 0
-        if self.progress_data["total_tests"] > 0:
-            progress = (self.progress_data["completed_tests"] / self.progress_data["total_tests"]) * 100
+        if data["total_tests"] > 0:
+            progress = (data["completed_tests"] / data["total_tests"]) * 100
         
         # Calculate elapsed time
-        start_time = datetime.fromisoformat(self.progress_data["start_time"])
+        start_time = datetime.fromisoformat(data["start_time"])
         elapsed = datetime.now() - start_time
         elapsed_str = str(elapsed).split('.')[0]  # Remove microseconds
         
         # Format start time
         start_time_str = start_time.strftime("%Y-%m-%d %H:%M:%S")
         
-        # Build tests table with system prompts and questions
-        tests_html = ""
-        for i, test in enumerate(self.progress_data["tests"], 1):
-            # Format system prompt (show "None" if empty, otherwise show full prompt)
-            system_prompt = test.get('system_prompt', '')
-            if not system_prompt or system_prompt.strip() == "You are a helpful AI assistant.":
-                system_prompt_display = "[None]"
-            else:
-                system_prompt_display = system_prompt
-            
-            # Format question (show full question)
-            question = test.get('question', '')
-            question_display = question
-            
-            # Format response 
-            response = test.get('response', '')
-            response_display = response[:40] + "..." if len(response) > 40 else response
-            
-            # Format evaluation score
-            eval_score = test.get('evaluation_score', 'N/A')
-            if eval_score == 1:
-                score_display = "✅ 1"
-                score_class = "eval-high"
-            elif eval_score == 0:
-                score_display = "❌ 0"
-                score_class = "eval-low"
-            else:
-                score_display = "N/A"
-                score_class = "eval-medium"
-            
-            tests_html += f"""
-                <tr>
-                    <td>{i}</td>
-                    <td>{test.get('value', 'N/A')}</td>
-                    <td>{test.get('test_type', 'N/A')}</td>
-                    <td style="font-size: 10px; max-width: 200px; word-wrap: break-word;">{system_prompt_display}</td>
-                    <td style="font-size: 10px; max-width: 250px; word-wrap: break-word;">{question_display}</td>
-                    <td style="font-size: 11px;">{response_display}</td>
-                    <td><span class="eval-score {score_class}">{score_display}</span></td>
-                    <td>${test.get('cost', 0):.6f}</td>
-                </tr>
-            """
+        # Recent tests and per-cell Yes-rates ship as JSON for client-side tables
+        tests_table = virtual_table_html(
+            "tests-table",
+            TEST_COLUMNS,
+            [test_row(test) for test in data["tests"]],
+            filters=("value", "scenario", "temperature"),
+            categorical=("value", "scenario", "system_prompt", "question"),
+            formats={"score": "score", "cost": "money"},
+            classes={"score": {"1": "eval-score eval-high", "0": "eval-score eval-low"}},
+            widths={"index": "50px", "temperature": "60px", "score": "60px", "cost": "90px"},
+            limit=self.recent_tests
+        )
+        cells_table = virtual_table_html(
+            "cells-table",
+            CELL_COLUMNS,
+            [cell_row(cell) for cell in data["cells"].values()],
+            filters=("value", "scenario", "temperature"),
+            formats={"yes_rate": "percent"},
+            key=("model", "value", "scenario"),
+            height=300
+        )
+        
+        # Adaptive concurrency stats, shown only when a controller is active
+        concurrency_html = ""
+        concurrency = data.get("concurrency")
+        if concurrency:
+            p50 = concurrency.get("p50_latency")
+            p95 = concurrency.get("p95_latency")
+            p50_display = f"{p50:.2f}s" if p50 is not None else "N/A"
+            p95_display = f"{p95:.2f}s" if p95 is not None else "N/A"
+            concurrency_html = f"""
+            <div class="stat-card">
+                <div class="stat-number" id="concurrency-limit">{concurrency["in_flight"]}/{concurrency["limit"]}</div>
+                <div class="stat-label">In-Flight / Limit</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number" id="latency-percentiles">{p50_display} / {p95_display}</div>
+                <div class="stat-label">Latency p50 / p95</div>
+            </div>"""
         
-        # Cost tracking removed from dashboard display
+        live_script = LIVE_SCRIPT_TEMPLATE.replace("__SEQUENCE__", str(data.get("sequence", 0)))
         
         # Generate fresh HTML instead of reading existing file
         html_content = f"""
@@ -497,11 +792,9 @@ class LiveDashboard:
             border-left: 4px solid #ffc107;
         }}
     </style>
+    {virtual_table_assets()}
     <script>
-        // Auto-refresh every 3 seconds
-        setInterval(function() {{
-            location.reload();
-        }}, 3000);
+        {live_script if live else RELOAD_SCRIPT}
         
         // Update last refresh time
         window.onload = function() {{
@@ -527,7 +820,7 @@ class LiveDashboard:
     <div class="container">
         <div class="header">
             <h1>🧪 LMCA Value Preservation Study</h1>
-            <div class="status" id="status">{self.progress_data["status"].upper()}</div>
+            <div class="status" id="status">{data["status"].upper()}</div>
             <div>Started: {start_time_str}</div>
         </div>
         
@@ -539,54 +832,44 @@ class LiveDashboard:
         
         <div class="stats">
             <div class="stat-card">
-                <div class="stat-number" id="completed-tests">{self.progress_data["completed_tests"]}</div>
+                <div class="stat-number" id="completed-tests">{data["completed_tests"]}</div>
                 <div class="stat-label">Tests Completed</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number" id="total-tests">{self.progress_data["total_tests"]}</div>
+                <div class="stat-number" id="total-tests">{data["total_tests"]}</div>
                 <div class="stat-label">Total Tests</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number" id="total-cost">${self.progress_data['costs']['total']:.6f}</div>
+                <div class="stat-number" id="total-cost">${data['costs']['total']:.6f}</div>
                 <div class="stat-label">Total Cost</div>
             </div>
             <div class="stat-card">
                 <div class="stat-number" id="elapsed-time">{elapsed_str}</div>
                 <div class="stat-label">Elapsed Time</div>
             </div>
+            <div class="stat-card">
+                <div class="stat-number" id="cached-tokens">{data['costs']['cached_tokens']}</div>
+                <div class="stat-label">Cached Prompt Tokens</div>
+            </div>{concurrency_html}
         </div>
         
         <div class="current-test">
             <h3>🔄 Current Test</h3>
-            <div id="current-test-name">{self.progress_data["current_test"]}</div>
+            <div id="current-test-name">{data["current_test"]}</div>
         </div>
         
-        <h3>📊 Test Results</h3>
-        <table class="tests-table">
-            <thead>
-                <tr>
-                    <th>#</th>
-                    <th>Value</th>
-                    <th>Test Type</th>
-                    <th>System Prompt</th>
-                    <th>Question Asked</th>
-                    <th>Response</th>
-                    <th>Score</th>
-                    <th>Cost</th>
-                </tr>
-            </thead>
-            <tbody id="tests-table-body">
-                {tests_html}
-            </tbody>
-        </table>
+        <h3>📈 Yes-Rate by Cell</h3>
+        {cells_table}
+        
+        <h3>📊 Test Results (latest {len(data["tests"])} of {data["completed_tests"]}; full history in {os.path.basename(self.history_path)})</h3>
+        {tests_table}
     </div>
 </body>
 </html>
         """
         
         # Write updated HTML
-        with open(self.dashboard_path, 'w') as f:
-            f.write(html_content)
+        return html_content
     
     def get_dashboard_path(self) -> str:
         """Get the full path to the dashboard file."""
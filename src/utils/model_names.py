@@ -0,0 +1,26 @@
+"""Parsing of the model names stored with each result."""
+
+import json
+import re
+from typing import Optional, Tuple
+
+_TEMPERATURE_SUFFIX = re.compile(r"_T([0-9.]+)$")
+
+
+def split_model_name(model_name: str, metadata: Optional[str] = None) -> Tuple[str, Optional[float]]:
+    """(model, temperature) from a stored name like ``openai-gpt-4o-mini_T0.7``.
+
+    Falls back to the temperature in the result's JSON metadata when the
+    name has no suffix; the temperature is None if neither has one.
+    """
+    match = _TEMPERATURE_SUFFIX.search(model_name)
+    if match:
+        try:
+            return model_name[:match.start()], float(match.group(1))
+        except ValueError:
+            pass
+    if metadata:
+        temperature = json.loads(metadata).get("temperature")
+        if temperature is not None:
+            return model_name, float(temperature)
+    return model_name, None
@@ -0,0 +1,199 @@
+"""Statistical power planning: size runs per cell from prior results."""
+
+import json
+import sqlite3
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..core.values import ValueDefinition
+from .forecasting import model_matches
+from .model_names import split_model_name
+from .statistics import two_proportion_sample_size
+
+COMPARISONS = ("natural-resistance", "natural-instructed", "temperature")
+
+SCENARIOS = (
+    "natural_positive", "natural_negative",
+    "instructed_positive", "instructed_negative",
+    "resistance_positive", "resistance_negative",
+)
+
+# Rate assumed for cells without prior data (worst case for variance)
+UNINFORMED_PRIOR_RATE = 0.5
+
+# (model, temperature, value, scenario)
+AllocationKey = Tuple[str, float, str, str]
+
+
+@dataclass
+class PriorRate:
+    """Prior Yes-rate observations for one (model, value, scenario[, temperature])."""
+    successes: int = 0
+    total: int = 0
+
+    @property
+    def rate(self) -> float:
+        return self.successes / self.total if self.total else UNINFORMED_PRIOR_RATE
+
+
+def load_prior_rates(db_path: str = "data/results.db") -> Dict[Tuple[str, Optional[float], str, str], PriorRate]:
+    """Load prior Yes-rates keyed by (stored model base, temperature or None, value, scenario).
+
+    The None-temperature entries pool every temperature for the cell.
+    """
+    priors: Dict[Tuple[str, Optional[float], str, str], PriorRate] = defaultdict(PriorRate)
+    if not Path(db_path).exists():
+        return priors
+
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT model_name, value_name, test_category, value_direction, automated_score, metadata
+            FROM test_results
+            WHERE automated_score IS NOT NULL AND test_category IS NOT NULL
+        ''')
+        rows = cursor.fetchall()
+
+    for model_name, value_name, category, direction, score, metadata in rows:
+        base_model, temperature = split_model_name(model_name, metadata)
+        scenario = f"{category}_{direction}"
+        for key in ((base_model, temperature, value_name, scenario), (base_model, None, value_name, scenario)):
+            priors[key].successes += score
+            priors[key].total += 1
+
+    return priors
+
+
+class PowerPlanner:
+    """Computes the runs each cell needs to detect an effect at a given power."""
+
+    def __init__(
+        self,
+        priors: Dict[Tuple[str, Optional[float], str, str], PriorRate],
+        effect_size: float = 0.2,
+        alpha: float = 0.05,
+        power: float = 0.8,
+        min_runs: int = 1,
+        max_runs: int = 100
+    ):
+        self.priors = priors
+        self.effect_size = effect_size
+        self.alpha = alpha
+        self.power = power
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self._stored_models = sorted({key[0] for key in priors})
+
+    def prior_rate(self, model_name: str, temperature: float, value_name: str, scenario: str) -> PriorRate:
+        """Prior for a cell at a temperature, falling back to all temperatures."""
+        for wanted_temperature in (temperature, None):
+            for base_model in self._stored_models:
+                if not model_matches(base_model, model_name):
+                    continue
+                prior = self.priors.get((base_model, wanted_temperature, value_name, scenario))
+                if prior is not None and prior.total:
+                    return prior
+        return PriorRate()
+
+    def required_runs(self, rate_a: float, rate_b: float) -> int:
+        """Runs per cell to detect ``effect_size`` between two cells with these prior rates.
+
+        The alternative moves ``rate_a`` by ``effect_size`` towards ``rate_b``
+        (or inward when that would leave [0, 1]), so near-deterministic cells
+        get few runs and uncertain ones get many.
+        """
+        step = self.effect_size if rate_b >= rate_a else -self.effect_size
+        alternative = rate_a + step
+        if not 0.0 <= alternative <= 1.0:
+            alternative = rate_a - step
+        alternative = min(1.0, max(0.0, alternative))
+        if alternative == rate_a:
+            return self.max_runs
+        runs = two_proportion_sample_size(rate_a, alternative, self.alpha, self.power)
+        return max(self.min_runs, min(self.max_runs, runs))
+
+    def _pairs(self, comparison: str, temperatures: Sequence[float]) -> List[Tuple[Tuple[float, str], Tuple[float, str]]]:
+        if comparison == "temperature":
+            ordered = sorted(temperatures)
+            return [
+                ((low, scenario), (high, scenario))
+                for scenario in SCENARIOS
+                for low, high in zip(ordered, ordered[1:])
+            ]
+        other = comparison.split("-")[1]
+        return [
+            ((temperature, f"natural_{direction}"), (temperature, f"{other}_{direction}"))
+            for temperature in temperatures
+            for direction in ("positive", "negative")
+        ]
+
+    def allocate(
+        self,
+        models: Sequence[str],
+        values: Sequence[ValueDefinition],
+        temperatures: Sequence[float],
+        comparison: str = "natural-resistance"
+    ) -> Dict[AllocationKey, int]:
+        """Runs per (model, temperature, value, scenario).
+
+        Cells in a compared pair get the larger of the two pair sizes; cells
+        outside any comparison get ``min_runs``.
+        """
+        if comparison not in COMPARISONS:
+            raise ValueError(f"Unknown comparison: {comparison}")
+
+        allocation: Dict[AllocationKey, int] = {}
+        for model_name in models:
+            for value in values:
+                for temperature in temperatures:
+                    for scenario in SCENARIOS:
+                        allocation[(model_name, temperature, value.name, scenario)] = self.min_runs
+
+                for (temp_a, scenario_a), (temp_b, scenario_b) in self._pairs(comparison, temperatures):
+                    rate_a = self.prior_rate(model_name, temp_a, value.name, scenario_a).rate
+                    rate_b = self.prior_rate(model_name, temp_b, value.name, scenario_b).rate
+                    runs = max(self.required_runs(rate_a, rate_b), self.required_runs(rate_b, rate_a))
+                    for key in ((model_name, temp_a, value.name, scenario_a),
+                                (model_name, temp_b, value.name, scenario_b)):
+                        allocation[key] = max(allocation[key], runs)
+
+        return allocation
+
+    def to_dict(self, allocation: Dict[AllocationKey, int], comparison: str) -> Dict:
+        """Serializable allocation file contents."""
+        return {
+            "comparison": comparison,
+            "effect_size": self.effect_size,
+            "alpha": self.alpha,
+            "power": self.power,
+            "cells": [
+                {
+                    "model": model_name,
+                    "temperature": temperature,
+                    "value": value_name,
+                    "scenario": scenario,
+                    "runs": runs
+                }
+                for (model_name, temperature, value_name, scenario), runs in allocation.items()
+            ]
+        }
+
+
+def save_run_allocation(data: Dict, path: str):
+    """Write a run allocation file."""
+    filepath = Path(path)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def load_run_allocation(path: str) -> Dict[AllocationKey, int]:
+    """Load a run allocation file as {(model, temperature, value, scenario): runs}."""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return {
+        (cell["model"], float(cell["temperature"]), cell["value"], cell["scenario"]): int(cell["runs"])
+        for cell in data["cells"]
+    }
@@ -0,0 +1,48 @@
+"""Small statistical helpers for Yes-rate estimates."""
+
+import math
+from statistics import NormalDist
+from typing import Optional, Sequence, Tuple
+
+
+def percentile(samples: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of a sample (q in [0, 100]), or None if empty."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def z_score(confidence: float = 0.95) -> float:
+    """Two-sided normal critical value for a confidence level."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes: int, n: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion.
+
+    Returns (0.0, 1.0) when there are no observations.
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    z = z_score(confidence)
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def two_proportion_sample_size(p1: float, p2: float, alpha: float = 0.05, power: float = 0.8) -> int:
+    """Runs per group needed to detect p1 != p2 with a two-sided two-proportion z-test."""
+    if p1 == p2:
+        raise ValueError("p1 and p2 must differ")
+    z_alpha = z_score(1 - alpha)
+    z_beta = NormalDist().inv_cdf(power)
+    p_bar = (p1 + p2) / 2
+    numerator = (
+        z_alpha * math.sqrt(2 * p_bar * (1 - p_bar))
+        + z_beta * math.sqrt(p1 * (1 - p1) + p2 * (1 - p2))
+    ) ** 2
+    return math.ceil(numerator / (p1 - p2) ** 2)
@@ -0,0 +1,50 @@
+"""Tests for sequential early stopping of runs per cell."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import results
+from src.execution.adaptive import SequentialSampler
+from src.testing.experiment_plan import WorkItem
+
+
+def templates(values=("honesty", "fairness")):
+    return [WorkItem("model-a", 0.7, 0, value, results.TestCategory.NATURAL,
+                     results.ValueDirection.POSITIVE, "natural_positive", "", "")
+            for value in values]
+
+
+def answer(score):
+    return SimpleNamespace(evaluation=SimpleNamespace(automated_score=score))
+
+
+def sample(sampler, score):
+    while True:
+        batch = sampler.next_round()
+        if not batch:
+            return
+        for item in batch:
+            sampler.record_result(item, answer(score))
+
+
+def test_single_run_budget_is_rejected():
+    with pytest.raises(ValueError):
+        SequentialSampler(templates(), runs=1, min_runs=3)
+
+
+def test_exhausted_budget_reports_unconverged_cells():
+    sampler = SequentialSampler(templates(), runs=3, target_width=0.1, min_runs=3)
+    sample(sampler, 1)
+    summary = sampler.summary()
+    assert summary["budget_exhausted"]
+    assert summary["calls_used"] == summary["budget"] == 6
+    assert (summary["converged"], summary["unconverged"]) == (0, 2)
+
+
+def test_deterministic_cells_converge_within_budget():
+    sampler = SequentialSampler(templates(), runs=20, target_width=0.3, min_runs=3)
+    sample(sampler, 1)
+    summary = sampler.summary()
+    assert summary["converged"] == 2
+    assert not summary["budget_exhausted"]
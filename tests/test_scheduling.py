@@ -0,0 +1,48 @@
+"""Tests for work item ordering."""
+
+from itertools import product
+
+from src.core import results
+from src.execution.scheduling import order_stratified
+from src.testing.experiment_plan import WorkItem
+
+MODELS = ["model-a", "model-b"]
+TEMPERATURES = [0.0, 0.7, 1.0]
+VALUES = ["honesty", "fairness", "privacy", "autonomy"]
+SCENARIOS = [(category, direction) for category in results.TestCategory
+             for direction in results.ValueDirection]
+
+
+def plan_items(runs):
+    """Work items in compiled plan order (model, temperature, run, value, scenario)."""
+    return [
+        WorkItem(model, temperature, run, value, category, direction,
+                 f"{category.value}_{direction.value}", "", "")
+        for model, temperature, run, value, (category, direction)
+        in product(MODELS, TEMPERATURES, range(runs), VALUES, SCENARIOS)
+    ]
+
+
+def test_single_run_prefix_reaches_every_temperature_and_model():
+    ordered = order_stratified(plan_items(runs=1))
+    prefix = ordered[:len(ordered) // len(VALUES)]
+    assert {item.temperature for item in prefix} == set(TEMPERATURES)
+    assert {item.model_name for item in prefix} == set(MODELS)
+
+
+def test_cell_scenarios_are_contiguous():
+    ordered = order_stratified(plan_items(runs=2))
+    for start in range(0, len(ordered), len(SCENARIOS)):
+        block = ordered[start:start + len(SCENARIOS)]
+        assert len({(item.model_name, item.temperature, item.value_name, item.run_index)
+                    for item in block}) == 1
+
+
+def test_prefix_keeps_runs_balanced():
+    ordered = order_stratified(plan_items(runs=3))
+    prefix = ordered[:len(ordered) // 2]
+    runs = {}
+    for item in prefix:
+        cell = (item.model_name, item.temperature, item.value_name, item.test_name)
+        runs[cell] = runs.get(cell, 0) + 1
+    assert max(runs.values()) - min(runs.values()) <= 1
@@ -0,0 +1,83 @@
+"""Tests for the score cube export."""
+
+import glob
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from src.analysis import score_cube
+from src.analysis.score_cube import ScoreCube, export_score_cube
+
+
+def add_rows(db_path, rows):
+    """Append (model_name, value, category, direction, score) rows to a minimal results table."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS test_results (
+            model_name TEXT, test_category TEXT, value_direction TEXT, test_type TEXT,
+            value_name TEXT, automated_score INTEGER, metadata TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO test_results VALUES (?, ?, ?, 'baseline', ?, ?, NULL)",
+        [(model, category, direction, value, score) for model, value, category, direction, score in rows]
+    )
+    conn.commit()
+    conn.close()
+
+
+def rows_for(value, runs, score=1):
+    return [("model-a_T0.7", value, category, direction, score)
+            for _ in range(runs)
+            for category in ("natural", "instructed")
+            for direction in ("positive", "negative")]
+
+
+def crash_on_commit(monkeypatch):
+    def replace(source, destination):
+        raise OSError("simulated crash")
+    monkeypatch.setattr(score_cube.os, "replace", replace)
+
+
+@pytest.fixture
+def cube_paths(tmp_path):
+    return str(tmp_path / "results.db"), str(tmp_path / "score_cube")
+
+
+def test_incremental_exports_fold_in_new_rows(cube_paths):
+    db_path, base = cube_paths
+    add_rows(db_path, rows_for("honesty", 2))
+    export_score_cube(db_path, base)
+    add_rows(db_path, rows_for("honesty", 3, score=0))
+    cube = export_score_cube(db_path, base)
+    assert int(cube.counts.sum()) == 20
+    assert int(cube.yes_counts().sum()) == 8
+    assert len(glob.glob(f"{base}*.npy")) == 2
+
+
+@pytest.mark.parametrize("new_value", ["honesty", "fairness"])
+def test_crash_before_sidecar_keeps_previous_generation(cube_paths, monkeypatch, new_value):
+    db_path, base = cube_paths
+    add_rows(db_path, rows_for("honesty", 2))
+    before = export_score_cube(db_path, base)
+    expected_counts, expected_yes = before.counts.copy(), before.yes_counts()
+
+    # Same value appends runs in place; a new value rebuilds into a new generation
+    add_rows(db_path, rows_for(new_value, 5, score=0))
+    with monkeypatch.context() as patch:
+        crash_on_commit(patch)
+        with pytest.raises(OSError):
+            export_score_cube(db_path, base)
+
+    interrupted = ScoreCube.open(base)
+    assert np.array_equal(interrupted.counts, expected_counts)
+    assert np.array_equal(interrupted.yes_counts(), expected_yes)
+
+    recovered = export_score_cube(db_path, base)
+    assert int(recovered.counts.sum()) == 28
+    assert int(recovered.yes_counts().sum()) == 8
+    assert int(recovered.valid().sum()) == 28
+    assert len(glob.glob(f"{base}*.npy")) == 2
+    assert not os.path.exists(f"{base}.json.tmp")